@@ -5,24 +5,48 @@
 #
 
 import json
+import hashlib
 import argparse
-from daemon import WeApRous, create_backend
+from daemon import WeApRous, freeze, HUB
+from daemon.credentials import CredentialStore, JsonFileProvider
 from daemon.session_manager import SessionManager
 
 # Tạo session manager (hết hạn sau 15 giây)
 session_mgr = SessionManager(expiry=15)
 
+# Kho tài khoản: nạp users.json một lần, tự nạp lại khi file thay đổi
+credentials = CredentialStore(JsonFileProvider("db/users.json"))
+
+# Kết quả cố định: chỉ serialize một lần cho mỗi content type
+WELCOME = freeze({"message": "Welcome to the RESTful TCP WebApp"})
+
+
+def count_primes(headers, body):
+    """Đếm số nguyên tố nhỏ hơn giới hạn (route nặng CPU, chạy trong process pool)."""
+    try:
+        limit = int(body.decode("utf-8").strip() or 200000)
+    except ValueError:
+        return (400, {"Content-Type": "text/plain"}, "Body must be an integer")
+    limit = max(2, min(limit, 10_000_000))
+    sieve = bytearray([1]) * limit
+    sieve[0:2] = b"\x00\x00"
+    for i in range(2, int(limit ** 0.5) + 1):
+        if sieve[i]:
+            sieve[i * i::i] = bytes(len(range(i * i, limit, i)))
+    return {"limit": limit, "primes": sum(sieve)}
+
 
 def create_sampleapp():
     """Tạo ứng dụng WeApRous và khai báo route."""
-    app = WeApRous()
+    # templates/ chứa các trang dùng asset(); www/ vẫn được phục vụ tĩnh
+    app = WeApRous(template_dir=("templates", "www"))
 
     # ---------------------------
     #  ROUTE 1: Trang chủ (API)
     # ---------------------------
     @app.route("/", methods=["GET"])
     def home(headers, body):
-        return {"message": "Welcome to the RESTful TCP WebApp"}
+        return WELCOME
 
     # ---------------------------
     #  ROUTE 2: Trả về user (API)
@@ -35,47 +59,35 @@ def create_sampleapp():
     #  ROUTE 3: Echo POST data (API)
     # ---------------------------
     @app.route("/echo", methods=["POST"])
-    def echo(headers, body):
+    def echo(headers, body, request):
         try:
-            data = json.loads(body.decode("utf-8"))
-            return {"received": data}
-        except json.JSONDecodeError:
+            return {"received": request.json}
+        except ValueError:
             return {"error": "Invalid JSON"}
 
     # ---------------------------
     #  ROUTE 4: Trang đăng nhập (GET + POST)
     # ---------------------------
     @app.route("/login", methods=["GET", "POST"])
-    def login(headers, body):
-        # Nếu là GET → trả giao diện login.html
+    def login(headers, body, request):
+        # Nếu là GET → trả giao diện login.html (từ template đã biên dịch)
         if not body:
             try:
-                with open("www/login.html", "r", encoding="utf-8") as f:
-                    html = f.read()
-                return (200, {"Content-Type": "text/html"}, html)
+                return app.render("login.html")
             except FileNotFoundError:
                 return (404, {"Content-Type": "text/plain"}, "login.html not found")
 
-        # Nếu là POST → xử lý đăng nhập
-        body_str = body.decode("utf-8")
-        params = {}
-        for pair in body_str.split("&"):
-            if "=" in pair:
-                k, v = pair.split("=", 1)
-                params[k] = v
-
-        username = params.get("username")
-        password = params.get("password")
+        # Nếu là POST → xử lý đăng nhập (form đã được Request phân tích)
+        username = request.form.get("username")
+        password = request.form.get("password")
 
-        # Đọc DB user
+        # ✅ Kiểm tra thông tin đăng nhập (từ bộ nhớ đệm)
         try:
-            with open("db/users.json", "r", encoding="utf-8") as f:
-                users = json.load(f)
+            valid = credentials.verify(username, password)
         except FileNotFoundError:
             return (500, {"Content-Type": "text/plain"}, "User database not found")
 
-        # ✅ Kiểm tra thông tin đăng nhập
-        if username in users and users[username] == password:
+        if valid:
             session_id = session_mgr.create_session(username)
 
             # ✅ Trả về một dict duy nhất, Set-Cookie có 2 giá trị
@@ -98,26 +110,18 @@ def create_sampleapp():
     #  ROUTE 5: Trang chính (cần session hợp lệ)
     # ---------------------------
     @app.route("/index.html", methods=["GET"])
-    def index(headers, body):
-        # 🔧 Đọc cả 'cookie' và 'Cookie' (vì framework lower-case key)
-        cookies = headers.get("cookie", "") or headers.get("Cookie", "")
-        print(f"[AuthDebug] cookies={cookies}")  # Debug cookie
-
-        session_id = None
-        for cookie in cookies.split(";"):
-            if "sessionid=" in cookie:
-                session_id = cookie.split("=", 1)[1].strip()
+    def index(headers, body, request):
+        session_id = request.cookies.get("sessionid")
+        print(f"[AuthDebug] cookies={request.cookies}")  # Debug cookie
 
         if not session_id or not session_mgr.validate_session(session_id):
             # ❌ Session không hợp lệ → redirect về /login
             headers_out = {"Location": "/login", "Content-Type": "text/html"}
             return (302, headers_out, "<h1>Unauthorized. Redirecting...</h1>")
 
-        # ✅ Hợp lệ → trả index.html
+        # ✅ Hợp lệ → trả index.html (template đã biên dịch, không đọc lại đĩa)
         try:
-            with open("www/index.html", "r", encoding="utf-8") as f:
-                html = f.read()
-            return (200, {"Content-Type": "text/html"}, html)
+            return app.render("index.html")
         except FileNotFoundError:
             return (404, {"Content-Type": "text/plain"}, "index.html not found")
 
@@ -125,13 +129,8 @@ def create_sampleapp():
     #  ROUTE 6: Hello (API có xác thực)
     # ---------------------------
     @app.route("/hello", methods=["GET"])
-    def hello(headers, body):
-        cookies = headers.get("cookie", "") or headers.get("Cookie", "")
-        session_id = None
-
-        for cookie in cookies.split(";"):
-            if "sessionid=" in cookie:
-                session_id = cookie.split("=", 1)[1].strip()
+    def hello(headers, body, request):
+        session_id = request.cookies.get("sessionid")
 
         if not session_id or not session_mgr.validate_session(session_id):
             return (401, {"Content-Type": "text/plain"}, "401 Unauthorized")
@@ -139,6 +138,64 @@ def create_sampleapp():
         username = session_mgr.get_username(session_id)
         return (200, {"Content-Type": "text/plain"}, f"Hello, {username}! You are logged in.")
 
+    # ---------------------------
+    #  ROUTE 7: Đếm số nguyên tố (CPU, chạy trong process pool)
+    # ---------------------------
+    app.route("/primes", methods=["POST"], executor="process", timeout=10)(count_primes)
+
+    # ---------------------------
+    #  ROUTE 8: Tải file lên (multipart, file lớn được ghi ra đĩa tạm)
+    # ---------------------------
+    @app.route("/upload", methods=["POST"], max_upload=64 * 1024 * 1024)
+    def upload(headers, body, request):
+        form = request.form
+        if not form.files:
+            return (400, {"Content-Type": "text/plain"}, "Expected multipart/form-data")
+
+        files = []
+        for uploads in form.files.values():
+            for f in uploads:
+                # Đọc từng khối để không nạp cả file vào bộ nhớ
+                digest = hashlib.sha256()
+                for chunk in iter(lambda: f.read(65536), b""):
+                    digest.update(chunk)
+                files.append({"field": f.name, "filename": f.filename,
+                              "content_type": f.content_type, "size": f.size,
+                              "sha256": digest.hexdigest()})
+        return {"fields": form.fields, "files": files}
+
+    # ---------------------------
+    #  ROUTE 9: Chat thời gian thực (WebSocket, không cần polling)
+    # ---------------------------
+    @app.websocket("/chat", subprotocols=("chat",))
+    async def chat(ws):
+        session_id = ws.request.cookies.get("sessionid")
+        if not session_id or not session_mgr.validate_session(session_id):
+            await ws.close(1008, "Unauthorized")
+            return
+        username = session_mgr.get_username(session_id)
+        room = ws.request.args.get("room", "lobby")
+
+        HUB.join(room, ws)
+        HUB.broadcast(room, json.dumps({"event": "join", "user": username}))
+        async for message in ws:
+            if isinstance(message, str):
+                HUB.broadcast(room, json.dumps({"user": username, "text": message}))
+        HUB.broadcast(room, json.dumps({"event": "leave", "user": username}))
+
+    # ---------------------------
+    #  ROUTE 10: Gửi tin nhắn vào phòng chat từ HTTP (cho client không có WebSocket)
+    # ---------------------------
+    @app.route("/chat/send", methods=["POST"])
+    def chat_send(headers, body, request):
+        session_id = request.cookies.get("sessionid")
+        if not session_id or not session_mgr.validate_session(session_id):
+            return (401, {"Content-Type": "text/plain"}, "401 Unauthorized")
+        room = request.args.get("room", "lobby")
+        text = request.form.get("text", "")
+        HUB.publish(room, json.dumps({"user": session_mgr.get_username(session_id), "text": text}))
+        return {"room": room, "members": HUB.members(room)}
+
     # ---------------------------
     #  Trả về app để backend sử dụng
     # ---------------------------
@@ -150,7 +207,6 @@ def create_sampleapp():
 # =======================================================
 if __name__ == "__main__":
     app = create_sampleapp()
-    routes = app.routes
 
     parser = argparse.ArgumentParser(description="Start SampleApp Backend")
     parser.add_argument("--server-ip", type=str, default="0.0.0.0")
@@ -161,4 +217,6 @@ if __name__ == "__main__":
     port = args.server_port
 
     print(f"--- Starting SampleApp Backend on {ip}:{port} ---")
-    create_backend(ip, port, routes=routes)
+    # app.run() băm các asset và phục vụ chúng cùng các route
+    app.prepare_address(ip, port)
+    app.run()
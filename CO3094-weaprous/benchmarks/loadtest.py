@@ -0,0 +1,402 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+benchmarks.loadtest
+~~~~~~~~~~~~~~~~~
+
+End-to-end load test of the proxy plus backends on the loopback interface.
+
+The runner starts ``start_proxy.py`` and N ``start_sampleapp.py`` backends
+(plus an optional :mod:`stub_backend <benchmarks.stub_backend>` with injected
+delay or failures) on free local ports, writes a generated ``proxy.conf``
+that pools them under one virtual host, and drives a weighted mix of static,
+API and login traffic through the proxy.
+
+Two load models are supported:
+
+- closed loop: ``--concurrency`` workers each send the next request as soon
+  as the previous one completes.
+- open loop: requests are issued at a fixed ``--rate`` regardless of how fast
+  the server answers. Latency is measured from the intended send time, so
+  queueing delay is not hidden (no coordinated omission).
+
+Usage::
+
+  $ python benchmarks/loadtest.py --backends 3 --duration 10 --concurrency 32
+  $ python benchmarks/loadtest.py --rate 500 --mix static=6,api=3,login=1
+  $ python benchmarks/loadtest.py --stub-delay-ms 200 --stub-fail-rate 0.1 --output run.json
+"""
+
+import argparse
+import json
+import os
+import queue
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+VHOST = "loadtest.local"
+
+LOGIN_FORM = "username=admin&password=password"
+ECHO_JSON = '{"message": "hello", "items": [1, 2, 3]}'
+
+#: Request templates per traffic class, as (method, path, content type, body).
+SCENARIOS = {
+    "static": [
+        ("GET", "/css/styles.css", None, ""),
+        ("GET", "/images/welcome.png", None, ""),
+        ("GET", "/images/favicon.ico", None, ""),
+    ],
+    "api": [
+        ("GET", "/user", None, ""),
+        ("GET", "/", None, ""),
+        ("POST", "/echo", "application/json", ECHO_JSON),
+    ],
+    "login": [
+        ("GET", "/login", None, ""),
+        ("POST", "/login", "application/x-www-form-urlencoded", LOGIN_FORM),
+    ],
+}
+
+
+# ---------------------------------------------------------------------------
+#  CLUSTER MANAGEMENT
+# ---------------------------------------------------------------------------
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_listening(port, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError("Process on port {} did not start listening".format(port))
+
+
+def write_config(upstreams):
+    """
+    Write a proxy.conf pooling ``upstreams`` under :data:`VHOST`.
+
+    :rtype str: path of the generated file.
+    """
+    lines = ['host "{}" {{'.format(VHOST), "    proxy_set_header Host $host;"]
+    for port in upstreams:
+        lines.append("    proxy_pass http://127.0.0.1:{};".format(port))
+    lines.append("    dist_policy round-robin;")
+    lines.append("}")
+    fd, path = tempfile.mkstemp(prefix="weaprous-loadtest-", suffix=".conf")
+    with os.fdopen(fd, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    return path
+
+
+class Cluster(object):
+    """Proxy, sample app backends and optional stub backend on loopback."""
+
+    def __init__(self, args):
+        self.args = args
+        self.procs = []
+        self.config = None
+        self.proxy_port = None
+
+    def spawn(self, argv, port):
+        log = None if self.args.verbose else subprocess.DEVNULL
+        proc = subprocess.Popen([sys.executable] + argv, cwd=ROOT,
+                                stdout=log, stderr=log)
+        self.procs.append(proc)
+        wait_listening(port)
+        return proc
+
+    def start(self):
+        upstreams = []
+        for _ in range(self.args.backends):
+            port = free_port()
+            self.spawn(["start_sampleapp.py", "--server-ip", "127.0.0.1",
+                        "--server-port", str(port)], port)
+            upstreams.append(port)
+
+        if self.args.stub:
+            port = free_port()
+            self.spawn([os.path.join(HERE, "stub_backend.py"), "--port", str(port),
+                        "--delay-ms", str(self.args.stub_delay_ms),
+                        "--jitter-ms", str(self.args.stub_jitter_ms),
+                        "--fail-rate", str(self.args.stub_fail_rate),
+                        "--fail-mode", self.args.stub_fail_mode], port)
+            upstreams.append(port)
+
+        self.config = write_config(upstreams)
+        self.proxy_port = free_port()
+        self.spawn(["start_proxy.py", "--server-ip", "127.0.0.1",
+                    "--server-port", str(self.proxy_port), "--config", self.config],
+                   self.proxy_port)
+        print("[LoadTest] proxy :{} -> upstreams {}".format(self.proxy_port, upstreams))
+
+    def stop(self):
+        for proc in self.procs:
+            proc.terminate()
+        for proc in self.procs:
+            try:
+                proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        if self.config:
+            os.unlink(self.config)
+
+
+# ---------------------------------------------------------------------------
+#  LOAD GENERATION
+# ---------------------------------------------------------------------------
+def parse_mix(text):
+    """
+    Parse ``static=5,api=3,login=2`` into cumulative weights.
+
+    :rtype list: ``[(cumulative weight, scenario name), ...]``.
+    """
+    table = []
+    total = 0.0
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError("Unknown traffic class '{}'".format(name))
+        total += float(weight or 1)
+        table.append((total, name))
+    return [(w / total, name) for w, name in table]
+
+
+def build_request(method, path, ctype, body):
+    head = "{} {} HTTP/1.1\r\nHost: {}\r\nUser-Agent: weaprous-loadtest\r\n".format(
+        method, path, VHOST)
+    if body:
+        head += "Content-Type: {}\r\nContent-Length: {}\r\n".format(ctype, len(body))
+    return (head + "Connection: close\r\n\r\n" + body).encode()
+
+
+class Recorder(object):
+    """Thread-safe collection of per-request outcomes."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = []
+        self.errors = {}
+
+    def record(self, scenario, latency, status):
+        with self.lock:
+            self.samples.append((scenario, latency, status))
+
+    def error(self, scenario, latency, kind):
+        with self.lock:
+            self.samples.append((scenario, latency, None))
+            self.errors[kind] = self.errors.get(kind, 0) + 1
+
+
+def send_one(port, payload, timeout):
+    """
+    Send one request through the proxy and read the whole response.
+
+    :rtype int: HTTP status code of the response.
+    """
+    with socket.create_connection(("127.0.0.1", port), timeout=timeout) as s:
+        s.sendall(payload)
+        chunks = []
+        while True:
+            chunk = s.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    data = b"".join(chunks)
+    if not data.startswith(b"HTTP/"):
+        raise ValueError("malformed response")
+    return int(data[9:12])
+
+
+def pick(mix, requests_by_class):
+    r = random.random()
+    for weight, name in mix:
+        if r <= weight:
+            return name, random.choice(requests_by_class[name])
+    name = mix[-1][1]
+    return name, random.choice(requests_by_class[name])
+
+
+def execute(port, mix, requests_by_class, recorder, timeout, intended):
+    scenario, payload = pick(mix, requests_by_class)
+    try:
+        status = send_one(port, payload, timeout)
+        recorder.record(scenario, time.perf_counter() - intended, status)
+    except socket.timeout:
+        recorder.error(scenario, time.perf_counter() - intended, "timeout")
+    except OSError as e:
+        recorder.error(scenario, time.perf_counter() - intended, type(e).__name__)
+    except ValueError:
+        recorder.error(scenario, time.perf_counter() - intended, "malformed")
+
+
+def closed_loop(port, args, mix, requests_by_class, recorder):
+    deadline = time.perf_counter() + args.duration
+
+    def worker():
+        while time.perf_counter() < deadline:
+            execute(port, mix, requests_by_class, recorder, args.timeout,
+                    time.perf_counter())
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(args.concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def open_loop(port, args, mix, requests_by_class, recorder):
+    pending = queue.Queue()
+    start = time.perf_counter()
+    total = int(args.rate * args.duration)
+
+    def worker():
+        while True:
+            intended = pending.get()
+            if intended is None:
+                return
+            execute(port, mix, requests_by_class, recorder, args.timeout, intended)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(args.concurrency)]
+    for t in threads:
+        t.start()
+
+    for i in range(total):
+        intended = start + i / args.rate
+        delay = intended - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        pending.put(intended)
+
+    for _ in threads:
+        pending.put(None)
+    for t in threads:
+        t.join()
+
+
+# ---------------------------------------------------------------------------
+#  REPORTING
+# ---------------------------------------------------------------------------
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(q * len(sorted_values)))
+    return sorted_values[index]
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(s[1] for s in samples)
+    failed = sum(1 for s in samples if s[2] is None or s[2] >= 500)
+    return {
+        "requests": len(samples),
+        "throughput_rps": len(samples) / elapsed if elapsed else 0.0,
+        "error_rate": failed / len(samples) if samples else 0.0,
+        "p50_ms": _ms(percentile(latencies, 0.50)),
+        "p99_ms": _ms(percentile(latencies, 0.99)),
+        "p999_ms": _ms(percentile(latencies, 0.999)),
+        "max_ms": _ms(latencies[-1] if latencies else None),
+    }
+
+
+def _ms(value):
+    return None if value is None else round(value * 1000.0, 3)
+
+
+def report(recorder, elapsed):
+    samples = recorder.samples
+    result = {"overall": summarize(samples, elapsed), "by_class": {}, "status": {},
+              "errors": dict(recorder.errors)}
+    for name in SCENARIOS:
+        subset = [s for s in samples if s[0] == name]
+        if subset:
+            result["by_class"][name] = summarize(subset, elapsed)
+    for s in samples:
+        key = str(s[2]) if s[2] is not None else "error"
+        result["status"][key] = result["status"].get(key, 0) + 1
+
+    row = "{:<8} {:>9} {:>10} {:>8} {:>9} {:>9} {:>9}"
+    print(row.format("class", "requests", "req/s", "errors", "p50 ms", "p99 ms", "p999 ms"))
+    for name, stats in [("all", result["overall"])] + sorted(result["by_class"].items()):
+        print(row.format(name, stats["requests"], "{:.1f}".format(stats["throughput_rps"]),
+                         "{:.2%}".format(stats["error_rate"]), stats["p50_ms"],
+                         stats["p99_ms"], stats["p999_ms"]))
+    print("status: {}  errors: {}".format(result["status"], result["errors"]))
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog='loadtest',
+                                     description='Load test the proxy and backends on localhost')
+    parser.add_argument('--backends', type=int, default=2, help='Number of sample app backends')
+    parser.add_argument('--duration', type=float, default=10.0, help='Test duration in seconds')
+    parser.add_argument('--concurrency', type=int, default=16,
+                        help='Closed loop workers, or the worker pool size in open loop')
+    parser.add_argument('--rate', type=float, default=None,
+                        help='Open loop arrival rate in requests/sec (closed loop if omitted)')
+    parser.add_argument('--mix', default='static=5,api=3,login=2',
+                        help='Weighted traffic mix. Default is static=5,api=3,login=2')
+    parser.add_argument('--timeout', type=float, default=10.0, help='Per request timeout')
+    parser.add_argument('--warmup', type=float, default=1.0, help='Warmup seconds, not recorded')
+    parser.add_argument('--stub', action='store_true',
+                        help='Add a stub backend with injected delay/failures to the pool')
+    parser.add_argument('--stub-delay-ms', type=float, default=0.0)
+    parser.add_argument('--stub-jitter-ms', type=float, default=0.0)
+    parser.add_argument('--stub-fail-rate', type=float, default=0.0)
+    parser.add_argument('--stub-fail-mode', choices=['error', 'reset', 'hang'], default='error')
+    parser.add_argument('--output', default=None, help='Write the report as JSON to this file')
+    parser.add_argument('--verbose', action='store_true', help='Show daemon output')
+    args = parser.parse_args()
+
+    if args.stub_delay_ms or args.stub_jitter_ms or args.stub_fail_rate:
+        args.stub = True
+
+    mix = parse_mix(args.mix)
+    requests_by_class = {name: [build_request(*r) for r in reqs]
+                         for name, reqs in SCENARIOS.items()}
+    run = open_loop if args.rate else closed_loop
+
+    cluster = Cluster(args)
+    try:
+        cluster.start()
+        if args.warmup:
+            warm = argparse.Namespace(**vars(args))
+            warm.duration = args.warmup
+            run(cluster.proxy_port, warm, mix, requests_by_class, Recorder())
+
+        recorder = Recorder()
+        started = time.perf_counter()
+        run(cluster.proxy_port, args, mix, requests_by_class, recorder)
+        result = report(recorder, time.perf_counter() - started)
+    finally:
+        cluster.stop()
+
+    if args.output:
+        result["settings"] = vars(args)
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2, sort_keys=True)
+        print("[LoadTest] report written to {}".format(args.output))
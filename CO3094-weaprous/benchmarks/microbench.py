@@ -0,0 +1,349 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+benchmarks.microbench
+~~~~~~~~~~~~~~~~~
+
+Reproducible microbenchmarks for the request hot path: parsing, header
+dictionaries, route lookup, static response building, the route result
+encoders of :class:`HttpAdapter <daemon.httpadapter.HttpAdapter>` and the
+proxy routing policy.
+
+Each benchmark is calibrated to run for at least ``--min-time`` seconds,
+repeated ``--repeat`` times, and the best run is reported as ops/sec. The
+allocation columns come from :mod:`tracemalloc` over a separate short run.
+Console output of the daemon is discarded while measuring.
+
+Usage::
+
+  $ python benchmarks/microbench.py --output before.json
+  $ python benchmarks/microbench.py --output after.json --compare before.json
+  $ python benchmarks/microbench.py --filter request.prepare
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from daemon.request import Request
+from daemon.response import Response
+from daemon.staticindex import STATIC_INDEX
+from daemon.httpadapter import HttpAdapter
+from daemon.dictionary import CaseInsensitiveDict
+from daemon.proxy import resolve_routing_policy
+
+
+# ---------------------------------------------------------------------------
+#  SAMPLE TRAFFIC
+# ---------------------------------------------------------------------------
+BROWSER_HEADERS = (
+    "Host: chatapp.local\r\n"
+    "User-Agent: Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36\r\n"
+    "Accept: text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8\r\n"
+    "Accept-Language: en-US,en;q=0.9,vi;q=0.8\r\n"
+    "Accept-Encoding: gzip, deflate\r\n"
+    "Connection: keep-alive\r\n"
+)
+
+LOGIN_FORM = "username=admin&password=password"
+ECHO_JSON = json.dumps({"message": "hello", "items": list(range(20))})
+
+REQUESTS = {
+    "get_index": (
+        "GET / HTTP/1.1\r\n" + BROWSER_HEADERS + "\r\n"
+    ),
+    "get_css": (
+        "GET /css/styles.css HTTP/1.1\r\n" + BROWSER_HEADERS +
+        "Referer: http://chatapp.local/index.html\r\n\r\n"
+    ),
+    "get_cookie": (
+        "GET /hello HTTP/1.1\r\n" + BROWSER_HEADERS +
+        "Cookie: sessionid=9f86d081884c7d659a2feaa0c55ad015; auth=true; theme=dark\r\n\r\n"
+    ),
+    "post_login": (
+        "POST /login HTTP/1.1\r\n" + BROWSER_HEADERS +
+        "Content-Type: application/x-www-form-urlencoded\r\n"
+        "Content-Length: {}\r\n\r\n{}".format(len(LOGIN_FORM), LOGIN_FORM)
+    ),
+    "post_json": (
+        "POST /echo HTTP/1.1\r\n" + BROWSER_HEADERS +
+        "Content-Type: application/json\r\n"
+        "Content-Length: {}\r\n\r\n{}".format(len(ECHO_JSON), ECHO_JSON)
+    ),
+}
+
+#: One static path per MIME branch of :meth:`Response.build_response`,
+#: resolved through the static index.
+STATIC_PATHS = {
+    "html": "/index.html",
+    "css": "/css/styles.css",
+    "image": "/images/welcome.png",
+    "application": "/data.json",
+    "text": "/notes.txt",
+    "video": "/clip.mp4",
+    "unknown": "/archive.unknownext",
+}
+
+PROXY_ROUTES = {
+    "192.168.1.8": ("192.168.1.8:9000", "round-robin"),
+    "chatapp.local": (["192.168.1.8:9001", "192.168.1.8:9002",
+                       "192.168.1.8:9003"], "round-robin"),
+    "app1.local": (["192.168.1.8:9004", "192.168.1.8:9005"], "first"),
+}
+
+
+def _hook(path, methods, func):
+    func._route_path = path
+    func._route_methods = methods
+    return func
+
+
+ENCODER_ROUTES = {
+    ("GET", "/tuple"): _hook("/tuple", ["GET"], lambda headers, body: (
+        200, {"Content-Type": "text/plain", "X-Trace": "abc"}, "tuple body")),
+    ("GET", "/tuple-list"): _hook("/tuple-list", ["GET"], lambda headers, body: (
+        302, [("Set-Cookie", "sessionid=abc; HttpOnly"), ("Set-Cookie", "auth=true"),
+              ("Location", "/index.html")], "<h1>redirect</h1>")),
+    ("GET", "/dict"): _hook("/dict", ["GET"], lambda headers, body: {
+        "id": 1, "name": "Alice", "email": "alice@example.com", "tags": ["a", "b"]}),
+    ("GET", "/str"): _hook("/str", ["GET"], lambda headers, body:
+        "<html><body><h1>Hello</h1></body></html>"),
+}
+
+
+class FakeConn(object):
+    """Minimal socket stand-in that replays one request and swallows output."""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.sent = 0
+
+    def recv(self, size):
+        raw, self.raw = self.raw, b""
+        return raw
+
+    def sendall(self, data):
+        self.sent += len(data)
+
+    def settimeout(self, value):
+        pass
+
+    def close(self):
+        pass
+
+
+# ---------------------------------------------------------------------------
+#  BENCHMARK TARGETS
+# ---------------------------------------------------------------------------
+def build_benchmarks():
+    """
+    Build the ``{name: callable}`` table of benchmarks.
+
+    :rtype dict: benchmark callables taking no argument.
+    """
+    benches = {}
+
+    for name, raw in REQUESTS.items():
+        raw = raw.encode()
+
+        def prepare(raw=raw):
+            Request().prepare(raw, ENCODER_ROUTES)
+        benches["request.prepare." + name] = prepare
+
+    header_items = [line.split(": ", 1) for line in BROWSER_HEADERS.split("\r\n") if line]
+
+    def cid_build():
+        CaseInsensitiveDict(header_items)
+    benches["dictionary.build"] = cid_build
+
+    headers = CaseInsensitiveDict(header_items)
+
+    def cid_get():
+        headers.get("user-agent")
+        headers.get("Accept")
+        headers.get("cookie", "")
+    benches["dictionary.get"] = cid_get
+
+    def cid_set():
+        h = CaseInsensitiveDict()
+        h["Content-Type"] = "text/html"
+        h["Content-Length"] = "42"
+        h["Set-Cookie"] = "auth=true"
+    benches["dictionary.set"] = cid_set
+
+    def route_hit():
+        ENCODER_ROUTES.get(("GET", "/dict"))
+    benches["routes.lookup.hit"] = route_hit
+
+    def route_miss():
+        ENCODER_ROUTES.get(("GET", "/css/styles.css"))
+    benches["routes.lookup.miss"] = route_miss
+
+    for name, path in STATIC_PATHS.items():
+        req = Request().prepare(
+            "GET {} HTTP/1.1\r\n{}\r\n".format(path, BROWSER_HEADERS), {})
+
+        def build(req=req):
+            Response().build_response(req, STATIC_INDEX)
+        benches["response.build." + name] = build
+
+    for path in ("/tuple", "/tuple-list", "/dict", "/str"):
+        raw = "GET {} HTTP/1.1\r\n{}\r\n".format(path, BROWSER_HEADERS).encode()
+
+        def encode(raw=raw):
+            conn = FakeConn(raw)
+            HttpAdapter("127.0.0.1", 9000, conn, None, ENCODER_ROUTES).handle_client(
+                conn, ("127.0.0.1", 50000), ENCODER_ROUTES)
+        benches["adapter.encode." + path.strip("/")] = encode
+
+    for host in ("192.168.1.8", "chatapp.local", "app1.local", "unknown.local"):
+        def resolve(host=host):
+            resolve_routing_policy(host, PROXY_ROUTES)
+        benches["proxy.resolve." + host] = resolve
+
+    return benches
+
+
+# ---------------------------------------------------------------------------
+#  RUNNER
+# ---------------------------------------------------------------------------
+def measure(func, min_time, repeat):
+    """
+    Time ``func`` with a calibrated loop count.
+
+    :rtype dict: ops_per_sec, ns_per_op and loops of the best repetition.
+    """
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / 4 or loops >= 1 << 24:
+            break
+        loops *= 2
+
+    loops = max(1, int(loops * min_time / max(elapsed, 1e-9)))
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        best = min(best, time.perf_counter() - start)
+
+    return {
+        "ops_per_sec": loops / best,
+        "ns_per_op": best / loops * 1e9,
+        "loops": loops,
+    }
+
+
+def measure_allocations(func, loops=200):
+    """
+    Measure allocations of ``func`` with tracemalloc.
+
+    :rtype dict: peak bytes of a single call and allocated blocks per call.
+    """
+    func()
+    tracemalloc.start()
+    try:
+        peak = 0
+        for _ in range(10):
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            func()
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+
+        before = tracemalloc.take_snapshot()
+        for _ in range(loops):
+            func()
+        after = tracemalloc.take_snapshot()
+        blocks = sum(max(stat.count_diff, 0)
+                     for stat in after.compare_to(before, "lineno"))
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "alloc_peak_bytes": peak,
+        "retained_blocks_per_op": blocks / loops,
+    }
+
+
+def run(benches, min_time, repeat):
+    results = {}
+    for name, func in benches.items():
+        with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+            timing = measure(func, min_time, repeat)
+            allocs = measure_allocations(func)
+        results[name] = dict(timing, **allocs)
+        print("{:<34} {:>14,.0f} ops/s {:>10,.0f} ns/op {:>9,} B peak".format(
+            name, timing["ops_per_sec"], timing["ns_per_op"], allocs["alloc_peak_bytes"]))
+    return results
+
+
+def compare(results, baseline_file):
+    with open(baseline_file, "r") as f:
+        baseline = json.load(f)["results"]
+
+    print("\n{:<34} {:>14} {:>14} {:>9}".format("benchmark", "baseline", "current", "change"))
+    for name, current in results.items():
+        if name not in baseline:
+            continue
+        old = baseline[name]["ops_per_sec"]
+        new = current["ops_per_sec"]
+        print("{:<34} {:>14,.0f} {:>14,.0f} {:>+8.1f}%".format(
+            name, old, new, (new - old) / old * 100))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog='microbench',
+                                     description='WeApRous hot path microbenchmarks')
+    parser.add_argument('--filter', default='', help='Only run benchmarks containing this text')
+    parser.add_argument('--min-time', type=float, default=0.2,
+                        help='Minimum seconds per repetition. Default is 0.2')
+    parser.add_argument('--repeat', type=int, default=5, help='Repetitions per benchmark')
+    parser.add_argument('--output', default=None, help='Write results as JSON to this file')
+    parser.add_argument('--compare', default=None, help='Baseline JSON file to compare against')
+    args = parser.parse_args()
+
+    # Static files are resolved relative to the application root.
+    os.chdir(ROOT)
+
+    with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+        benches = {name: func for name, func in build_benchmarks().items()
+                   if args.filter in name}
+    results = run(benches, args.min_time, args.repeat)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": sys.version,
+                "platform": platform.platform(),
+                "min_time": args.min_time,
+                "repeat": args.repeat,
+                "results": results,
+            }, f, indent=2, sort_keys=True)
+        print("\n[microbench] results written to {}".format(args.output))
+
+    if args.compare:
+        compare(results, args.compare)
@@ -0,0 +1,107 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+benchmarks.stub_backend
+~~~~~~~~~~~~~~~~~
+
+A stand-in upstream for load tests. It answers every request with a small
+fixed response after an injected delay, and can be told to fail a fraction
+of requests, either with a 500 response, by resetting the connection, or by
+never answering (hang).
+
+Usage::
+
+  $ python benchmarks/stub_backend.py --port 9100 --delay-ms 50 --jitter-ms 200 \\
+        --fail-rate 0.05 --fail-mode reset
+"""
+
+import argparse
+import random
+import socket
+import struct
+import threading
+import time
+
+BODY = b'{"stub": true}'
+
+OK = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: application/json\r\n"
+    b"Content-Length: " + str(len(BODY)).encode() + b"\r\n"
+    b"Connection: close\r\n\r\n" + BODY
+)
+
+ERROR = (
+    b"HTTP/1.1 500 Internal Server Error\r\n"
+    b"Content-Type: text/plain\r\n"
+    b"Content-Length: 12\r\n"
+    b"Connection: close\r\n\r\n"
+    b"stub failure"
+)
+
+
+def handle_client(conn, args):
+    """
+    Serve one connection according to the injected delay and failure settings.
+    """
+    try:
+        conn.recv(65536)
+        delay = args.delay_ms + random.uniform(0, args.jitter_ms)
+        if delay:
+            time.sleep(delay / 1000.0)
+
+        if random.random() < args.fail_rate:
+            if args.fail_mode == "reset":
+                # SO_LINGER with a zero timeout turns close() into an RST.
+                conn.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER,
+                                struct.pack("ii", 1, 0))
+                return
+            if args.fail_mode == "hang":
+                time.sleep(3600)
+                return
+            conn.sendall(ERROR)
+            return
+
+        conn.sendall(OK)
+    except OSError:
+        pass
+    finally:
+        conn.close()
+
+
+def run_stub(args):
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind((args.server_ip, args.port))
+    server.listen(512)
+    print("[Stub] Listening on {}:{} delay={}ms jitter={}ms fail={}({})".format(
+        args.server_ip, args.port, args.delay_ms, args.jitter_ms,
+        args.fail_rate, args.fail_mode))
+
+    while True:
+        conn, addr = server.accept()
+        client_thread = threading.Thread(target=handle_client, args=(conn, args))
+        client_thread.daemon = True
+        client_thread.start()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog='StubBackend',
+                                     description='Upstream stand-in with injected delay and failures')
+    parser.add_argument('--server-ip', default='127.0.0.1')
+    parser.add_argument('--port', type=int, required=True)
+    parser.add_argument('--delay-ms', type=float, default=0.0, help='Fixed delay per request')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Extra uniform random delay')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='Fraction of failed requests')
+    parser.add_argument('--fail-mode', choices=['error', 'reset', 'hang'], default='error')
+    run_stub(parser.parse_args())
@@ -17,4 +17,11 @@ from .response import Response
 from .request import Request
 from .backend import create_backend
 from .httpadapter import HttpAdapter
-from .dictionary import CaseInsensitiveDict
\ No newline at end of file
+from .dictionary import CaseInsensitiveDict
+from .httpparser import HttpParser, HttpParseError
+from .serializers import SerializerRegistry, freeze
+from .credentials import CredentialStore, JsonFileProvider, SqliteProvider
+from .templates import TemplateEngine, TemplateSyntaxError
+from .streaming import StreamingBody, stream_json
+from .multipart import FormData, UploadedFile, MultipartError
+from .websocket import WebSocket, Hub, HUB, ConnectionClosed
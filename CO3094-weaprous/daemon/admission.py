@@ -0,0 +1,202 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.admission
+~~~~~~~~~~~~~~~~~
+
+This module provides admission control for the backend and the proxy.
+
+An :class:`AdmissionController` bounds two things:
+
+- **connections**: checked in the accept loop; a connection over the cap is
+  answered at once with ``503`` and closed, without spawning a thread.
+- **in-flight requests**: a connection thread takes a slot before it
+  handles its request. If none is free it joins a bounded wait queue and
+  waits until ``queue_timeout``; a full queue or an expired wait is
+  answered with ``503``.
+
+Every ``503`` carries ``Retry-After`` so clients and the proxy back off
+instead of piling up, and every rejection is counted in
+``weaprous_admission_rejected_total{server,reason}`` and :meth:`stats`.
+
+Usage::
+
+  >>> admission = AdmissionController("backend", max_connections=512,
+  ...                                 max_inflight=64, queue_size=128)
+  >>> create_backend("0.0.0.0", 9000, routes, admission=admission)
+"""
+
+import threading
+import time
+
+from .response import serialize_response
+from .metrics import METRICS
+
+
+class AdmissionController(object):
+    """The :class:`AdmissionController <AdmissionController>` object, which
+    caps concurrent connections and in-flight requests of one server.
+
+    A cap of ``None`` disables that check.
+
+    :attrs name (str): server label in metrics, e.g. ``backend`` or ``proxy``.
+    :attrs max_connections (int): open connections allowed at once.
+    :attrs max_inflight (int): requests handled at once.
+    :attrs queue_size (int): requests allowed to wait for an in-flight slot.
+    :attrs queue_timeout (float): seconds a queued request waits before 503.
+    :attrs retry_after (int): ``Retry-After`` seconds sent with a 503.
+    """
+
+    def __init__(self, name="backend", max_connections=None, max_inflight=None,
+                 queue_size=0, queue_timeout=0.5, retry_after=1):
+        self.name = name
+        self.max_connections = max_connections
+        self.max_inflight = max_inflight
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.connections = 0
+        self.inflight = 0
+        self.queued = 0
+        self.rejected = {"connections": 0, "queue_full": 0, "queue_timeout": 0}
+        self._cond = threading.Condition()
+        self._headers = "Retry-After: {}\r\nContent-Type: text/plain\r\n".format(
+            retry_after).encode("latin-1")
+
+        labels = (("server", name),)
+        METRICS.register_callback("weaprous_admission_inflight", lambda: self.inflight, labels)
+        METRICS.register_callback("weaprous_admission_queued", lambda: self.queued, labels)
+
+    # -----------------------------------------------------------------------
+    #  CONNECTIONS
+    # -----------------------------------------------------------------------
+    def admit_connection(self):
+        """
+        Count a newly accepted connection.
+
+        :rtype bool: False if the connection cap is reached.
+        """
+        with self._cond:
+            if self.max_connections is not None and self.connections >= self.max_connections:
+                self._count("connections")
+                return False
+            self.connections += 1
+            return True
+
+    def release_connection(self):
+        with self._cond:
+            self.connections -= 1
+
+    # -----------------------------------------------------------------------
+    #  IN-FLIGHT REQUESTS
+    # -----------------------------------------------------------------------
+    def acquire(self):
+        """
+        Take an in-flight slot, waiting in the bounded queue if needed.
+
+        :rtype bool: False if the request must be rejected.
+        """
+        with self._cond:
+            if self.max_inflight is None or self.inflight < self.max_inflight:
+                self.inflight += 1
+                return True
+            if self.queued >= self.queue_size:
+                self._count("queue_full")
+                return False
+
+            self.queued += 1
+            deadline = time.monotonic() + self.queue_timeout
+            try:
+                while self.inflight >= self.max_inflight:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._count("queue_timeout")
+                        return False
+                    self._cond.wait(remaining)
+                self.inflight += 1
+                return True
+            finally:
+                self.queued -= 1
+
+    def release(self):
+        with self._cond:
+            self.inflight -= 1
+            self._cond.notify()
+
+    # -----------------------------------------------------------------------
+    #  REJECTION
+    # -----------------------------------------------------------------------
+    def _count(self, reason):
+        self.rejected[reason] += 1
+        METRICS.inc("weaprous_admission_rejected_total",
+                    (("server", self.name), ("reason", reason)))
+
+    def reject(self, conn):
+        """
+        Answer ``503`` with ``Retry-After`` and close, without blocking.
+
+        The response is small enough for the socket send buffer; whatever
+        part of the request already arrived is read first so closing does
+        not reset the connection before the client sees the answer.
+        """
+        try:
+            conn.setblocking(False)
+            try:
+                conn.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                pass
+            conn.send(serialize_response(503, self._headers, b"Server overloaded, retry later"))
+        except OSError:
+            pass
+        finally:
+            conn.close()
+
+    def stats(self):
+        """
+        :rtype dict: current load and rejection counters.
+        """
+        with self._cond:
+            return {
+                "connections": self.connections,
+                "inflight": self.inflight,
+                "queued": self.queued,
+                "rejected": dict(self.rejected),
+            }
+
+
+def add_arguments(parser):
+    """
+    Add the admission control options to a start script's argument parser.
+    """
+    parser.add_argument('--max-connections', type=int, default=None,
+                        help='Reject connections beyond this many with 503')
+    parser.add_argument('--max-inflight', type=int, default=None,
+                        help='Requests handled at once')
+    parser.add_argument('--queue-size', type=int, default=0,
+                        help='Requests allowed to wait for an in-flight slot')
+    parser.add_argument('--queue-timeout', type=float, default=0.5,
+                        help='Seconds a queued request waits before 503')
+    parser.add_argument('--retry-after', type=int, default=1,
+                        help='Retry-After seconds sent with a 503')
+
+
+def from_args(name, args):
+    """
+    Build a controller from parsed start script options.
+
+    :rtype AdmissionController or None: None when no cap is set.
+    """
+    if args.max_connections is None and args.max_inflight is None:
+        return None
+    return AdmissionController(name, args.max_connections, args.max_inflight,
+                               args.queue_size, args.queue_timeout, args.retry_after)
@@ -0,0 +1,141 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.aio
+~~~~~~~~~~~~~~~~~
+
+This module runs ``async def`` route handlers on a shared event loop.
+
+The loop lives in one daemon thread started on first use. When a request
+reaches a coroutine handler, the connection thread hands the socket over to
+the loop and returns at once, so a handler awaiting I/O holds no thread.
+On the loop, each request races its handler against:
+
+- a per-route timeout, answered with ``504 Gateway Timeout``;
+- the client closing the connection, which cancels the handler.
+
+Coroutine handlers must not block: blocking calls stall every other async
+request and belong in ``await loop.run_in_executor(...)``.
+
+Usage::
+
+  >>> @app.route('/slow', methods=['GET'], timeout=5)
+  >>> async def slow(headers, body):
+  >>>     await asyncio.sleep(1)
+  >>>     return {'message': 'done'}
+"""
+
+import asyncio
+import inspect
+import threading
+
+#: Seconds an async handler may run when its route sets no timeout.
+DEFAULT_TIMEOUT = 30.0
+
+
+def is_async_handler(func):
+    """
+    :rtype bool: True if ``func`` is an ``async def`` function.
+    """
+    return inspect.iscoroutinefunction(func)
+
+
+class HandlerDisconnected(Exception):
+    """Raised when the client closed the connection before the handler finished."""
+
+
+class AsyncRunner(object):
+    """The :class:`AsyncRunner <AsyncRunner>` object, which owns the event
+    loop thread serving coroutine handlers.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self):
+        """The running event loop, started on first access."""
+        loop = self._loop
+        if loop is None:
+            with self._lock:
+                loop = self._loop
+                if loop is None:
+                    loop = asyncio.new_event_loop()
+                    ready = threading.Event()
+
+                    def serve():
+                        asyncio.set_event_loop(loop)
+                        loop.call_soon(ready.set)
+                        loop.run_forever()
+
+                    thread = threading.Thread(target=serve, name="weaprous-aio")
+                    thread.daemon = True
+                    thread.start()
+                    ready.wait()
+                    self._loop = loop
+                    print("[Async] Event loop started")
+        return loop
+
+    def submit(self, coro):
+        """
+        Schedule a coroutine on the loop from any thread.
+
+        :rtype concurrent.futures.Future: completion of ``coro``.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    async def call(self, hook, conn, headers, body, timeout=None, request=None):
+        """
+        Await ``hook(headers=..., body=...)`` on the loop.
+
+        :param conn (socket.socket): client connection, non-blocking.
+        :param timeout (float): seconds before the handler is cancelled,
+            :data:`DEFAULT_TIMEOUT` when None.
+        :param request (Request): passed as ``request=`` if not None.
+
+        :rtype object: the handler result.
+
+        :raises asyncio.TimeoutError: if the handler ran out of time.
+        :raises HandlerDisconnected: if the client went away first.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (DEFAULT_TIMEOUT if timeout is None else timeout)
+        if request is None:
+            handler = asyncio.ensure_future(hook(headers=headers, body=body))
+        else:
+            handler = asyncio.ensure_future(hook(headers=headers, body=body, request=request))
+        # The request is fully read, so the next recv only returns on EOF,
+        # a reset, or pipelined bytes.
+        watcher = asyncio.ensure_future(loop.sock_recv(conn, 1))
+        pending = {handler, watcher}
+        try:
+            while True:
+                done, pending = await asyncio.wait(
+                    pending, timeout=max(0.0, deadline - loop.time()),
+                    return_when=asyncio.FIRST_COMPLETED)
+                if handler in done:
+                    return handler.result()
+                if not done:
+                    raise asyncio.TimeoutError()
+                if watcher.exception() is not None or watcher.result() == b"":
+                    raise HandlerDisconnected()
+                # Pipelined bytes: the client is still there, stop watching.
+        finally:
+            for task in (handler, watcher):
+                if not task.done():
+                    task.cancel()
+
+
+#: Runner shared by every app in the process.
+RUNNER = AsyncRunner()
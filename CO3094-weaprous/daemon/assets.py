@@ -0,0 +1,182 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.assets
+~~~~~~~~~~~~~~~~~
+
+This module provides the fingerprinted static asset bundle.
+
+At startup every file under the asset directories is read and hashed, and
+published under a URL that embeds its content hash::
+
+  static/css/styles.css  ->  /css/styles.3f9a1c0b2e7d.css
+
+The content of such a URL never changes; a new version of the file gets a
+new URL. Responses are therefore sent from memory with
+``Cache-Control: public, max-age=31536000, immutable``, and a browser that
+has the page's assets never asks for them again.
+
+Pages link assets through :meth:`AssetBundle.url`, exposed to templates as
+``asset()``::
+
+  <link rel="stylesheet" href="{{ asset('css/styles.css') }}" />
+
+The plain URL keeps working, with the usual revalidating cache headers.
+"""
+
+import hashlib
+import mimetypes
+import os
+import socket
+import threading
+
+from .response import STATUS_LINES, content_type_header, date_header
+
+#: Header block of a fingerprinted asset response, after Content-Type.
+IMMUTABLE_HEADERS = b"Cache-Control: public, max-age=31536000, immutable\r\nConnection: close\r\n\r\n"
+
+_STATUS_200 = STATUS_LINES[200]
+
+
+def send_asset(conn, head, body):
+    """
+    Send a response head and a cached body without joining them.
+
+    Both go out in one gathered write where the platform has ``sendmsg``;
+    whatever that write left over is sent with ``sendall``.
+
+    :param conn (socket.socket): client connection.
+    :param head (bytes): status line and headers.
+    :param body (bytes): asset content, shared by every response.
+
+    :rtype int: number of bytes written.
+    """
+    total = len(head) + len(body)
+    if not hasattr(socket.socket, "sendmsg"):
+        conn.sendall(head)
+        conn.sendall(body)
+        return total
+    sent = conn.sendmsg((head, body))
+    if sent < len(head):
+        conn.sendall(head[sent:])
+        conn.sendall(body)
+    elif sent < total:
+        conn.sendall(memoryview(body)[sent - len(head):])
+    return total
+
+
+def fingerprint(name, digest):
+    """
+    Insert ``digest`` before the extension of a file name.
+
+    :rtype str: e.g. ``styles.<digest>.css``.
+    """
+    stem, ext = os.path.splitext(name)
+    return "{}.{}{}".format(stem, digest, ext)
+
+
+class AssetBundle(object):
+    """The :class:`AssetBundle <AssetBundle>` object, which hashes static
+    files and serves them under content-fingerprinted URLs from memory.
+
+    :attrs directories (tuple): roots scanned for assets, e.g. ``("static",)``.
+    :attrs max_bytes (int): total size held in memory; larger bundles keep
+        the remaining files unfingerprinted.
+    :attrs skip (tuple): extensions left out, pages link to assets but are
+        not assets themselves.
+    """
+
+    def __init__(self, directories=("static",), max_bytes=64 * 1024 * 1024,
+                 skip=(".html", ".htm")):
+        self.directories = tuple(directories)
+        self.max_bytes = max_bytes
+        self.skip = skip
+        self.built = False
+        self._urls = {}
+        self._responses = {}
+        self._lock = threading.Lock()
+
+    def build(self):
+        """
+        Read and hash every asset, replacing the previous bundle at once.
+
+        :rtype int: number of assets in the bundle.
+        """
+        urls = {}
+        responses = {}
+        total = 0
+        for root in self.directories:
+            for dirpath, dirnames, filenames in os.walk(root):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    if filename.startswith(".") or filename.endswith(self.skip):
+                        continue
+                    path = os.path.join(dirpath, filename)
+                    try:
+                        with open(path, "rb") as f:
+                            content = f.read()
+                    except OSError as e:
+                        print("[Assets] Skipping {}: {}".format(path, e))
+                        continue
+                    if total + len(content) > self.max_bytes:
+                        print("[Assets] Bundle full, {} left unfingerprinted".format(path))
+                        continue
+                    total += len(content)
+
+                    logical = "/" + os.path.relpath(path, root).replace(os.sep, "/")
+                    digest = hashlib.sha256(content).hexdigest()[:12]
+                    url = "/".join((logical.rsplit("/", 1)[0], fingerprint(filename, digest)))
+                    urls.setdefault(logical, url)
+                    mime_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+                    responses[url] = (b"".join((
+                        content_type_header(mime_type),
+                        b"Content-Length: %d\r\n" % len(content),
+                        IMMUTABLE_HEADERS,
+                    )), content)
+
+        with self._lock:
+            self._urls = urls
+            self._responses = responses
+            self.built = True
+        print("[Assets] Bundled {} assets ({} bytes)".format(len(urls), total))
+        return len(urls)
+
+    def url(self, path):
+        """
+        Fingerprinted URL of an asset.
+
+        :param path (str): asset path, e.g. ``css/styles.css``.
+
+        :rtype str: e.g. ``/css/styles.3f9a1c0b2e7d.css``, or the plain
+            absolute path if the asset is not in the bundle.
+        """
+        if not self.built:
+            self.build()
+        logical = "/" + path.lstrip("/")
+        return self._urls.get(logical, logical)
+
+    def lookup(self, path):
+        """
+        The response of a fingerprinted URL, as a fresh head and the cached
+        body, to be sent with :func:`send_asset` without copying the body.
+
+        :rtype tuple: (head, body), or None if ``path`` is not one.
+        """
+        entry = self._responses.get(path)
+        if entry is None:
+            return None
+        headers, content = entry
+        return b"".join((_STATUS_200, date_header(), headers)), content
+
+    def __len__(self):
+        return len(self._urls)
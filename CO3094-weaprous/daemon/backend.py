@@ -26,6 +26,11 @@ Requirements:
 - response: response utilities.
 - httpadapter: the class for handling HTTP requests.
 - CaseInsensitiveDict: provides dictionary for managing headers or routes.
+- metrics: connection gauges and the optional Prometheus endpoint.
+- admission: optional caps on connections and in-flight requests.
+- timeouts: read timeouts guarding every connection.
+- assets: optional fingerprinted static bundle served from memory.
+- staticindex: URL path index of the static files, built at startup.
 
 
 Notes:
@@ -47,8 +52,10 @@ import argparse
 from .response import *
 from .httpadapter import HttpAdapter
 from .dictionary import CaseInsensitiveDict
+from .metrics import METRICS, accept_queue_depth, metrics_route
+from .staticindex import STATIC_INDEX
 
-def handle_client(ip, port, conn, addr, routes):
+def handle_client(ip, port, conn, addr, routes, admission=None, timeouts=None, assets=None):
     """
     Initializes an HttpAdapter instance and delegates the client handling logic to it.
 
@@ -57,18 +64,51 @@ def handle_client(ip, port, conn, addr, routes):
     :param conn (socket.socket): Client connection socket.
     :param addr (tuple): client address (IP, port).
     :param routes (dict): Dictionary of route handlers.
+    :param admission (AdmissionController, optional): in-flight request cap.
+    :param timeouts (Timeouts, optional): request read timeouts.
+    :param assets (AssetBundle, optional): fingerprinted static assets.
     """
-    daemon = HttpAdapter(ip, port, conn, addr, routes)
+    METRICS.gauge_add("weaprous_pending_connections", -1)
+    METRICS.gauge_add("weaprous_active_connections", 1)
+    admitted = False
+    handed_off = None
+
+    def release(_=None):
+        METRICS.gauge_add("weaprous_active_connections", -1)
+        if admission is not None:
+            if admitted:
+                admission.release()
+            admission.release_connection()
 
-    # Handle client
-    daemon.handle_client(conn, addr, routes)
-
-def run_backend(ip, port, routes):
+    try:
+        if admission is not None:
+            admitted = admission.acquire()
+            if not admitted:
+                admission.reject(conn)
+                return
+
+        daemon = HttpAdapter(ip, port, conn, addr, routes, timeouts, assets)
+
+        # Handle client
+        handed_off = daemon.handle_client(conn, addr, routes)
+    finally:
+        if handed_off is None:
+            release()
+        else:
+            # Async and WebSocket connections stay counted until they end.
+            handed_off.add_done_callback(release)
+
+def run_backend(ip, port, routes, admission=None, timeouts=None, assets=None):
     server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
 
+    # Resolve every static path once, before the first request
+    STATIC_INDEX.build()
+
     try:
         server.bind((ip, port))
         server.listen(50)
+        METRICS.register_callback("weaprous_accept_queue_depth",
+                                  lambda: accept_queue_depth(server))
         print("[Backend] Listening on port {}".format(port))
         if routes != {}:
             print("[Backend] route settings {}".format(routes))
@@ -77,9 +117,16 @@ def run_backend(ip, port, routes):
             conn, addr = server.accept()
             print("[Backend] New connection from {}".format(addr))
 
+            # Quá tải → trả 503 ngay, không tạo luồng mới
+            if admission is not None and not admission.admit_connection():
+                admission.reject(conn)
+                continue
+            METRICS.gauge_add("weaprous_pending_connections", 1)
+
             # ✅ tạo luồng riêng để xử lý client
             client_thread = threading.Thread(
-                target=handle_client, args=(ip, port, conn, addr, routes)
+                target=handle_client,
+                args=(ip, port, conn, addr, routes, admission, timeouts, assets)
             )
             client_thread.daemon = True
             client_thread.start()
@@ -88,13 +135,26 @@ def run_backend(ip, port, routes):
         print("Socket error: {}".format(e))
 
 
-def create_backend(ip, port, routes={}):
+def create_backend(ip, port, routes={}, metrics_path=None, admission=None, timeouts=None,
+                   assets=None):
     """
     Entry point for creating and running the backend server.
 
     :param ip (str): IP address to bind the server.
     :param port (int): Port number to listen on.
     :param routes (dict, optional): Dictionary of route handlers. Defaults to empty dict.
+    :param metrics_path (str, optional): URL path serving Prometheus metrics,
+        e.g. ``/metrics``. Disabled when None.
+    :param admission (AdmissionController, optional): connection and
+        in-flight request caps. Unlimited when None.
+    :param timeouts (Timeouts, optional): read timeouts, the defaults of
+        :mod:`daemon.timeouts` when None.
+    :param assets (AssetBundle, optional): static assets served from memory
+        under their fingerprinted URLs.
     """
 
-    run_backend(ip, port, routes)
\ No newline at end of file
+    if metrics_path:
+        routes = dict(routes)
+        routes[("GET", metrics_path)] = metrics_route(metrics_path)
+
+    run_backend(ip, port, routes, admission, timeouts, assets)
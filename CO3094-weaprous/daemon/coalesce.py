@@ -0,0 +1,160 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.coalesce
+~~~~~~~~~~~~~~~~~
+
+This module provides request coalescing (single-flight) for the proxy.
+
+When many clients ask for the same page at once, the first request goes to
+the backend and the others wait for its response instead of sending their
+own. Only requests whose response does not depend on who asks are
+coalesced: ``GET`` without a body, ``Cookie`` or ``Authorization``, and
+without ``Cache-Control: no-cache``. The response is shared only if it is
+cacheable by default and sets no cookie.
+
+A waiting request gives up after ``wait_timeout`` seconds, or when the
+shared response turns out not to be shareable, and fetches on its own.
+
+Usage::
+
+  >>> flights = SingleFlight(wait_timeout=5.0)
+  >>> create_proxy("0.0.0.0", 8080, routes, coalesce=flights)
+"""
+
+import re
+import threading
+
+from .metrics import METRICS
+
+#: Status codes cacheable by default (RFC 9110 15.1), shared among waiters.
+SHAREABLE_STATUS = frozenset((b"200", b"203", b"204", b"300", b"301", b"404", b"405",
+                              b"410", b"414", b"501"))
+
+_NO_CACHE = re.compile(rb"no-cache|no-store", re.IGNORECASE)
+_PRIVATE = re.compile(
+    rb"\r\n(?:set-cookie[ \t]*:|cache-control[ \t]*:[^\r]*(?:private|no-store|no-cache))",
+    re.IGNORECASE)
+
+
+def coalesce_key(hostname, parser, body=None):
+    """
+    The key of requests that may share one upstream response.
+
+    :param parser (HttpParser): the request, parsed up to its header block.
+    :param body (PendingBody): body still on the client socket, or None.
+
+    :rtype tuple: the key, or None if the request must be sent on its own.
+    """
+    if parser.method != "GET" or body is not None or parser.content_length:
+        return None
+    if parser.header_bytes(b"cookie") is not None \
+            or parser.header_bytes(b"authorization") is not None:
+        return None
+    for name in (b"cache-control", b"pragma"):
+        value = parser.header_bytes(name)
+        if value is not None and _NO_CACHE.search(value):
+            return None
+    # The representation may vary with these.
+    return (hostname, parser.target, parser.header_bytes(b"accept-encoding"),
+            parser.header_bytes(b"accept"))
+
+
+def is_shareable(response):
+    """
+    Whether a raw upstream response may be handed to other clients.
+    """
+    end = response.find(b"\r\n\r\n")
+    if end < 0:
+        return False
+    status = response[9:12] if response.startswith(b"HTTP/1.") else b""
+    return status in SHAREABLE_STATUS and not _PRIVATE.search(response, 0, end + 2)
+
+
+class _Flight(object):
+    __slots__ = ("done", "result", "shareable", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.shareable = False
+        self.waiters = 0
+
+
+class SingleFlight(object):
+    """The :class:`SingleFlight <SingleFlight>` object, which collapses
+    concurrent fetches of the same key into one.
+
+    :attrs wait_timeout (float): seconds a follower waits for the leader.
+    """
+
+    def __init__(self, wait_timeout=5.0):
+        self.wait_timeout = wait_timeout
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def run(self, key, fetch, shareable=lambda result: True, host="none"):
+        """
+        Call ``fetch()``, or wait for the call already running for ``key``.
+
+        :param fetch (callable): performs the fetch.
+        :param shareable (callable): whether a result may be given to waiters.
+
+        :rtype tuple: (result, True if it came from another request's fetch).
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.waiters += 1
+
+        if leader:
+            try:
+                result = flight.result = fetch()
+                flight.shareable = shareable(result)
+                return result, False
+            finally:
+                with self._lock:
+                    del self._flights[key]
+                flight.done.set()
+
+        if flight.done.wait(self.wait_timeout) and flight.shareable:
+            METRICS.inc("weaprous_proxy_coalesced_total", (("host", host), ("outcome", "shared")))
+            return flight.result, True
+        outcome = "unshareable" if flight.done.is_set() else "timeout"
+        METRICS.inc("weaprous_proxy_coalesced_total", (("host", host), ("outcome", outcome)))
+        return fetch(), False
+
+    def __len__(self):
+        with self._lock:
+            return len(self._flights)
+
+
+def add_arguments(parser):
+    """
+    Add the request coalescing options to a start script's argument parser.
+    """
+    parser.add_argument('--coalesce-timeout', type=float, default=5.0,
+                        help='Seconds an identical GET waits for the in-flight one '
+                             '(0 disables coalescing)')
+
+
+def from_args(args):
+    """
+    :rtype SingleFlight or None: None when coalescing is disabled.
+    """
+    if not args.coalesce_timeout:
+        return None
+    return SingleFlight(args.coalesce_timeout)
@@ -0,0 +1,199 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.credentials
+~~~~~~~~~~~~~~~~~
+
+This module provides a cached credential store for WeApRous apps.
+
+A :class:`CredentialStore <CredentialStore>` loads every user once from a
+provider into an in-memory index and answers lookups from that index. The
+provider's version (the file mtime for the bundled providers) is checked at
+most once per ``check_interval`` seconds; when it changed, a new index is
+loaded and swapped in with a single assignment, so concurrent readers always
+see either the old or the new index and never take a lock.
+
+Providers:
+
+- :class:`JsonFileProvider`: a ``{"username": "password"}`` JSON file such
+  as ``db/users.json``.
+- :class:`SqliteProvider`: a SQLite table with username and password columns.
+
+Usage::
+
+  >>> store = CredentialStore(JsonFileProvider("db/users.json"))
+  >>> store.verify("admin", "password")
+  True
+"""
+
+import hmac
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class JsonFileProvider(object):
+    """Credentials kept in a JSON object of ``username: password``.
+
+    :attrs path (str): location of the JSON file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def version(self):
+        """
+        :rtype tuple: (mtime_ns, size) of the file.
+
+        :raises FileNotFoundError: if the file does not exist.
+        """
+        st = os.stat(self.path)
+        return st.st_mtime_ns, st.st_size
+
+    def load(self):
+        """
+        :rtype dict: username to password.
+        """
+        with open(self.path, "r", encoding="utf-8") as f:
+            users = json.load(f)
+        return {str(k): str(v) for k, v in users.items()}
+
+
+class SqliteProvider(object):
+    """Credentials kept in a SQLite table.
+
+    :attrs path (str): SQLite database file.
+    :attrs table (str): table holding the users.
+    :attrs user_column (str): username column.
+    :attrs password_column (str): password column.
+    """
+
+    def __init__(self, path, table="users", user_column="username",
+                 password_column="password"):
+        for name in (table, user_column, password_column):
+            if not name.isidentifier():
+                raise ValueError("Invalid SQL identifier: {}".format(name))
+        self.path = path
+        self.table = table
+        self.user_column = user_column
+        self.password_column = password_column
+
+    def version(self):
+        """
+        :rtype tuple: (mtime_ns, size) of the database and its WAL file.
+
+        :raises FileNotFoundError: if the database does not exist.
+        """
+        st = os.stat(self.path)
+        try:
+            wal = os.stat(self.path + "-wal")
+            return st.st_mtime_ns, st.st_size, wal.st_mtime_ns, wal.st_size
+        except FileNotFoundError:
+            return st.st_mtime_ns, st.st_size
+
+    def load(self):
+        """
+        :rtype dict: username to password.
+        """
+        conn = sqlite3.connect("file:{}?mode=ro".format(self.path), uri=True)
+        try:
+            rows = conn.execute("SELECT {}, {} FROM {}".format(
+                self.user_column, self.password_column, self.table))
+            return {str(user): str(password) for user, password in rows}
+        finally:
+            conn.close()
+
+
+class CredentialStore(object):
+    """The :class:`CredentialStore <CredentialStore>` object, which serves
+    credential lookups from memory and reloads them when the provider changes.
+
+    :attrs provider: object with ``version()`` and ``load()``.
+    :attrs check_interval (float): minimum seconds between version checks.
+    """
+
+    def __init__(self, provider, check_interval=1.0):
+        self.provider = provider
+        self.check_interval = check_interval
+        self._index = None
+        self._version = None
+        self._checked_at = 0.0
+        self._reload_lock = threading.Lock()
+
+    def _current(self):
+        index = self._index
+        now = time.monotonic()
+        if index is not None and now - self._checked_at < self.check_interval:
+            return index
+
+        # One thread reloads, the others keep reading the current index.
+        if not self._reload_lock.acquire(blocking=index is None):
+            return index
+        try:
+            if self._index is not None and now - self._checked_at < self.check_interval:
+                return self._index
+            self._checked_at = now
+            try:
+                version = self.provider.version()
+            except FileNotFoundError:
+                if self._index is None:
+                    raise
+                print("[Credentials] Source missing, keeping the last loaded users")
+                return self._index
+            if version != self._version or self._index is None:
+                try:
+                    index = self.provider.load()
+                except (OSError, ValueError, sqlite3.Error) as e:
+                    # e.g. the file is caught mid-write; retry on the next check.
+                    if self._index is None:
+                        raise
+                    print("[Credentials] Reload failed, keeping the last loaded users: {}".format(e))
+                    return self._index
+                self._index, self._version = index, version
+                print("[Credentials] Loaded {} users".format(len(index)))
+            return self._index
+        finally:
+            self._reload_lock.release()
+
+    def reload(self):
+        """Force a reload on the next lookup."""
+        self._checked_at = 0.0
+        self._version = None
+
+    def get(self, username):
+        """
+        :rtype str or None: stored password of ``username``.
+
+        :raises FileNotFoundError: if nothing could ever be loaded.
+        """
+        return self._current().get(username)
+
+    def __contains__(self, username):
+        return username in self._current()
+
+    def verify(self, username, password):
+        """
+        Check a username and password in constant time.
+
+        :rtype bool: True if the credentials match.
+
+        :raises FileNotFoundError: if nothing could ever be loaded.
+        """
+        if username is None or password is None:
+            return False
+        stored = self._current().get(username)
+        if stored is None:
+            return False
+        return hmac.compare_digest(stored.encode("utf-8"), password.encode("utf-8"))
@@ -16,6 +16,12 @@ class CaseInsensitiveDict(MutableMapping):
     """The :class:`CaseInsensitiveDict<MutableMapping>` object, which 
     contains a custom behavior of MutuableMapping.
 
+    Keys are matched case-insensitively but keep the casing they were first
+    stored with, which is what :meth:`items` and iteration return (e.g. for
+    writing headers back out). A key can hold several values, added with
+    :meth:`add` and read back with :meth:`getlist`; plain item access
+    returns the last value.
+
     Usage::
 
       >>> import tools
@@ -31,22 +37,117 @@ class CaseInsensitiveDict(MutableMapping):
       >>> print(word)
       {'status_code': '404', 'msg': 'Not found'}
 
+      >>> word.add('Set-Cookie', 'a=1')
+      >>> word.add('set-cookie', 'b=2')
+      >>> word.getlist('SET-COOKIE')
+      ['a=1', 'b=2']
+
     """
 
+    __slots__ = ("store", "_extra")
+
     def __init__(self, *args, **kwargs):
-        self.store = {k.lower(): v for k, v in dict(*args, **kwargs).items()}
+        #: lower-cased key -> (original key, last value)
+        self.store = {}
+        #: lower-cased key -> earlier values, only for multi-value keys
+        self._extra = None
+        if args or kwargs:
+            self.update(*args, **kwargs)
 
     def __getitem__(self, key):
-        return self.store[key.lower()]
+        return self.store[key.lower()][1]
 
     def __setitem__(self, key, value):
-        self.store[key.lower()] = value
+        lower = key.lower()
+        self.store[lower] = (key, value)
+        if self._extra and lower in self._extra:
+            del self._extra[lower]
 
     def __delitem__(self, key):
-        del self.store[key.lower()]
+        lower = key.lower()
+        del self.store[lower]
+        if self._extra and lower in self._extra:
+            del self._extra[lower]
 
     def __iter__(self):
-        return iter(self.store)
+        return (key for key, _ in self.store.values())
 
     def __len__(self):
-        return len(self.store)
\ No newline at end of file
+        return len(self.store)
+
+    def __contains__(self, key):
+        return key.lower() in self.store
+
+    def __repr__(self):
+        return str(dict(self.items()))
+
+    def __eq__(self, other):
+        if not isinstance(other, MutableMapping):
+            return NotImplemented
+        if not isinstance(other, CaseInsensitiveDict):
+            other = CaseInsensitiveDict(other)
+        return ({k: v for k, (_, v) in self.store.items()} ==
+                {k: v for k, (_, v) in other.store.items()})
+
+    def update(self, *args, **kwargs):
+        if self._extra:
+            return MutableMapping.update(self, *args, **kwargs)
+        store = self.store
+        for source in args + (kwargs,):
+            items = source.items() if hasattr(source, "items") else source
+            for key, value in items:
+                store[key.lower()] = (key, value)
+
+    def get(self, key, default=None):
+        item = self.store.get(key.lower())
+        return default if item is None else item[1]
+
+    def items(self):
+        return [item for item in self.store.values()]
+
+    def add(self, key, value):
+        """
+        Add a value without replacing the existing ones.
+
+        :param key (str): header name.
+        :param value: value appended after any existing value.
+        """
+        lower = key.lower()
+        item = self.store.get(lower)
+        if item is not None:
+            if self._extra is None:
+                self._extra = {}
+            self._extra.setdefault(lower, []).append(item[1])
+            key = item[0]
+        self.store[lower] = (key, value)
+
+    def getlist(self, key):
+        """
+        Return every value of ``key`` in insertion order.
+
+        :rtype list: values, empty when the key is absent.
+        """
+        lower = key.lower()
+        item = self.store.get(lower)
+        if item is None:
+            return []
+        earlier = self._extra.get(lower, []) if self._extra else []
+        return earlier + [item[1]]
+
+    def multi_items(self):
+        """
+        Yield ``(original key, value)`` for every value of every key.
+        """
+        extra = self._extra
+        for lower, (key, value) in self.store.items():
+            if extra and lower in extra:
+                for earlier in extra[lower]:
+                    yield key, earlier
+            yield key, value
+
+    def copy(self):
+        other = CaseInsensitiveDict()
+        other.store = dict(self.store)
+        if self._extra:
+            other._extra = {k: list(v) for k, v in self._extra.items()}
+        return other
@@ -6,10 +6,28 @@
 # WeApRous release
 #
 
-import json
+import time
+import asyncio
 from .request import Request
-from .response import Response
+from .response import Response, serialize_response, serialize_stream_head
 from .dictionary import CaseInsensitiveDict
+from .httpparser import HttpParser, HttpParseError, MAX_BODY_SIZE
+from .metrics import METRICS, status_of
+from .serializers import DEFAULT_SERIALIZERS, Frozen
+from .streaming import StreamingBody, is_stream, send_stream
+from .aio import RUNNER, HandlerDisconnected
+from .timeouts import read_request, PendingBody
+from .multipart import MultipartParser, MAX_UPLOAD_SIZE, is_multipart, parse_boundary
+from .offload import OffloadRejected
+from .staticindex import STATIC_INDEX
+from .assets import send_asset
+from . import websocket
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+#: Precompiled header blocks of the route result encoders.
+VARY_ACCEPT = b"Vary: Accept\r\n"
+HTML_HEADERS = b"Content-Type: text/html\r\n"
+TEXT_HEADERS = b"Content-Type: text/plain\r\n"
 
 
 class HttpAdapter:
@@ -17,162 +35,339 @@ class HttpAdapter:
     A mutable HTTP adapter for managing client connections and routing requests.
     """
 
-    __attrs__ = [
+    __slots__ = (
         "ip",
         "port",
         "conn",
         "connaddr",
         "routes",
         "request",
-        "response",
-    ]
+        "_response",
+        "timeouts",
+        "assets",
+    )
 
-    def __init__(self, ip, port, conn, connaddr, routes):
+    def __init__(self, ip, port, conn, connaddr, routes, timeouts=None, assets=None):
         self.ip = ip
         self.port = port
         self.conn = conn
         self.connaddr = connaddr
         self.routes = routes
+        self.timeouts = timeouts
+        self.assets = assets
         self.request = Request()
-        self.response = Response()
+        self._response = None
+
+    @property
+    def response(self):
+        """The :class:`Response <Response>`, created only when a handler needs one."""
+        response = self._response
+        if response is None:
+            response = self._response = Response()
+        return response
 
     # ===============================================================
     #  MAIN HANDLER
     # ===============================================================
     def handle_client(self, conn, addr, routes):
-        """Main handler for a single HTTP client connection."""
+        """
+        Main handler for a single HTTP client connection.
+
+        Async and WebSocket routes hand the connection to the event loop and
+        return at once; the caller must keep its per-connection accounting
+        until the returned future completes.
+
+        :rtype concurrent.futures.Future: completion of the handed-off
+            connection, or None if it was served and closed here.
+        """
 
         req = self.request
-        resp = self.response
+        started = time.perf_counter()
+        route_label = "static"
+        http_response = b""
+        sent = None
+        handed_off = False
+        # The body limit depends on the route; read_body checks it.
+        parser = HttpParser(max_body_size=None)
 
         try:
-            raw = conn.recv(4096)
-            if not raw:
-                conn.close()
+            # --- Read the header block (or until a timeout fires) ---
+            if not read_request(conn, parser, self.timeouts, head_only=True):
                 return
 
-            msg = raw.decode(errors="ignore")
-
-            # --- Parse request ---
-            req.prepare(msg, routes)
-
-            http_response = b""
+            # --- Parse request, then read its body ---
+            req.prepare(parser, routes)
+            self.read_body(conn, parser, req)
 
             # =======================================================
             # [1] ROUTE HANDLING
             # =======================================================
             if req.hook:
                 print(f"[HttpAdapter] Routed → {req.hook._route_methods} {req.hook._route_path}")
+                route_label = f"{req.method} {req.hook._route_path}"
+
+                if getattr(req.hook, "_websocket", False):
+                    # Handshake here, then the event loop owns the connection.
+                    http_response, subprotocol = websocket.handshake(
+                        req, req.hook._subprotocols)
+                    conn.sendall(http_response)
+                    handed_off = True
+                    self.record_metrics(route_label, parser.received, http_response, started)
+                    conn.setblocking(False)
+                    return RUNNER.submit(websocket.serve(
+                        conn, req, req.hook, subprotocol, parser.surplus))
+
+                if getattr(req.hook, "_is_async", False):
+                    # The event loop owns the connection from here on.
+                    handed_off = True
+                    conn.setblocking(False)
+                    return RUNNER.submit(self.serve_async(
+                        conn, req, route_label, parser.received, started))
 
                 try:
-                    result = req.hook(headers=req.headers, body=req.body)
-
-                    # --- Case A: (status, headers, body) ---
-                    if isinstance(result, tuple):
-                        status = result[0] if len(result) >= 1 else 200
-                        headers_out = result[1] if len(result) >= 2 else {}
-                        body = result[2] if len(result) >= 3 else ""
-
-                        # Encode body
-                        body_bytes = body.encode("utf-8") if isinstance(body, str) else (body or b"")
-
-                        # Determine HTTP status text
-                        status_text = "OK"
-                        if status == 302:
-                            status_text = "Found"
-                        elif status == 401:
-                            status_text = "Unauthorized"
-                        elif status == 404:
-                            status_text = "Not Found"
-                        elif status >= 500:
-                            status_text = "Internal Server Error"
-
-                        # --- Build headers text ---
-                        headers_text = ""
-                        if isinstance(headers_out, dict):
-                            for k, v in headers_out.items():
-                                if isinstance(v, (list, tuple)):
-                                    for vv in v:
-                                        headers_text += f"{k}: {vv}\r\n"
-                                else:
-                                    headers_text += f"{k}: {v}\r\n"
-                        elif isinstance(headers_out, (list, tuple)):
-                            for k, v in headers_out:
-                                headers_text += f"{k}: {v}\r\n"
-                        else:
-                            try:
-                                for k, v in headers_out.items():
-                                    headers_text += f"{k}: {v}\r\n"
-                            except Exception:
-                                pass
-
-                        # Add Content-Length if missing
-                        if "Content-Length" not in headers_out:
-                            headers_text += f"Content-Length: {len(body_bytes)}\r\n"
-
-                        # Build full HTTP response
-                        http_response = (
-                            f"HTTP/1.1 {status} {status_text}\r\n"
-                            f"{headers_text}"
-                            "Connection: close\r\n\r\n"
-                        ).encode("utf-8") + body_bytes
-
-                    # --- Case B: dict (JSON API) ---
-                    elif isinstance(result, dict):
-                        body_bytes = json.dumps(result).encode("utf-8")
-                        http_response = (
-                            "HTTP/1.1 200 OK\r\n"
-                            "Content-Type: application/json\r\n"
-                            f"Content-Length: {len(body_bytes)}\r\n"
-                            "Connection: close\r\n\r\n"
-                        ).encode("utf-8") + body_bytes
-
-                    # --- Case C: string (plain/HTML) ---
-                    elif isinstance(result, str):
-                        body_bytes = result.encode("utf-8")
-                        http_response = (
-                            "HTTP/1.1 200 OK\r\n"
-                            "Content-Type: text/html\r\n"
-                            f"Content-Length: {len(body_bytes)}\r\n"
-                            "Connection: close\r\n\r\n"
-                        ).encode("utf-8") + body_bytes
-
-                    # --- Case D: fallback ---
+                    offload = getattr(req.hook, "_offload", None)
+                    if offload is not None:
+                        result = self.call_offloaded(offload, req)
+                    elif getattr(req.hook, "_takes_request", False):
+                        result = req.hook(headers=req.headers, body=req.body, request=req)
                     else:
-                        http_response = resp.build_notfound()
+                        result = req.hook(headers=req.headers, body=req.body)
+                    http_response, stream = self.encode_result(req, result)
+
+                    if stream is not None:
+                        http_response, chunked, pieces = self.prepare_stream(req, *stream)
+                        sent = send_stream(conn, http_response, pieces, chunked)
+                        return
 
                 except Exception as e:
-                    err = f"Hook execution error: {e}"
-                    http_response = (
-                        "HTTP/1.1 500 Internal Server Error\r\n"
-                        "Content-Type: text/plain\r\n"
-                        f"Content-Length: {len(err)}\r\n"
-                        "Connection: close\r\n\r\n"
-                        f"{err}"
-                    ).encode("utf-8")
+                    if sent is not None or http_response:
+                        raise
+                    http_response = serialize_response(
+                        500, TEXT_HEADERS, f"Hook execution error: {e}")
 
             # =======================================================
             # [2] NO ROUTE FOUND → SERVE STATIC FILE
             # =======================================================
             else:
-                http_response = resp.build_response(req)
+                asset = self.assets.lookup(req.path) if self.assets is not None else None
+                if asset is not None:
+                    route_label = "asset"
+                    http_response, content = asset
+                    sent = send_asset(conn, http_response, content)
+                    return
+                else:
+                    http_response = self.response.build_response(req, STATIC_INDEX)
 
             conn.sendall(http_response)
 
+        except (BrokenPipeError, ConnectionResetError) as e:
+            print(f"[HttpAdapter] Client went away: {e}")
+
+        except HttpParseError as e:
+            http_response = serialize_response(e.status, TEXT_HEADERS, str(e))
+            conn.sendall(http_response)
+
+        except Exception as e:
+            if http_response:
+                # The head is already out; the response is cut short instead.
+                print(f"[HttpAdapter] Stream aborted: {e}")
+            else:
+                http_response = serialize_response(500, TEXT_HEADERS, f"Server error: {e}")
+                conn.sendall(http_response)
+
+        finally:
+            if not handed_off:
+                conn.close()
+                req.close()
+                if parser.received:
+                    self.record_metrics(route_label, parser.received, http_response, started, sent)
+
+    # ===============================================================
+    #  REQUEST BODY
+    # ===============================================================
+    def read_body(self, conn, parser, req):
+        """
+        Read the rest of the request body after its header block.
+
+        A ``multipart/form-data`` body for a handler that takes the request
+        is parsed while it arrives into :attr:`Request.form`, with files
+        spooled to disk, up to the route's ``max_upload``. Any other body
+        is buffered in memory, up to :data:`MAX_BODY_SIZE`.
+
+        :raises HttpParseError: on an oversized or malformed body.
+        """
+        hook = req.hook
+        length = parser.content_length or 0
+        content_type = parser.header_bytes(b"content-type")
+        if hook is not None and getattr(hook, "_takes_request", False) and is_multipart(content_type):
+            limit = getattr(hook, "_max_upload", None) or MAX_UPLOAD_SIZE
+            if length > limit:
+                raise HttpParseError("Upload too large", 413)
+            upload = MultipartParser(parse_boundary(content_type), max_size=limit)
+            try:
+                received = parser.body_view
+                upload.feed(received)
+                PendingBody(conn, length - len(received), self.timeouts).read_into(upload.feed)
+                req.form = upload.close()
+            except BaseException:
+                upload.abort()
+                raise
+            # The body went to the form; the handlers get no copy of it.
+            req.body_view = memoryview(b"")
+            req.body = b""
+            return
+
+        if parser.complete:
+            return
+        if length > MAX_BODY_SIZE:
+            raise HttpParseError("Request body too large", 413)
+        read_request(conn, parser, self.timeouts)
+        req.body_view = parser.body_view
+        req.body = req.body_view.tobytes()
+
+    # ===============================================================
+    #  RESULT ENCODING
+    # ===============================================================
+    def encode_result(self, req, result):
+        """
+        Turn a route handler result into response bytes.
+
+        :rtype tuple: (serialized response, None) or, for streamed bodies,
+            (b"", (status, headers, iterable)).
+        """
+        # --- Case A: (status, headers, body) ---
+        if isinstance(result, tuple):
+            status = result[0] if len(result) >= 1 else 200
+            headers_out = result[1] if len(result) >= 2 else None
+            body = result[2] if len(result) >= 3 else b""
+            if is_stream(body):
+                return b"", (status, headers_out, body)
+            return serialize_response(status, headers_out, body), None
+
+        # --- Case B: dict (JSON or negotiated API encoding) ---
+        if isinstance(result, (dict, Frozen)):
+            serializers = getattr(req.hook, "_serializers", DEFAULT_SERIALIZERS)
+            content_type, body_bytes = serializers.encode(
+                result, req.headers.get("accept"))
+            return serialize_response(
+                200, VARY_ACCEPT, body_bytes, content_type=content_type), None
+
+        # --- Case C: string (plain/HTML) ---
+        if isinstance(result, str):
+            return serialize_response(200, HTML_HEADERS, result.encode("utf-8")), None
+
+        # --- Case D: iterator, generator or StreamingBody ---
+        if is_stream(result):
+            return b"", (200, None, result)
+
+        # --- Case E: fallback ---
+        return self.response.build_notfound(), None
+
+    # ===============================================================
+    #  PROCESS OFFLOAD
+    # ===============================================================
+    def call_offloaded(self, offload, req):
+        """
+        Run a ``executor="process"`` route in the app's worker pool.
+
+        A full pool is answered with 503 and a timed-out worker with 504,
+        both as ordinary ``(status, headers, body)`` results.
+        """
+        try:
+            return offload.call(req.hook, req, getattr(req.hook, "_timeout", None))
+        except OffloadRejected:
+            return (503, {"Content-Type": "text/plain", "Retry-After": "1"},
+                    "Server busy, try again later")
+        except FutureTimeoutError:
+            return (504, {"Content-Type": "text/plain"}, "Handler timed out")
+
+    # ===============================================================
+    #  ASYNC HANDLERS
+    # ===============================================================
+    async def serve_async(self, conn, req, route_label, received, started):
+        """
+        Run a coroutine handler on the event loop and answer the client.
+
+        A handler that outlives its route timeout is cancelled and answered
+        with 504; a client that disconnects cancels the handler and gets no
+        answer. Streamed results are written from the loop's thread pool.
+        """
+        loop = asyncio.get_running_loop()
+        http_response = b""
+        sent = None
+        try:
+            try:
+                result = await RUNNER.call(
+                    req.hook, conn, req.headers, req.body, getattr(req.hook, "_timeout", None),
+                    req if getattr(req.hook, "_takes_request", False) else None)
+                http_response, stream = self.encode_result(req, result)
+            except HandlerDisconnected:
+                print(f"[HttpAdapter] Client left, cancelled {route_label}")
+                return
+            except asyncio.TimeoutError:
+                http_response, stream = serialize_response(
+                    504, TEXT_HEADERS, "Handler timed out"), None
+            except Exception as e:
+                http_response, stream = serialize_response(
+                    500, TEXT_HEADERS, f"Hook execution error: {e}"), None
+
+            if stream is None:
+                await loop.sock_sendall(conn, http_response)
+            else:
+                http_response, chunked, pieces = self.prepare_stream(req, *stream)
+                conn.setblocking(True)
+                sent = await loop.run_in_executor(
+                    None, send_stream, conn, http_response, pieces, chunked)
+
+        except OSError as e:
+            print(f"[HttpAdapter] Client went away: {e}")
+
         except Exception as e:
-            err_msg = f"Server error: {e}"
-            conn.sendall(
-                (
-                    "HTTP/1.1 500 Internal Server Error\r\n"
-                    "Content-Type: text/plain\r\n"
-                    f"Content-Length: {len(err_msg)}\r\n"
-                    "Connection: close\r\n\r\n"
-                    f"{err_msg}"
-                ).encode("utf-8")
-            )
+            print(f"[HttpAdapter] Stream aborted: {e}")
 
         finally:
             conn.close()
+            req.close()
+            self.record_metrics(route_label, received, http_response, started, sent)
+
+    # ===============================================================
+    #  STREAMING
+    # ===============================================================
+    def prepare_stream(self, req, status, headers_out, body):
+        """
+        Build the head of a streamed route result.
+
+        HTTP/1.1 clients get chunked framing. HTTP/1.0 clients do not
+        understand it and get the raw pieces, delimited by closing the
+        connection.
+
+        :rtype tuple: (response head, chunked flag, iterator of pieces).
+        """
+        content_type = "text/html"
+        if body.__class__ is StreamingBody:
+            content_type = body.content_type
+            body = body.iterable
+        chunked = req.version != "HTTP/1.0"
+        head = serialize_stream_head(status, headers_out, content_type, chunked)
+        return head, chunked, iter(body)
+
+    # ===============================================================
+    #  METRICS
+    # ===============================================================
+    def record_metrics(self, route_label, received, http_response, started, sent=None):
+        """Record one served request into the shared metrics registry.
+
+        ``sent`` overrides ``len(http_response)`` for streamed responses,
+        where ``http_response`` only holds the head.
+        """
+        labels = (("route", route_label),)
+        METRICS.inc("weaprous_http_requests_total",
+                    labels + (("status", status_of(http_response)),))
+        METRICS.observe("weaprous_http_request_duration_seconds",
+                        labels, time.perf_counter() - started)
+        METRICS.inc("weaprous_http_bytes_received_total", value=received)
+        METRICS.inc("weaprous_http_bytes_sent_total",
+                    value=len(http_response) if sent is None else sent)
 
     # ===============================================================
     #  COOKIE UTILITIES
@@ -0,0 +1,312 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.httpparser
+~~~~~~~~~~~~~~~~~
+
+This module provides an incremental, bytes-level HTTP/1.1 request parser.
+
+The parser is fed raw socket chunks and scans the buffer for the blank line
+that ends the header block, resuming where the previous scan stopped. Once
+found, the request line is split out and ``Content-Length`` located to
+frame the body; requests with ``Transfer-Encoding`` are refused. The rest
+of the header block stays as bytes until the headers are first read. The
+body is exposed as a zero-copy :class:`memoryview` over the receive buffer.
+
+Usage::
+
+  >>> parser = HttpParser()
+  >>> parser.feed(b"POST /echo HTTP/1.1\\r\\nContent-Length: 2\\r\\n\\r\\n")
+  False
+  >>> parser.feed(b"{}")
+  True
+  >>> parser.method, parser.target, bytes(parser.body_view)
+  ('POST', '/echo', b'{}')
+"""
+
+import re
+
+from .dictionary import CaseInsensitiveDict
+
+#: Upper bound of the request line plus header block.
+MAX_HEADER_SIZE = 64 * 1024
+
+#: Upper bound of a request body held in memory.
+MAX_BODY_SIZE = 16 * 1024 * 1024
+
+_CONTENT_LENGTH = re.compile(rb"\r\ncontent-length([ \t]*):([^\r]*)(?=\r\n)", re.IGNORECASE)
+_DIGITS = re.compile(rb"[ \t]*(\d+)[ \t]*")
+_TRANSFER_ENCODING = re.compile(rb"\r\ntransfer-encoding[ \t]*:", re.IGNORECASE)
+
+_HEADER_PATTERNS = {}
+
+_HEAD = 0
+_BODY = 1
+_DONE = 2
+
+_REASONS = {
+    400: "Bad Request",
+    408: "Request Timeout",
+    413: "Content Too Large",
+    426: "Upgrade Required",
+    431: "Request Header Fields Too Large",
+    501: "Not Implemented",
+}
+
+
+class HttpParseError(ValueError):
+    """Raised when the request is malformed or exceeds a size limit.
+
+    :attrs status (int): HTTP status code to answer with.
+    :attrs reason (str): matching reason phrase.
+    """
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+        self.reason = _REASONS.get(status, "Bad Request")
+
+
+class HttpParser(object):
+    """The :class:`HttpParser <HttpParser>` object, which incrementally parses
+    one HTTP request from raw bytes.
+
+    :attrs method (str): request method, upper case.
+    :attrs target (str): request target as sent, e.g. ``/index.html?x=1``.
+    :attrs version (str): protocol version, e.g. ``HTTP/1.1``.
+    :attrs headers (CaseInsensitiveDict): request headers, built on first access.
+    :attrs content_length (int): declared body length, or None.
+    :attrs body_start (int): buffer offset of the first body byte.
+    :attrs received (int): total bytes fed so far.
+    :attrs max_body_size (int): largest Content-Length accepted, or None
+        when the caller checks it once the headers are in.
+    """
+
+    __slots__ = (
+        "method", "target", "version", "content_length",
+        "body_start", "received", "max_header_size", "max_body_size",
+        "_buf", "_pos", "_state", "_line_end", "_headers",
+    )
+
+    def __init__(self, max_header_size=MAX_HEADER_SIZE, max_body_size=MAX_BODY_SIZE):
+        self.method = None
+        self.target = None
+        self.version = None
+        self._headers = None
+        self._line_end = 0
+        self.content_length = None
+        self.body_start = None
+        self.received = 0
+        self.max_header_size = max_header_size
+        self.max_body_size = max_body_size
+        self._buf = b""
+        self._pos = 0
+        self._state = _HEAD
+
+    @property
+    def complete(self):
+        return self._state == _DONE
+
+    @property
+    def headers_complete(self):
+        return self._state != _HEAD
+
+    def feed(self, data):
+        """
+        Append a received chunk and advance the parse.
+
+        :param data (bytes): next chunk read from the socket.
+
+        :rtype bool: True once the request line, headers and body are complete.
+
+        :raises HttpParseError: on a malformed request or an exceeded limit.
+        """
+        self.received += len(data)
+        buf = self._buf
+        if not buf:
+            # Common case: the whole request arrives in the first chunk and
+            # is parsed in place, without copying it into a buffer.
+            buf = self._buf = bytes(data)
+        else:
+            if buf.__class__ is not bytearray:
+                buf = self._buf = bytearray(buf)
+            buf += data
+
+        if self._state == _HEAD:
+            if self._pos == 0 and buf.startswith(b"\r\n"):
+                # Tolerate empty lines before the request line.
+                buf = self._buf = buf.lstrip(b"\r\n")
+            end = buf.find(b"\r\n\r\n", self._pos)
+            if end < 0:
+                if len(buf) > self.max_header_size:
+                    raise HttpParseError("Request header too large", 431)
+                # Resume the scan where it stopped, minus a partial CRLFCRLF.
+                self._pos = max(0, len(buf) - 3)
+                return False
+            if end > self.max_header_size:
+                raise HttpParseError("Request header too large", 431)
+            self._parse_head(buf, end)
+            self.body_start = end + 4
+            self._state = _BODY
+
+        if self._state == _BODY:
+            have = len(buf) - self.body_start
+            if self.content_length is None or have >= self.content_length:
+                self._state = _DONE
+
+        return self._state == _DONE
+
+    def _parse_head(self, buf, end):
+        line_end = buf.find(b"\r\n", 0, end)
+        if line_end < 0:
+            line_end = end
+        parts = buf[:line_end].split()
+        if len(parts) != 3:
+            raise HttpParseError("Malformed request line")
+        method, target, version = parts
+        self.method = method.decode("ascii", "replace").upper()
+        self.target = target.decode("utf-8", "replace")
+        self.version = version.decode("ascii", "replace")
+        self._line_end = line_end
+
+        # Framing needs Content-Length now; everything else waits for
+        # the first access of :attr:`headers`.
+        # Every Content-Length line is checked: the proxy forwards them all,
+        # and a backend that reads another one would frame another body.
+        length = None
+        for match in _CONTENT_LENGTH.finditer(buf, line_end, end + 2):
+            value = _DIGITS.fullmatch(match.group(2))
+            if match.group(1) or value is None:
+                raise HttpParseError("Invalid Content-Length")
+            if length is not None and int(value.group(1)) != length:
+                raise HttpParseError("Conflicting Content-Length")
+            length = int(value.group(1))
+        if length is not None:
+            if self.max_body_size is not None and length > self.max_body_size:
+                raise HttpParseError("Request body too large", 413)
+            self.content_length = length
+
+        # Bodies are framed by Content-Length only. A chunked body would be
+        # read as the next request on the connection, so it is refused.
+        if _TRANSFER_ENCODING.search(buf, line_end, end + 2):
+            if length is not None:
+                raise HttpParseError("Both Content-Length and Transfer-Encoding")
+            raise HttpParseError("Transfer-Encoding not supported", 501)
+
+    @property
+    def headers(self):
+        """
+        Request headers, decoded from the header block on first access.
+
+        The block is decoded once as latin-1 (RFC 9110 field values are
+        opaque octets) and split; requests whose handlers never look at
+        their headers never pay for it.
+
+        :rtype CaseInsensitiveDict: header names as sent, matched case-insensitively.
+        """
+        headers = self._headers
+        if headers is None:
+            headers = self._headers = CaseInsensitiveDict()
+            if self.body_start is not None:
+                block = self._buf[self._line_end + 2:self.body_start - 4]
+                store = headers.store
+                for line in bytes(block).decode("latin-1").split("\r\n"):
+                    name, sep, value = line.partition(":")
+                    if sep and name:
+                        name = name.strip()
+                        lower = name.lower()
+                        if lower in store:
+                            headers.add(name, value.strip())
+                        else:
+                            # Each name is normalized once, straight into the store.
+                            store[lower] = (name, value.strip())
+        return headers
+
+    @property
+    def body_view(self):
+        """
+        Zero-copy view of the request body.
+
+        A request without ``Content-Length`` has no body (RFC 9112 6.3);
+        whatever follows its header block belongs to the next request.
+
+        :rtype memoryview: body bytes received so far (bounded by Content-Length).
+        """
+        if self.body_start is None:
+            return memoryview(b"")
+        end = min(len(self._buf), self.body_start + (self.content_length or 0))
+        return memoryview(self._buf)[self.body_start:end]
+
+    @property
+    def surplus(self):
+        """
+        Bytes received past the end of a complete request: the start of the
+        next request pipelined on the same connection.
+
+        :rtype bytes: surplus bytes, empty if none or the request is incomplete.
+        """
+        if self._state != _DONE:
+            return b""
+        return bytes(self._buf[self.body_start + (self.content_length or 0):])
+
+    def header_bytes(self, name):
+        """
+        Raw value of the first ``name`` header, found with one scan of the
+        header block and without decoding it.
+
+        :param name (bytes): header name, matched case-insensitively.
+
+        :rtype bytes: the value without surrounding whitespace, or None.
+        """
+        if self.body_start is None:
+            return None
+        pattern = _HEADER_PATTERNS.get(name)
+        if pattern is None:
+            pattern = _HEADER_PATTERNS[name] = re.compile(
+                rb"\r\n" + re.escape(name) + rb"[ \t]*:([^\r]*)\r\n", re.IGNORECASE)
+        match = pattern.search(self._buf, self._line_end, self.body_start - 2)
+        return match.group(1).strip() if match else None
+
+    @property
+    def head_view(self):
+        """
+        Zero-copy view of the request line and header block, including the
+        blank line.
+
+        :rtype memoryview: raw head of the request.
+        """
+        return memoryview(self._buf)[:self.body_start if self.body_start is not None else 0]
+
+    @property
+    def head_bytes(self):
+        """
+        The request line and header block, including the blank line.
+
+        :rtype bytes: raw head of the request.
+        """
+        return bytes(self._buf[:self.body_start if self.body_start is not None else self._pos])
+
+
+def parse_request(data):
+    """
+    Parse a complete request held in one buffer.
+
+    :param data (bytes or str): raw request.
+
+    :rtype HttpParser: the parser after consuming ``data``.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    parser = HttpParser()
+    parser.feed(data)
+    return parser
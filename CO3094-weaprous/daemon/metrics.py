@@ -0,0 +1,317 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.metrics
+~~~~~~~~~~~~~~~~~
+
+This module provides low-overhead instrumentation for the backend and proxy
+daemons: counters, gauges and latency histograms rendered in the Prometheus
+text exposition format.
+
+Every thread writes into its own shard, so the hot path never takes a lock.
+Shards are merged lazily when the metrics are collected (e.g. by a scrape of
+the ``/metrics`` endpoint), and shards of finished connection threads are
+folded into a retired accumulator so the shard list stays bounded.
+
+Usage::
+
+  >>> from daemon.metrics import METRICS
+  >>> METRICS.inc("weaprous_http_requests_total", (("route", "GET /"),))
+  >>> METRICS.observe("weaprous_http_request_duration_seconds",
+  ...                 (("route", "GET /"),), 0.004)
+  >>> print(METRICS.render())
+"""
+
+import bisect
+import socket
+import struct
+import sys
+import threading
+
+#: Upper bounds (seconds) of the latency histogram buckets.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+#: Content-Type of the Prometheus text exposition format.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HELP = {
+    "weaprous_http_requests_total": "HTTP requests handled by the backend.",
+    "weaprous_http_request_duration_seconds": "Backend request latency.",
+    "weaprous_http_bytes_received_total": "Bytes read from backend clients.",
+    "weaprous_http_bytes_sent_total": "Bytes written to backend clients.",
+    "weaprous_active_connections": "Client connections currently open.",
+    "weaprous_pending_connections": "Accepted connections not yet picked up by a worker.",
+    "weaprous_accept_queue_depth": "Connections waiting in the kernel accept queue.",
+    "weaprous_proxy_requests_total": "Requests forwarded by the proxy.",
+    "weaprous_proxy_request_duration_seconds": "Proxy request latency per upstream.",
+    "weaprous_proxy_bytes_received_total": "Bytes read from proxy clients.",
+    "weaprous_proxy_bytes_sent_total": "Bytes written to proxy clients.",
+}
+
+
+class _Shard(object):
+    """Per-thread counter and histogram storage."""
+
+    __slots__ = ("thread", "counters", "histograms")
+
+    def __init__(self, thread):
+        self.thread = thread
+        self.counters = {}
+        self.histograms = {}
+
+
+class MetricsRegistry(object):
+    """The :class:`MetricsRegistry <MetricsRegistry>` object, which collects
+    counters, gauges and histograms from many threads without locking on the
+    write path.
+
+    Metric identity is the pair ``(name, labels)`` where labels is a tuple of
+    ``(key, value)`` pairs. Gauges are counters that may go negative inside a
+    single shard (e.g. incremented by the accept thread and decremented by the
+    worker), only their merged sum is meaningful.
+
+    :attrs buckets (tuple): histogram bucket upper bounds in seconds.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []
+        self._retired = _Shard(None)
+        self._compact_at = 64
+        self._gauges = set()
+        self._callbacks = {}
+
+    # -------------------------------------------------------------
+    # Write path
+    # -------------------------------------------------------------
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            pass
+        shard = _Shard(threading.current_thread())
+        with self._lock:
+            if len(self._shards) >= self._compact_at:
+                self._compact()
+                self._compact_at = max(64, 2 * len(self._shards))
+            self._shards.append(shard)
+        self._local.shard = shard
+        return shard
+
+    def inc(self, name, labels=(), value=1):
+        """
+        Add ``value`` to a counter.
+
+        :param name (str): metric name.
+        :param labels (tuple): ``((key, value), ...)`` label pairs.
+        :param value (int): amount to add.
+        """
+        counters = self._shard().counters
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + value
+
+    def gauge_add(self, name, value, labels=()):
+        """
+        Move a gauge up or down by ``value``.
+
+        :param name (str): metric name.
+        :param value (int): signed delta.
+        :param labels (tuple): ``((key, value), ...)`` label pairs.
+        """
+        self._gauges.add(name)
+        self.inc(name, labels, value)
+
+    def observe(self, name, labels, seconds):
+        """
+        Record one latency sample into a histogram.
+
+        :param name (str): metric name.
+        :param labels (tuple): ``((key, value), ...)`` label pairs.
+        :param seconds (float): observed duration.
+        """
+        histograms = self._shard().histograms
+        key = (name, labels)
+        slots = histograms.get(key)
+        if slots is None:
+            # One slot per bucket, one for +Inf, then sum and count.
+            slots = histograms[key] = [0] * (len(self.buckets) + 3)
+        slots[bisect.bisect_left(self.buckets, seconds)] += 1
+        slots[-2] += seconds
+        slots[-1] += 1
+
+    def register_callback(self, name, func, labels=()):
+        """
+        Register a gauge sampled at collection time.
+
+        :param name (str): metric name.
+        :param func (callable): returns the current value or None to skip.
+        :param labels (tuple): ``((key, value), ...)`` label pairs.
+        """
+        with self._lock:
+            self._callbacks[(name, labels)] = func
+
+    # -------------------------------------------------------------
+    # Read path
+    # -------------------------------------------------------------
+    @staticmethod
+    def _merge(into, shard):
+        for key, value in list(shard.counters.items()):
+            into.counters[key] = into.counters.get(key, 0) + value
+        for key, slots in list(shard.histograms.items()):
+            dst = into.histograms.get(key)
+            if dst is None:
+                into.histograms[key] = list(slots)
+            else:
+                for i, value in enumerate(slots):
+                    dst[i] += value
+
+    def _compact(self):
+        """Fold shards of finished threads into the retired shard (lock held)."""
+        alive = []
+        for shard in self._shards:
+            if shard.thread.is_alive():
+                alive.append(shard)
+            else:
+                self._merge(self._retired, shard)
+        self._shards = alive
+
+    def collect(self):
+        """
+        Merge all shards into one snapshot.
+
+        :rtype tuple: (counters dict, histograms dict, sampled gauges dict).
+        """
+        total = _Shard(None)
+        with self._lock:
+            self._compact()
+            self._merge(total, self._retired)
+            for shard in self._shards:
+                self._merge(total, shard)
+            callbacks = list(self._callbacks.items())
+
+        sampled = {}
+        for key, func in callbacks:
+            try:
+                value = func()
+            except Exception:
+                value = None
+            if value is not None:
+                sampled[key] = value
+        return total.counters, total.histograms, sampled
+
+    def render(self):
+        """
+        Render the current snapshot in the Prometheus text format.
+
+        :rtype str: exposition text.
+        """
+        counters, histograms, sampled = self.collect()
+        lines = []
+        seen = set()
+
+        def header(name, kind):
+            if name not in seen:
+                seen.add(name)
+                if name in HELP:
+                    lines.append("# HELP {} {}".format(name, HELP[name]))
+                lines.append("# TYPE {} {}".format(name, kind))
+
+        for (name, labels), value in sorted(counters.items()):
+            header(name, "gauge" if name in self._gauges else "counter")
+            lines.append("{}{} {}".format(name, _format_labels(labels), value))
+
+        for (name, labels), value in sorted(sampled.items()):
+            header(name, "gauge")
+            lines.append("{}{} {}".format(name, _format_labels(labels), value))
+
+        for (name, labels), slots in sorted(histograms.items()):
+            header(name, "histogram")
+            cumulative = 0
+            for bound, count in zip(self.buckets, slots):
+                cumulative += count
+                lines.append("{}_bucket{} {}".format(
+                    name, _format_labels(labels + (("le", repr(bound)),)), cumulative))
+            lines.append("{}_bucket{} {}".format(
+                name, _format_labels(labels + (("le", "+Inf"),)), slots[-1]))
+            lines.append("{}_sum{} {}".format(name, _format_labels(labels), slots[-2]))
+            lines.append("{}_count{} {}".format(name, _format_labels(labels), slots[-1]))
+
+        lines.append("")
+        return "\n".join(lines)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in labels) + "}"
+
+
+def status_of(http_response):
+    """
+    Extract the status code from a serialized HTTP response.
+
+    :param http_response (bytes): full response starting with the status line.
+
+    :rtype str: three digit status code, or "000" if it can not be read.
+    """
+    code = http_response[9:12]
+    return code.decode("latin-1") if code.isdigit() else "000"
+
+
+def accept_queue_depth(sock):
+    """
+    Read the number of connections queued on a listening socket.
+
+    On Linux, ``TCP_INFO`` of a listening socket reports the current accept
+    queue length in ``tcpi_unacked``. Other platforms return None.
+
+    :param sock (socket.socket): listening socket.
+
+    :rtype int or None: queued connections.
+    """
+    if not sys.platform.startswith("linux") or not hasattr(socket, "TCP_INFO"):
+        return None
+    info = sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_INFO, 32)
+    return struct.unpack_from("I", info, 24)[0]
+
+
+def metrics_route(path, registry=None):
+    """
+    Build a route handler that serves ``registry`` at ``path``.
+
+    The returned function carries the same route metadata that
+    :meth:`WeApRous.route <daemon.weaprous.WeApRous.route>` attaches, so it
+    can be dropped into any route table.
+
+    :param path (str): URL path of the endpoint, e.g. ``/metrics``.
+    :param registry (MetricsRegistry): defaults to the global :data:`METRICS`.
+
+    :rtype function: ``handler(headers, body)``.
+    """
+    registry = registry or METRICS
+
+    def metrics(headers, body):
+        return (200, {"Content-Type": CONTENT_TYPE}, registry.render())
+
+    metrics._route_path = path
+    metrics._route_methods = ["GET"]
+    return metrics
+
+
+#: Process wide registry shared by the backend and proxy daemons.
+METRICS = MetricsRegistry()
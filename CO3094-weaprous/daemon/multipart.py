@@ -0,0 +1,437 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.multipart
+~~~~~~~~~~~~~~~~~
+
+This module provides an incremental ``multipart/form-data`` parser
+(RFC 7578) for file uploads.
+
+The parser is fed the body as it arrives from the socket and never holds
+more than one chunk of it. Plain fields are collected as strings; file
+parts are written to a :class:`tempfile.SpooledTemporaryFile`, which stays
+in memory up to ``spool_threshold`` bytes and moves to disk beyond it.
+
+A handler receives the parsed form when it takes a ``request`` argument::
+
+  >>> @app.route("/upload", methods=["POST"])
+  >>> def upload(headers, body, request):
+  >>>     avatar = request.form.file("avatar")
+  >>>     avatar.save("db/avatars/" + request.form.get("user"))
+
+Sizes are bounded per body, per file, per field and in number of parts;
+an exceeded limit is answered with ``413``.
+"""
+
+import os
+import re
+import shutil
+import uuid
+from tempfile import SpooledTemporaryFile
+from urllib.parse import unquote
+
+from .httpparser import HttpParseError
+
+#: Upper bound of a whole multipart body.
+MAX_UPLOAD_SIZE = 256 * 1024 * 1024
+
+#: Upper bound of one file part.
+MAX_FILE_SIZE = 64 * 1024 * 1024
+
+#: Upper bound of one plain field, held in memory.
+MAX_FIELD_SIZE = 64 * 1024
+
+#: Upper bound of the header block of one part.
+MAX_PART_HEADER_SIZE = 8 * 1024
+
+#: Most parts in one body.
+MAX_PARTS = 128
+
+#: File parts larger than this are moved from memory to a temporary file.
+SPOOL_THRESHOLD = 1024 * 1024
+
+_BOUNDARY = re.compile(r'boundary=(?:"([^"]{1,70})"|([^\s;]{1,70}))', re.IGNORECASE)
+_PARAM = re.compile(r';\s*([\w*-]+)\s*=\s*(?:"([^"]*)"|([^;\s]*))')
+
+_PREAMBLE = 0
+_BOUNDARY_LINE = 1
+_PART_HEAD = 2
+_PART_BODY = 3
+_EPILOGUE = 4
+
+
+class MultipartError(HttpParseError):
+    """Raised on a malformed multipart body or an exceeded upload limit."""
+
+
+def is_multipart(content_type):
+    """
+    Whether a Content-Type value announces ``multipart/form-data``.
+
+    :param content_type (str or bytes): header value, or None.
+    """
+    if not content_type:
+        return False
+    if isinstance(content_type, bytes):
+        content_type = content_type.decode("latin-1")
+    return content_type.lstrip().lower().startswith("multipart/form-data")
+
+
+def parse_boundary(content_type):
+    """
+    The boundary of a ``multipart/form-data`` Content-Type value.
+
+    :rtype bytes: the boundary, without the leading dashes.
+
+    :raises MultipartError: if the value has no valid boundary.
+    """
+    if isinstance(content_type, bytes):
+        content_type = content_type.decode("latin-1")
+    match = _BOUNDARY.search(content_type or "")
+    if not match:
+        raise MultipartError("Multipart body without boundary")
+    return (match.group(1) or match.group(2)).encode("latin-1")
+
+
+def parse_disposition(value):
+    """
+    Split a part's Content-Disposition into its type and parameters.
+
+    ``filename*`` (RFC 5987) takes precedence over ``filename``.
+
+    :rtype tuple: (disposition type, dict of lower-cased parameters).
+    """
+    kind, _, rest = value.partition(";")
+    params = {}
+    for match in _PARAM.finditer(";" + rest):
+        name = match.group(1).lower()
+        # Browsers percent-encode quotes (RFC 7578 4.2) and send
+        # backslashes of Windows paths as they are, so nothing is unescaped.
+        params[name] = match.group(2) if match.group(2) is not None else match.group(3)
+    extended = params.pop("filename*", None)
+    if extended and "''" in extended:
+        charset, _, encoded = extended.partition("''")
+        try:
+            params["filename"] = unquote(encoded, encoding=charset or "utf-8")
+        except LookupError:
+            params["filename"] = unquote(encoded)
+    return kind.strip().lower(), params
+
+
+class UploadedFile(object):
+    """One file part of an upload, readable like a file.
+
+    :attrs name (str): form field name.
+    :attrs filename (str): client file name, without any directory.
+    :attrs content_type (str): declared media type of the file.
+    :attrs file (SpooledTemporaryFile): the content, rewound once complete.
+    :attrs size (int): content length in bytes.
+    """
+
+    __slots__ = ("name", "filename", "content_type", "file", "size")
+
+    def __init__(self, name, filename, content_type, spool_threshold=SPOOL_THRESHOLD):
+        self.name = name
+        # Browsers on Windows may send the full client path.
+        self.filename = filename.replace("\\", "/").rsplit("/", 1)[-1]
+        self.content_type = content_type
+        self.file = SpooledTemporaryFile(max_size=spool_threshold)
+        self.size = 0
+
+    def read(self, size=-1):
+        return self.file.read(size)
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        return self.file.seek(offset, whence)
+
+    def save(self, path):
+        """
+        Copy the content to ``path`` without loading it into memory.
+
+        :rtype int: bytes written.
+        """
+        self.file.seek(0)
+        with open(path, "wb") as out:
+            shutil.copyfileobj(self.file, out)
+        self.file.seek(0)
+        return self.size
+
+    def close(self):
+        """Release the content; a spooled temporary file is deleted."""
+        self.file.close()
+
+    def __repr__(self):
+        return "<UploadedFile {}={!r} ({} bytes)>".format(self.name, self.filename, self.size)
+
+
+class FormData(object):
+    """The fields and files of a submitted form.
+
+    A name may repeat; :meth:`get` and :meth:`file` return its first value.
+
+    :attrs fields (dict): field name to list of str values.
+    :attrs files (dict): field name to list of :class:`UploadedFile`.
+    """
+
+    __slots__ = ("fields", "files")
+
+    def __init__(self):
+        self.fields = {}
+        self.files = {}
+
+    def get(self, name, default=None):
+        values = self.fields.get(name)
+        return values[0] if values else default
+
+    def getlist(self, name):
+        return list(self.fields.get(name, ()))
+
+    def file(self, name):
+        files = self.files.get(name)
+        return files[0] if files else None
+
+    def __contains__(self, name):
+        return name in self.fields or name in self.files
+
+    def close(self):
+        """Release every uploaded file."""
+        for files in self.files.values():
+            for upload in files:
+                upload.close()
+
+    def __repr__(self):
+        return "<FormData fields={} files={}>".format(list(self.fields), list(self.files))
+
+
+class MultipartParser(object):
+    """The :class:`MultipartParser <MultipartParser>` object, which parses a
+    ``multipart/form-data`` body fed in chunks.
+
+    :attrs form (FormData): parts completed so far.
+    :attrs received (int): body bytes fed so far.
+    """
+
+    def __init__(self, boundary, max_size=MAX_UPLOAD_SIZE, max_file_size=MAX_FILE_SIZE,
+                 max_field_size=MAX_FIELD_SIZE, max_parts=MAX_PARTS,
+                 spool_threshold=SPOOL_THRESHOLD):
+        self.max_size = max_size
+        self.max_file_size = max_file_size
+        self.max_field_size = max_field_size
+        self.max_parts = max_parts
+        self.spool_threshold = spool_threshold
+        self.form = FormData()
+        self.received = 0
+        # Every delimiter follows a CRLF (RFC 2046 5.1.1); the first one
+        # is given one so that all of them are found the same way.
+        self._delimiter = b"\r\n--" + boundary
+        self._buf = bytearray(b"\r\n")
+        self._state = _PREAMBLE
+        self._parts = 0
+        self._name = None
+        self._field = None
+        self._charset = "utf-8"
+        self._upload = None
+
+    def feed(self, data):
+        """
+        Parse the next chunk of the body.
+
+        :param data (bytes-like): next chunk read from the socket.
+
+        :raises MultipartError: on a malformed body or an exceeded limit.
+        """
+        self.received += len(data)
+        if self.received > self.max_size:
+            raise MultipartError("Upload too large", 413)
+        if self._state == _EPILOGUE:
+            return
+
+        buf = self._buf
+        buf += data
+        delimiter = self._delimiter
+        pos = 0
+        while True:
+            state = self._state
+            if state == _PART_BODY:
+                end = buf.find(delimiter, pos)
+                if end < 0:
+                    # Keep what could be the start of a split delimiter.
+                    safe = len(buf) - len(delimiter) + 1
+                    if safe > pos:
+                        self._write(buf[pos:safe])
+                        pos = safe
+                    break
+                self._write(buf[pos:end])
+                self._finish_part()
+                pos = end + len(delimiter)
+                self._state = _BOUNDARY_LINE
+
+            elif state == _BOUNDARY_LINE:
+                if len(buf) - pos < 2:
+                    break
+                if buf.startswith(b"--", pos):
+                    self._state = _EPILOGUE
+                    pos = len(buf)
+                    break
+                eol = buf.find(b"\r\n", pos)
+                if eol < 0:
+                    if len(buf) - pos > 256:
+                        raise MultipartError("Malformed multipart boundary")
+                    break
+                # Only transport padding may follow a delimiter.
+                if buf[pos:eol].strip(b" \t"):
+                    raise MultipartError("Malformed multipart boundary")
+                pos = eol + 2
+                self._state = _PART_HEAD
+
+            elif state == _PART_HEAD:
+                if len(buf) - pos < 2:
+                    break
+                if buf.startswith(b"\r\n", pos):
+                    raise MultipartError("Multipart part without Content-Disposition")
+                end = buf.find(b"\r\n\r\n", pos)
+                if end < 0:
+                    if len(buf) - pos > MAX_PART_HEADER_SIZE:
+                        raise MultipartError("Multipart part header too large", 413)
+                    break
+                self._start_part(bytes(buf[pos:end]))
+                pos = end + 4
+                self._state = _PART_BODY
+
+            elif state == _PREAMBLE:
+                end = buf.find(delimiter, pos)
+                if end < 0:
+                    pos = max(pos, len(buf) - len(delimiter) + 1)
+                    break
+                pos = end + len(delimiter)
+                self._state = _BOUNDARY_LINE
+
+            else:
+                pos = len(buf)
+                break
+
+        del buf[:pos]
+
+    def _start_part(self, head):
+        self._parts += 1
+        if self._parts > self.max_parts:
+            raise MultipartError("Too many multipart parts", 413)
+
+        disposition = None
+        content_type = None
+        for line in head.decode("utf-8", "replace").split("\r\n"):
+            name, sep, value = line.partition(":")
+            name = name.strip().lower()
+            if name == "content-disposition":
+                disposition = value.strip()
+            elif name == "content-type":
+                content_type = value.strip()
+        if disposition is None:
+            raise MultipartError("Multipart part without Content-Disposition")
+        kind, params = parse_disposition(disposition)
+        if kind != "form-data" or "name" not in params:
+            raise MultipartError("Multipart part is not a named form-data part")
+
+        self._name = params["name"]
+        if "filename" in params:
+            self._upload = UploadedFile(self._name, params["filename"],
+                                        content_type or "application/octet-stream",
+                                        self.spool_threshold)
+        else:
+            self._field = bytearray()
+            params = parse_disposition(content_type)[1] if content_type else {}
+            self._charset = params.get("charset") or "utf-8"
+
+    def _write(self, data):
+        upload = self._upload
+        if upload is not None:
+            upload.size += len(data)
+            if upload.size > self.max_file_size:
+                raise MultipartError("Uploaded file too large", 413)
+            upload.file.write(data)
+        else:
+            field = self._field
+            if len(field) + len(data) > self.max_field_size:
+                raise MultipartError("Form field too large", 413)
+            field += data
+
+    def _finish_part(self):
+        upload = self._upload
+        if upload is not None:
+            upload.file.seek(0)
+            self.form.files.setdefault(self._name, []).append(upload)
+            self._upload = None
+        else:
+            try:
+                value = self._field.decode(self._charset, "replace")
+            except LookupError:
+                value = self._field.decode("utf-8", "replace")
+            self.form.fields.setdefault(self._name, []).append(value)
+            self._field = None
+
+    def close(self):
+        """
+        End the body.
+
+        :rtype FormData: the parsed form.
+
+        :raises MultipartError: if the closing delimiter never arrived.
+        """
+        if self._state != _EPILOGUE:
+            raise MultipartError("Multipart body truncated")
+        return self.form
+
+    def abort(self):
+        """Release every file of a body that will not be used."""
+        if self._upload is not None:
+            self._upload.close()
+            self._upload = None
+        self.form.close()
+
+
+def encode_multipart(fields=None, files=None):
+    """
+    Build a ``multipart/form-data`` body.
+
+    :param fields (dict): field name to str value.
+    :param files (dict): field name to ``(filename, content)`` or
+        ``(filename, content, content_type)``, where ``content`` is bytes
+        or a binary file object.
+
+    :rtype tuple: (body bytes, Content-Type value).
+    """
+    boundary = uuid.uuid4().hex
+    pieces = []
+    for name, value in (fields or {}).items():
+        pieces.append('--{}\r\nContent-Disposition: form-data; name="{}"\r\n\r\n'.format(
+            boundary, _quote(name)).encode("utf-8"))
+        pieces.append(str(value).encode("utf-8"))
+        pieces.append(b"\r\n")
+    for name, spec in (files or {}).items():
+        filename, content = spec[0], spec[1]
+        content_type = spec[2] if len(spec) > 2 else "application/octet-stream"
+        if hasattr(content, "read"):
+            content = content.read()
+        pieces.append((
+            '--{}\r\nContent-Disposition: form-data; name="{}"; filename="{}"\r\n'
+            'Content-Type: {}\r\n\r\n').format(
+                boundary, _quote(name), _quote(filename), content_type).encode("utf-8"))
+        pieces.append(content)
+        pieces.append(b"\r\n")
+    pieces.append("--{}--\r\n".format(boundary).encode("ascii"))
+    return b"".join(pieces), "multipart/form-data; boundary=" + boundary
+
+
+def _quote(value):
+    # RFC 7578 4.2: quotes and line breaks are percent-encoded in names.
+    return value.replace('"', "%22").replace("\r", "%0D").replace("\n", "%0A")
@@ -0,0 +1,187 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.offload
+~~~~~~~~~~~~~~~~~
+
+This module runs CPU-bound route handlers in a pool of worker processes.
+
+Routes registered with ``executor="process"`` are not called in the
+connection thread. Their request is packed into a :data:`RequestEnvelope`
+(method, path, header pairs, body bytes) and sent to a
+:class:`ProcessPoolExecutor`; the connection thread waits for the result
+without holding the GIL, so the other routes keep running.
+
+- Workers are started and warmed when the app starts, before the first
+  request pays for a process spawn.
+- At most ``max_pending`` requests are queued or running; beyond that a
+  request waits up to ``queue_timeout`` seconds and is then answered with
+  ``503 Service Unavailable``.
+- A crashed worker breaks the pool; it is replaced on the next request.
+
+Handlers and their results cross a process boundary, so handlers must be
+module-level functions and return picklable values. Generators are drained
+in the worker and come back as a list of pieces.
+
+Usage::
+
+  >>> def primes(headers, body):
+  >>>     return {'count': count_primes(int(body or 100000))}
+  >>> app.route('/primes', methods=['POST'], executor='process')(primes)
+"""
+
+import os
+import pickle
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from .dictionary import CaseInsensitiveDict
+from .streaming import StreamingBody, is_stream
+
+#: Picklable request handed to a worker process.
+RequestEnvelope = namedtuple("RequestEnvelope", "method path headers body")
+
+#: Values accepted by ``@app.route(..., executor=...)``.
+EXECUTORS = (None, "thread", "process")
+
+
+class OffloadRejected(Exception):
+    """Raised when the pool already holds ``max_pending`` requests."""
+
+
+def check_picklable(func):
+    """
+    Make sure a handler can be sent to a worker process.
+
+    :raises ValueError: for closures, lambdas and other unpicklable handlers.
+    """
+    try:
+        pickle.dumps(func)
+    except (pickle.PicklingError, AttributeError, TypeError) as e:
+        raise ValueError(
+            "Process routes need a module-level handler, got {!r}: {}".format(func, e))
+
+
+def _warm(_=None):
+    return os.getpid()
+
+
+def _run(func, envelope):
+    """Worker side: rebuild the request, call the handler, make the result picklable."""
+    headers = CaseInsensitiveDict()
+    for name, value in envelope.headers:
+        headers.add(name, value)
+    result = func(headers=headers, body=envelope.body)
+
+    if result.__class__ is StreamingBody:
+        return StreamingBody(list(result.iterable), result.content_type)
+    if isinstance(result, tuple) and len(result) >= 3 and is_stream(result[2]):
+        return result[:2] + (list(result[2]),) + result[3:]
+    if is_stream(result):
+        return list(result)
+    return result
+
+
+class ProcessOffload(object):
+    """The :class:`ProcessOffload <ProcessOffload>` object, which owns the
+    worker processes of an app's ``executor="process"`` routes.
+
+    :attrs max_workers (int): worker processes, ``os.cpu_count()`` by default.
+    :attrs max_pending (int): queued plus running requests allowed at once.
+    :attrs queue_timeout (float): seconds a request waits for a pending slot.
+    """
+
+    def __init__(self, max_workers=None, max_pending=None, queue_timeout=1.0):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.max_workers * 4
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """
+        Create the pool and spawn every worker now.
+
+        :rtype ProcessPoolExecutor: the running pool.
+        """
+        with self._lock:
+            if self._pool is None:
+                pool = ProcessPoolExecutor(max_workers=self.max_workers)
+                try:
+                    pids = set(pool.map(_warm, range(self.max_workers * 2)))
+                except BaseException:
+                    # A worker died while warming up: the next call starts over.
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    raise
+                self._pool = pool
+                print("[Offload] {} worker processes ready".format(len(pids)))
+            return self._pool
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def call(self, func, req, timeout=None):
+        """
+        Run ``func`` for ``req`` in a worker and wait for its result.
+
+        :param func: module-level route handler.
+        :param req (Request): prepared request.
+        :param timeout (float, optional): seconds to wait for the result.
+
+        :rtype object: the handler result.
+
+        :raises OffloadRejected: if no pending slot freed up in time.
+        :raises concurrent.futures.TimeoutError: if the result is late.
+        """
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise OffloadRejected("Process pool is full")
+
+        envelope = RequestEnvelope(req.method, req.path,
+                                   list(req.headers.multi_items()), req.body)
+        pool = self._pool
+        try:
+            if pool is None:
+                pool = self.start()
+            future = pool.submit(_run, func, envelope)
+        except BrokenProcessPool:
+            if pool is not None:
+                self._replace(pool)
+            self._slots.release()
+            raise
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            return future.result(timeout)
+        except BrokenProcessPool:
+            self._replace(pool)
+            raise
+        except FutureTimeoutError:
+            future.cancel()
+            raise
+
+    def _replace(self, broken):
+        with self._lock:
+            if self._pool is broken:
+                print("[Offload] Worker pool broken, replacing it")
+                self._pool = None
+        broken.shutdown(wait=False, cancel_futures=True)
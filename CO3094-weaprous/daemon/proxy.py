@@ -12,13 +12,31 @@ daemon.proxy
 
 Implements a simple multi-threaded HTTP proxy server.
 It routes requests to backend daemons based on hostname mappings.
+
+Requests are relayed as the bytes the client sent: only the header block
+is parsed, ``X-Forwarded-*`` headers are inserted before its blank line,
+and a body that has not fully arrived is copied to the backend as it
+comes in.
+
+A WebSocket upgrade is passed to the backend the same way; once sent, the
+client and backend sockets are spliced together until either side closes.
 """
 
+import re
+import selectors
 import socket
 import threading
+import time
 from .response import *
 from .httpadapter import HttpAdapter
 from .dictionary import CaseInsensitiveDict
+from .metrics import METRICS, CONTENT_TYPE, accept_queue_depth, status_of
+from .httpparser import HttpParser, HttpParseError
+from .timeouts import (DEFAULT_TIMEOUTS, PendingBody, ReadTimeout, UpstreamTimeout,
+                       connect_upstream, read_request, recv_upstream)
+from .proxyconfig import HEALTH, ProxyConfig, StaticConfig
+from .coalesce import coalesce_key, is_shareable
+from .retry import BUDGET, HEDGEABLE, connect_balanced, hedged_exchange
 
 # ---------------------------------------------------------------------------
 #  DEFAULT ROUTING MAP
@@ -33,47 +51,190 @@ PROXY_PASS = {
 # ---------------------------------------------------------------------------
 #  FORWARD REQUEST TO BACKEND
 # ---------------------------------------------------------------------------
-def forward_request(host, port, request):
+def forward_request(host, port, request, timeouts=None, body=None, backend=None):
     """
     Forwards an HTTP request to a backend server and retrieves the response.
+
+    :param request (bytes): the request as received, head and body so far.
+    :param timeouts (Timeouts, optional): upstream connect and read timeouts;
+        a backend that is too slow is answered with 504.
+    :param body (PendingBody, optional): rest of the body, still on the
+        client socket; a client too slow to send it is answered with 408.
+    :param backend (socket.socket, optional): a connection to the backend
+        already opened by the caller.
     """
-    backend = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    upstream = f"{host}:{port}"
     try:
-        backend.connect((host, port))
-        backend.sendall(request.encode())
+        if backend is None:
+            try:
+                backend = connect_upstream(host, port, timeouts)
+            except OSError:
+                HEALTH.mark_failure(upstream)
+                raise
+            HEALTH.mark_success(upstream)
+        if request.__class__ is str:
+            request = request.encode()
+        backend.sendall(request)
+        if body is not None:
+            body.copy_to(backend)
+        return recv_upstream(backend, timeouts)
+
+    except (OSError, HttpParseError) as e:
+        return upstream_error(upstream, e)
 
-        response = b""
-        while True:
-            chunk = backend.recv(4096)
-            if not chunk:
-                break
-            response += chunk
+    finally:
+        if backend is not None:
+            backend.close()
 
-        backend.close()
-        return response
 
-    except socket.error as e:
-        print(f"[Proxy] Socket error forwarding to backend {host}:{port} → {e}")
-        return (
-            "HTTP/1.1 404 Not Found\r\n"
-            "Content-Type: text/plain\r\n"
-            "Content-Length: 13\r\n"
-            "Connection: close\r\n\r\n"
-            "404 Not Found"
-        ).encode("utf-8")
+def upstream_error(upstream, e):
+    """
+    The response sent to the client when forwarding failed with ``e``.
+    """
+    if isinstance(e, ReadTimeout):
+        print(f"[Proxy] Client too slow sending the body for {upstream} → {e}")
+        return serialize_response(408, body=b"Request Timeout", content_type="text/plain")
+
+    if isinstance(e, HttpParseError):
+        return serialize_response(e.status, body=str(e), content_type="text/plain")
+
+    if isinstance(e, (socket.timeout, UpstreamTimeout)):
+        print(f"[Proxy] Backend {upstream} timed out → {e}")
+        return serialize_response(504, body=b"Gateway Timeout", content_type="text/plain")
+
+    print(f"[Proxy] Socket error forwarding to backend {upstream} → {e}")
+    return serialize_response(404, body=b"404 Not Found", content_type="text/plain")
+
+
+def forward_balanced(hostname, balancer, policy, method, request, timeouts=None, body=None):
+    """
+    Forward a request to an upstream of a configured host, retrying other
+    upstreams on connect failure and hedging slow GETs per ``policy``.
+
+    :param balancer (Balancer): upstreams of the host.
+    :param policy (RetryPolicy): the host's retry and hedging settings.
+
+    :rtype tuple: (upstream label, raw response bytes).
+    """
+    BUDGET.deposit()
+
+    if policy.hedge_after is not None and body is None and method in HEDGEABLE \
+            and len(balancer.upstreams) > 1:
+        try:
+            return hedged_exchange(hostname, balancer, policy, request, timeouts, HEALTH)
+        except Exception as e:
+            return "none", upstream_error(hostname, e)
+
+    try:
+        upstream, backend = connect_balanced(hostname, balancer, policy, method, timeouts, HEALTH)
+    except OSError as e:
+        return "none", upstream_error(hostname, e)
+
+    print(f"[Proxy] Forwarding {hostname} → {upstream} ({balancer.policy})")
+    host, port = upstream.rsplit(":", 1)
+    return upstream, forward_request(host, int(port), request, timeouts, body, backend)
+
+
+# ---------------------------------------------------------------------------
+#  PROTOCOL UPGRADES
+# ---------------------------------------------------------------------------
+def is_upgrade(parser):
+    """Whether a request asks to switch to the WebSocket protocol."""
+    upgrade = parser.header_bytes(b"upgrade")
+    return upgrade is not None and b"websocket" in upgrade.lower()
+
+
+class Tunnel(object):
+    """An upgraded connection to a backend, relayed byte for byte.
+
+    :attrs backend (socket.socket): the backend connection, request sent.
+    :attrs upstream (str): ``"ip:port"`` of the backend.
+    """
+
+    def __init__(self, backend, upstream):
+        self.backend = backend
+        self.upstream = upstream
+
+    def relay(self, client, pending=b"", size=65536):
+        """
+        Copy bytes both ways until either side closes.
+
+        :param pending (bytes): client bytes read along with the request.
+        """
+        backend = self.backend
+        peers = {client: backend, backend: client}
+        selector = selectors.DefaultSelector()
+        METRICS.gauge_add("weaprous_proxy_open_tunnels", 1)
+        try:
+            if pending:
+                backend.sendall(pending)
+            selector.register(client, selectors.EVENT_READ)
+            selector.register(backend, selectors.EVENT_READ)
+            while True:
+                for key, _ in selector.select():
+                    data = key.fileobj.recv(size)
+                    if not data:
+                        return
+                    # A slow reader blocks this copy, which pushes back on the sender.
+                    peers[key.fileobj].sendall(data)
+        except OSError as e:
+            print(f"[Proxy] Tunnel to {self.upstream} closed: {e}")
+        finally:
+            selector.close()
+            backend.close()
+            METRICS.gauge_add("weaprous_proxy_open_tunnels", -1)
+
+
+def open_tunnel(hostname, parser, addr, routes, snapshot, timeouts):
+    """
+    Send an upgrade request to the backend of ``hostname``.
+
+    :rtype tuple: (upstream label, :class:`Tunnel`), or (upstream label,
+        raw error response) if no backend could be reached.
+    """
+    balancer = snapshot.balancers.get(hostname) if snapshot is not None else None
+    try:
+        if balancer is not None:
+            upstream, backend = connect_balanced(
+                hostname, balancer, snapshot.retry_policy(hostname), parser.method,
+                timeouts, HEALTH)
+        else:
+            host, port = resolve_routing_policy(hostname, routes)
+            upstream = f"{host}:{port}"
+            backend = connect_upstream(host, int(port), timeouts)
+    except (OSError, ValueError) as e:
+        return "none", upstream_error(hostname, e)
+
+    try:
+        backend.sendall(forwarded_request(parser, addr, upgrade=True))
+    except OSError as e:
+        backend.close()
+        return upstream, upstream_error(upstream, e)
+    print(f"[Proxy] Tunnelling {hostname} upgrade → {upstream}")
+    return upstream, Tunnel(backend, upstream)
 
 
 # ---------------------------------------------------------------------------
 #  ROUTING POLICY RESOLVER
 # ---------------------------------------------------------------------------
-def resolve_routing_policy(hostname, routes):
+def resolve_routing_policy(hostname, routes, balancers=None):
     """
     Resolve hostname → backend IP:port mapping.
     Supports basic error handling and can be extended with load balancing.
+
+    :param balancers (dict, optional): host -> :class:`Balancer` of the
+        current config; a host with a balancer gets round-robin over its
+        healthy upstreams.
     """
 
     print(f"[Proxy] Resolving routing for host: {hostname}")
 
+    balancer = balancers.get(hostname) if balancers else None
+    if balancer is not None:
+        proxy_host, proxy_port = balancer.choose().rsplit(":", 1)
+        print(f"[Proxy] Balanced {hostname} → {proxy_host}:{proxy_port} ({balancer.policy})")
+        return proxy_host, proxy_port
+
     # Tìm trong routes, nếu không có thì trả về default 127.0.0.1:9000
     proxy_map, policy = routes.get(hostname, ("127.0.0.1:9000", "round-robin"))
     print(f"[Proxy] Mapping: {proxy_map}, Policy: {policy}")
@@ -108,117 +269,396 @@ def resolve_routing_policy(hostname, routes):
     return proxy_host, proxy_port
 
 
+# ---------------------------------------------------------------------------
+#  CLIENT KEEP-ALIVE
+# ---------------------------------------------------------------------------
+def wants_keepalive(parser):
+    """
+    Whether the client asked to keep its connection open after this request.
+
+    HTTP/1.1 connections persist unless ``Connection: close``; HTTP/1.0
+    ones only with ``Connection: keep-alive``.
+    """
+    connection = (parser.header_bytes(b"connection") or b"").lower()
+    if parser.version == "HTTP/1.1":
+        return b"close" not in connection
+    return parser.version == "HTTP/1.0" and b"keep-alive" in connection
+
+
+def frame_response(response, method, keep_alive):
+    """
+    Fix up the hop-by-hop headers of a response before relaying it.
+
+    The backend's ``Connection`` header is replaced by the proxy's own
+    decision. A backend response is read until the backend closes, so it is
+    always complete; one without ``Content-Length`` or chunked framing gets
+    a ``Content-Length`` so the client can find where it ends.
+
+    :param response (bytes): complete raw response.
+    :param method (str): request method; a ``HEAD`` response has no body.
+    :param keep_alive (bool): whether the client connection stays open.
+
+    :rtype tuple: (bytes to send, whether the connection stays open).
+    """
+    end = response.find(b"\r\n\r\n")
+    if end < 0 or not response.startswith(b"HTTP/1."):
+        return response, False
+
+    lines = response[:end].split(b"\r\n")
+    status = lines[0].split(b" ", 2)[1] if lines[0].count(b" ") else b""
+    kept = [lines[0]]
+    framed = method == "HEAD" or status[:1] == b"1" or status in (b"204", b"304")
+    for line in lines[1:]:
+        name = line.split(b":", 1)[0].strip().lower()
+        if name in (b"connection", b"keep-alive"):
+            continue
+        if name in (b"content-length", b"transfer-encoding"):
+            framed = True
+        kept.append(line)
+
+    if keep_alive and not framed:
+        kept.append(b"Content-Length: %d" % (len(response) - end - 4))
+    kept.append(b"Connection: keep-alive" if keep_alive else b"Connection: close")
+    kept.append(b"")
+    kept.append(response[end + 4:])
+    return b"\r\n".join(kept), keep_alive
+
+
 # ---------------------------------------------------------------------------
 #  CLIENT HANDLER
 # ---------------------------------------------------------------------------
-def handle_client(ip, port, conn, addr, routes):
+def handle_client(ip, port, conn, addr, routes, metrics_path=None, admission=None,
+                  timeouts=None, limiter=None, config=None, keepalive_requests=100,
+                  coalesce=None):
     """
     Handles one client connection:
-      - parse HTTP request
-      - determine target backend via Host header
-      - forward request and relay response
+      - parse HTTP requests, one after the other (keep-alive, pipelining)
+      - determine target backend via Host header, per request
+      - forward each request and relay the responses in order
+
+    The connection stays open while the client allows it, until
+    ``keepalive_requests`` requests were served or the client idles longer
+    than ``timeouts.keepalive`` between two requests.
+
+    :param metrics_path (str, optional): path answered locally with the
+        proxy's Prometheus metrics instead of being forwarded.
+    :param admission (AdmissionController, optional): in-flight request cap.
+    :param timeouts (Timeouts, optional): client read and upstream timeouts.
+    :param limiter (RateLimiter, optional): per-IP and per-host rate limits.
+    :param config (ConfigReloader, optional): live config; its current
+        snapshot replaces ``routes`` and ``limiter`` for each request.
+    :param keepalive_requests (int): requests served on one connection
+        before it is closed; 1 disables keep-alive.
+    :param coalesce (SingleFlight, optional): collapses concurrent identical
+        cacheable GETs into one upstream fetch.
     """
 
+    METRICS.gauge_add("weaprous_pending_connections", -1)
+    METRICS.gauge_add("weaprous_active_connections", 1)
+    timeouts = timeouts or DEFAULT_TIMEOUTS
+    served = 0
+    pending = b""
+
     try:
-        request = conn.recv(4096).decode(errors="ignore")
-        if not request:
-            conn.close()
-            return
-
-        # Extract hostname
-        hostname = None
-        for line in request.splitlines():
-            if line.lower().startswith("host:"):
-                hostname = line.split(":", 1)[1].strip().split(":")[0]
-
-                break
-
-        if not hostname:
-            print(f"[Proxy] No Host header found from {addr}, sending 400")
-            response = (
-                "HTTP/1.1 400 Bad Request\r\n"
-                "Content-Type: text/plain\r\n"
-                "Content-Length: 11\r\n"
-                "Connection: close\r\n\r\n"
-                "Bad Request"
-            ).encode("utf-8")
+        while True:
+            parser = HttpParser()
+            started = time.perf_counter()
+            try:
+                if not read_request(conn, parser, timeouts, pending=pending,
+                                    wait=timeouts.keepalive if served else None,
+                                    head_only=True):
+                    return
+            except HttpParseError as e:
+                # The end of a broken request is unknown: answer and close.
+                response = serialize_response(e.status, body=str(e), content_type="text/plain")
+                conn.sendall(response)
+                record_metrics(None, "none", parser.received, response, started)
+                return
+            served += 1
+            pending = parser.surplus
+            keep_alive = served < keepalive_requests and wants_keepalive(parser)
+            received = parser.body_start + (parser.content_length or 0)
+            remaining = received - parser.body_start - len(parser.body_view)
+            body = PendingBody(conn, remaining, timeouts) if remaining else None
+
+            if config is not None:
+                # One snapshot per request: a reload never changes it midway,
+                # and the next request on this connection sees the new routes.
+                snapshot = config.current
+                routes, limiter = snapshot.routes, snapshot.limiter
+            else:
+                snapshot = None
+
+            if admission is not None and not admission.acquire():
+                admission.reject(conn)
+                return
+            try:
+                hostname, upstream, response = serve_request(
+                    port, addr, parser, body, routes, limiter, snapshot, metrics_path, timeouts,
+                    coalesce)
+            except Exception as e:
+                print(f"[Proxy] Error handling client {addr}: {e}")
+                response = serialize_response(500, body=f"Proxy error: {e}", content_type="text/plain")
+                conn.sendall(response)
+                record_metrics(None, "none", received, response, started)
+                return
+            finally:
+                if admission is not None:
+                    admission.release()
+
+            if response.__class__ is Tunnel:
+                METRICS.inc("weaprous_proxy_upgrades_total", (("host", hostname),))
+                response.relay(conn, pending)
+                return
+
+            if body is not None and body.remaining:
+                # Answered without reading the whole body: its end is lost.
+                keep_alive = False
+
+            # Relay back to client
+            response, keep_alive = frame_response(response, parser.method, keep_alive)
             conn.sendall(response)
-            conn.close()
-            return
-        
-        # --- BẮT ĐẦU CODE SỬA ĐỔI ---
-        #
-        # Logic "thông minh" để khớp Host
-        # Nếu không tìm thấy 'hostname' (ví dụ: 192.168.1.5) trong routes...
-        if hostname not in routes:
-            # ...hãy thử tạo một key mới bằng cách ghép hostname với port của proxy (port 8080)
-            full_host_key = f"{hostname}:{port}"
-            
-            # Nếu key mới này (ví dụ: 192.168.1.5:8080) tồn tại trong routes
-            if full_host_key in routes:
-                print(f"[Proxy] Host '{hostname}' not found, upgrading to full key '{full_host_key}'")
-                # Dùng key mới này để tra cứu
-                hostname = full_host_key
-        #
-        # --- KẾT THÚC CODE SỬA ĐỔI ---
-
-
-        print(f"[Proxy] {addr} requested Host: {hostname}")
-
-        # Resolve destination backend
-        # Bây giờ 'hostname' sẽ là '192.168.1.5:8080' (nếu key đó tồn tại)
-        resolved_host, resolved_port = resolve_routing_policy(hostname, routes)
-        try:
-            resolved_port = int(resolved_port)
-        except ValueError:
-            print(f"[Proxy] Invalid port value: {resolved_port}, fallback 9000")
-            resolved_port = 9000
-
-        # Forward to backend
-        print(f"[Proxy] Forwarding {hostname} → {resolved_host}:{resolved_port}")
-        response = forward_request(resolved_host, resolved_port, request)
-
-        # Relay back to client
-        conn.sendall(response)
-
-    except Exception as e:
-        print(f"[Proxy] Error handling client {addr}: {e}")
-        err_msg = f"Proxy error: {e}"
-        conn.sendall((
-            "HTTP/1.1 500 Internal Server Error\r\n"
-            "Content-Type: text/plain\r\n"
-            f"Content-Length: {len(err_msg)}\r\n"
-            "Connection: close\r\n\r\n"
-            f"{err_msg}"
-        ).encode("utf-8"))
+            record_metrics(hostname, upstream, received, response, started)
+            if not keep_alive:
+                return
+
+    except OSError as e:
+        print(f"[Proxy] Connection error with client {addr}: {e}")
 
     finally:
         conn.close()
+        METRICS.gauge_add("weaprous_active_connections", -1)
+        if admission is not None:
+            admission.release_connection()
+
+
+def serve_request(port, addr, parser, body, routes, limiter, snapshot, metrics_path, timeouts,
+                  coalesce=None):
+    """
+    Produce the response to one parsed client request.
+
+    :param parser (HttpParser): the request, parsed up to its header block.
+    :param body (PendingBody): the part of the body not received yet, or None.
+    :param snapshot (ProxyConfig): balancers and retry policies, or None.
+    :param coalesce (SingleFlight): shares fetches of identical GETs, or None.
+
+    :rtype tuple: (hostname, upstream label, raw response bytes), or a
+        :class:`Tunnel` instead of the response for a WebSocket upgrade.
+    """
+    if metrics_path and parser.method == "GET" and parser.target == metrics_path:
+        response = serialize_response(200, body=METRICS.render(), content_type=CONTENT_TYPE)
+        return None, "local", response
+
+    # Extract hostname: one scan of the raw header block, nothing decoded
+    hostname = parser.header_bytes(b"host")
+    if hostname:
+        hostname = hostname.decode("latin-1").split(":")[0]
+
+    if not hostname:
+        print(f"[Proxy] No Host header found from {addr}, sending 400")
+        response = serialize_response(400, body=b"Bad Request", content_type="text/plain")
+        return None, "none", response
+
+
+    # --- BẮT ĐẦU CODE SỬA ĐỔI ---
+    #
+    # Logic "thông minh" để khớp Host
+    # Nếu không tìm thấy 'hostname' (ví dụ: 192.168.1.5) trong routes...
+    if hostname not in routes:
+        # ...hãy thử tạo một key mới bằng cách ghép hostname với port của proxy (port 8080)
+        full_host_key = f"{hostname}:{port}"
+        
+        # Nếu key mới này (ví dụ: 192.168.1.5:8080) tồn tại trong routes
+        if full_host_key in routes:
+            print(f"[Proxy] Host '{hostname}' not found, upgrading to full key '{full_host_key}'")
+            # Dùng key mới này để tra cứu
+            hostname = full_host_key
+    #
+    # --- KẾT THÚC CODE SỬA ĐỔI ---
+
+
+    print(f"[Proxy] {addr} requested Host: {hostname}")
+
+    # Per-IP / per-host token buckets: over the limit → 429, no backend hit
+    if limiter is not None:
+        scope, retry_after = limiter.check(hostname, addr[0])
+        if scope is not None:
+            print(f"[Proxy] Rate limited {addr[0]} on {hostname} ({scope})")
+            METRICS.inc("weaprous_proxy_rate_limited_total",
+                        (("host", hostname), ("scope", scope)))
+            response = serialize_response(
+                429, {"Retry-After": str(retry_after)},
+                body=b"Too Many Requests", content_type="text/plain")
+            return hostname, "limited", response
+
+    # WebSocket upgrades: the connection becomes a tunnel to the backend
+    if is_upgrade(parser):
+        upstream, response = open_tunnel(hostname, parser, addr, routes, snapshot, timeouts)
+        return hostname, upstream, response
+
+    # Identical cacheable GETs in flight share one upstream fetch
+    key = coalesce_key(hostname, parser, body) if coalesce is not None else None
+    if key is not None:
+        (upstream, response), shared = coalesce.run(
+            key, lambda: fetch_upstream(hostname, parser, addr, body, routes, snapshot, timeouts),
+            lambda result: is_shareable(result[1]), hostname)
+        if shared:
+            print(f"[Proxy] Coalesced {hostname} {parser.target} with an in-flight fetch")
+        return hostname, upstream, response
+
+    upstream, response = fetch_upstream(hostname, parser, addr, body, routes, snapshot, timeouts)
+    return hostname, upstream, response
+
+
+def fetch_upstream(hostname, parser, addr, body, routes, snapshot, timeouts):
+    """
+    Forward one request to the backend of ``hostname``.
+
+    :rtype tuple: (upstream label, raw response bytes).
+    """
+    request = forwarded_request(parser, addr)
+
+    # Configured host: balanced, with retries and hedging
+    balancer = snapshot.balancers.get(hostname) if snapshot is not None else None
+    if balancer is not None:
+        print(f"[Proxy] Resolving routing for host: {hostname}")
+        return forward_balanced(hostname, balancer, snapshot.retry_policy(hostname),
+                                parser.method, request, timeouts, body)
+
+    # Resolve destination backend
+    # Bây giờ 'hostname' sẽ là '192.168.1.5:8080' (nếu key đó tồn tại)
+    resolved_host, resolved_port = resolve_routing_policy(hostname, routes)
+    try:
+        resolved_port = int(resolved_port)
+    except ValueError:
+        print(f"[Proxy] Invalid port value: {resolved_port}, fallback 9000")
+        resolved_port = 9000
+
+    # Forward to backend
+    print(f"[Proxy] Forwarding {hostname} → {resolved_host}:{resolved_port}")
+    upstream = f"{resolved_host}:{resolved_port}"
+    response = forward_request(resolved_host, resolved_port, request, timeouts, body)
+    return upstream, response
+
+
+#: Hop-by-hop headers of the client connection, never sent upstream.
+_HOP_BY_HOP = re.compile(rb"\r\n(?:connection|keep-alive|proxy-connection)[ \t]*:", re.IGNORECASE)
+
+
+def strip_hop_by_hop(head, keep=()):
+    """
+    Remove the client's ``Connection``, ``Keep-Alive`` and
+    ``Proxy-Connection`` lines, and any header named in ``Connection``
+    (RFC 9110 7.6.1), from a request head.
+
+    :param head (bytes): request line and header lines, without the blank line.
+    :param keep (tuple): lowercase header names kept even if hop-by-hop.
+
+    :rtype bytes: the head without hop-by-hop header lines.
+    """
+    lines = head.split(b"\r\n")
+    drop = {b"connection", b"keep-alive", b"proxy-connection"}
+    for line in lines[1:]:
+        name, _, value = line.partition(b":")
+        if name.strip().lower() == b"connection":
+            drop.update(token.strip().lower() for token in value.split(b","))
+    drop.difference_update(keep)
+    kept = [lines[0]]
+    for line in lines[1:]:
+        if line.partition(b":")[0].strip().lower() not in drop:
+            kept.append(line)
+    return b"\r\n".join(kept) + b"\r\n"
+
+
+def forwarded_request(parser, addr, upgrade=False):
+    """
+    The client's request bytes with ``X-Forwarded-For``, ``X-Forwarded-Host``
+    and ``X-Forwarded-Proto`` inserted before the blank line.
+
+    The end-to-end header lines and body are passed through byte for byte.
+    The client's hop-by-hop headers are dropped and ``Connection: close`` is
+    sent instead, since the response is read until the backend closes. An
+    ``X-Forwarded-For`` already set by a proxy in front is kept; the new line
+    extends that list (RFC 9110 5.3).
+
+    :param upgrade (bool): keep ``Upgrade`` and send ``Connection: Upgrade``,
+        for a request that opens a tunnel.
+
+    :rtype bytes: request ready for the backend.
+    """
+    head = parser.head_view[:-2]
+    if _HOP_BY_HOP.search(head) is not None:
+        head = strip_hop_by_hop(bytes(head[:-2]), (b"upgrade",) if upgrade else ())
+    host = parser.header_bytes(b"host") or b""
+    forwarded = b"X-Forwarded-For: %s\r\nX-Forwarded-Host: %s\r\nX-Forwarded-Proto: http\r\n" % (
+        addr[0].encode("ascii"), host)
+    connection = b"Connection: Upgrade\r\n" if upgrade else b"Connection: close\r\n"
+    return b"".join((head, forwarded, connection, b"\r\n", parser.body_view))
+
+
+def record_metrics(hostname, upstream, received, response, started):
+    """
+    Record one proxied request into the shared metrics registry.
+
+    :param received (int): size of the client's request in bytes.
+    """
+    METRICS.inc("weaprous_proxy_requests_total",
+                (("host", hostname or "none"), ("upstream", upstream),
+                 ("status", status_of(response))))
+    METRICS.observe("weaprous_proxy_request_duration_seconds",
+                    (("upstream", upstream),), time.perf_counter() - started)
+    METRICS.inc("weaprous_proxy_bytes_received_total", value=received)
+    METRICS.inc("weaprous_proxy_bytes_sent_total", value=len(response))
 
 
 # ---------------------------------------------------------------------------
 #  MAIN PROXY SERVER
 # ---------------------------------------------------------------------------
-def run_proxy(ip, port, routes):
+def run_proxy(ip, port, routes, metrics_path=None, admission=None, timeouts=None,
+              limiter=None, config=None, keepalive_requests=100, coalesce=None):
     """
     Starts the proxy server and handles incoming client connections using threads.
+
+    :param admission (AdmissionController, optional): connection and
+        in-flight request caps. Unlimited when None.
+    :param timeouts (Timeouts, optional): client read and upstream timeouts.
+    :param limiter (RateLimiter, optional): per-IP and per-host rate limits.
+    :param config (ConfigReloader, optional): hot-reloaded config replacing
+        ``routes`` and ``limiter``.
+    :param keepalive_requests (int): requests served per client connection.
+    :param coalesce (SingleFlight, optional): request coalescing of GETs.
     """
 
+    if config is None:
+        config = StaticConfig(ProxyConfig.build(routes, limiter))
+    else:
+        config.start()
+
     proxy = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     proxy.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
 
     try:
         proxy.bind((ip, port))
         proxy.listen(50)
+        METRICS.register_callback("weaprous_accept_queue_depth",
+                                  lambda: accept_queue_depth(proxy))
         print(f"[Proxy] Listening on {ip}:{port}")
 
         while True:
             conn, addr = proxy.accept()
             print(f"[Proxy] Accepted connection from {addr}")
 
+            # Overloaded: answer 503 from the accept loop, no thread spawned
+            if admission is not None and not admission.admit_connection():
+                admission.reject(conn)
+                continue
+            METRICS.gauge_add("weaprous_pending_connections", 1)
+
             # ✅ Multi-thread handling for concurrent clients
             client_thread = threading.Thread(
-                target=handle_client, args=(ip, port, conn, addr, routes)
+                target=handle_client,
+                args=(ip, port, conn, addr, routes, metrics_path, admission,
+                      timeouts, limiter, config, keepalive_requests, coalesce)
             )
             client_thread.daemon = True
             client_thread.start()
@@ -233,8 +673,23 @@ def run_proxy(ip, port, routes):
 # ---------------------------------------------------------------------------
 #  ENTRY POINT
 # ---------------------------------------------------------------------------
-def create_proxy(ip, port, routes):
+def create_proxy(ip, port, routes, metrics_path=None, admission=None, timeouts=None,
+                 limiter=None, config=None, keepalive_requests=100, coalesce=None):
     """
     Entry point for launching the proxy server.
+
+    :param metrics_path (str, optional): serve Prometheus metrics at this path.
+    :param admission (AdmissionController, optional): connection and
+        in-flight request caps.
+    :param timeouts (Timeouts, optional): client read and upstream timeouts.
+    :param limiter (RateLimiter, optional): per-IP and per-host rate limits
+        from ``proxy.conf``.
+    :param config (ConfigReloader, optional): reload ``routes`` and
+        ``limiter`` on SIGHUP or when the config file changes.
+    :param keepalive_requests (int): requests served on one client
+        connection before it is closed; 1 disables keep-alive.
+    :param coalesce (SingleFlight, optional): share one upstream fetch among
+        concurrent identical cacheable GETs.
     """
-    run_proxy(ip, port, routes)
\ No newline at end of file
+    run_proxy(ip, port, routes, metrics_path, admission, timeouts, limiter, config,
+              keepalive_requests, coalesce)
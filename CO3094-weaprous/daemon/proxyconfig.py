@@ -0,0 +1,272 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.proxyconfig
+~~~~~~~~~~~~~~~~~
+
+This module provides the live configuration of the proxy and its hot reload.
+
+A :class:`ProxyConfig` is an immutable snapshot of the routes, rate limits,
+load balancers and retry policies. Each request reads :attr:`ConfigReloader.current`
+once and keeps that snapshot until it is done, so a reload never changes
+the routes under an in-flight request; the next request on a kept-alive
+connection picks up the new config.
+
+:class:`ConfigReloader` re-reads ``proxy.conf`` on ``SIGHUP`` or when the
+file's mtime changes. The file is parsed and validated in the reloader's
+own thread; a valid config replaces the snapshot in a single assignment,
+an invalid one is logged and the running config stays. Carried over:
+
+- the round-robin position of every host whose upstreams and policy did
+  not change;
+- the rate limit buckets;
+- the passive health of upstreams still present (see :data:`HEALTH`).
+"""
+
+import itertools
+import os
+import signal
+import threading
+import time
+
+from .retry import DEFAULT_POLICY
+
+
+# ---------------------------------------------------------------------------
+#  UPSTREAM HEALTH
+# ---------------------------------------------------------------------------
+class UpstreamHealth(object):
+    """Passive health of upstreams, learned from failed connections.
+
+    An upstream that failed is skipped by the balancers for ``cooldown``
+    seconds, unless every upstream of the host is down.
+
+    :attrs cooldown (float): seconds an upstream stays marked down.
+    """
+
+    def __init__(self, cooldown=5.0):
+        self.cooldown = cooldown
+        self._down_until = {}
+
+    def mark_failure(self, upstream):
+        self._down_until[upstream] = time.monotonic() + self.cooldown
+
+    def mark_success(self, upstream):
+        self._down_until.pop(upstream, None)
+
+    def is_up(self, upstream):
+        until = self._down_until.get(upstream)
+        return until is None or until <= time.monotonic()
+
+    def retain(self, upstreams):
+        """Forget upstreams that are no longer configured."""
+        for upstream in list(self._down_until):
+            if upstream not in upstreams:
+                self._down_until.pop(upstream, None)
+
+
+#: Health shared by every config snapshot of the process.
+HEALTH = UpstreamHealth()
+
+
+# ---------------------------------------------------------------------------
+#  BALANCERS
+# ---------------------------------------------------------------------------
+class Balancer(object):
+    """Picks an upstream of one host.
+
+    :attrs upstreams (tuple): ``"ip:port"`` strings.
+    :attrs policy (str): ``round-robin``, or anything else for first-healthy.
+    """
+
+    def __init__(self, upstreams, policy):
+        self.upstreams = tuple(upstreams)
+        self.policy = policy
+        self._counter = itertools.count()
+
+    def choose(self, health=HEALTH, exclude=()):
+        """
+        :param exclude (set): upstreams already tried for this request.
+
+        :rtype str: the chosen ``"ip:port"``.
+        """
+        upstreams = self.upstreams
+        n = len(upstreams)
+        start = next(self._counter) if self.policy == "round-robin" else 0
+        fallback = None
+        for i in range(n):
+            upstream = upstreams[(start + i) % n]
+            if upstream in exclude:
+                continue
+            if health.is_up(upstream):
+                return upstream
+            if fallback is None:
+                fallback = upstream
+        # Everything is marked down: try anyway rather than fail outright.
+        return fallback or upstreams[start % n]
+
+
+# ---------------------------------------------------------------------------
+#  CONFIG SNAPSHOT
+# ---------------------------------------------------------------------------
+class ProxyConfig(object):
+    """An immutable snapshot of the proxy configuration.
+
+    :attrs routes (dict): host -> (upstream or list of upstreams, policy).
+    :attrs limiter (RateLimiter): rate limits, or None.
+    :attrs balancers (dict): host -> :class:`Balancer`.
+    :attrs retries (dict): host -> :class:`~daemon.retry.RetryPolicy`.
+    """
+
+    __slots__ = ("routes", "limiter", "balancers", "retries", "loaded_at")
+
+    def __init__(self, routes, limiter=None, balancers=None, retries=None):
+        self.routes = routes
+        self.limiter = limiter
+        self.balancers = balancers or {}
+        self.retries = retries or {}
+        self.loaded_at = time.time()
+
+    @classmethod
+    def build(cls, routes, limiter=None, previous=None, retries=None):
+        """
+        Validate ``routes`` and build a snapshot, reusing state of ``previous``.
+
+        :raises ValueError: if an upstream is not ``ip:port`` with a valid port.
+        """
+        old = previous.balancers if previous is not None else {}
+        balancers = {}
+        for host, (proxy_map, policy) in routes.items():
+            upstreams = proxy_map if isinstance(proxy_map, list) else [proxy_map]
+            if not upstreams:
+                raise ValueError("Host {} has no proxy_pass".format(host))
+            for upstream in upstreams:
+                _, sep, port = upstream.rpartition(":")
+                if not sep or not port.isdigit() or not 0 < int(port) < 65536:
+                    raise ValueError("Host {}: invalid upstream {!r}".format(host, upstream))
+
+            balancer = old.get(host)
+            if balancer is None or balancer.upstreams != tuple(upstreams) \
+                    or balancer.policy != policy:
+                balancer = Balancer(upstreams, policy)
+            balancers[host] = balancer
+
+        if limiter is not None and previous is not None and previous.limiter is not None:
+            # Keep the buckets: a reload must not reset everyone's budget.
+            limiter.table = previous.limiter.table
+        return cls(routes, limiter, balancers, retries)
+
+    def retry_policy(self, host):
+        """
+        :rtype RetryPolicy: the host's policy, or the default one.
+        """
+        return self.retries.get(host, DEFAULT_POLICY)
+
+    def upstreams(self):
+        """
+        :rtype set: every configured ``"ip:port"``.
+        """
+        return {u for balancer in self.balancers.values() for u in balancer.upstreams}
+
+
+class StaticConfig(object):
+    """A config source that never changes."""
+
+    def __init__(self, config):
+        self.current = config
+
+
+# ---------------------------------------------------------------------------
+#  RELOADER
+# ---------------------------------------------------------------------------
+class ConfigReloader(object):
+    """The :class:`ConfigReloader <ConfigReloader>` object, which keeps
+    :attr:`current` in sync with the config file.
+
+    :attrs path (str): config file.
+    :attrs loader (callable): ``loader(path) -> (routes, limiter, retries)``.
+    :attrs check_interval (float): seconds between mtime checks.
+    :attrs current (ProxyConfig): the live snapshot.
+    """
+
+    def __init__(self, path, loader, check_interval=1.0):
+        self.path = path
+        self.loader = loader
+        self.check_interval = check_interval
+        self._wakeup = threading.Event()
+        self._mtime = None
+        routes, limiter, retries = self._load()
+        self.current = ProxyConfig.build(routes, limiter, retries=retries)
+
+    def _load(self, attempts=3):
+        """
+        Run the loader on a file that did not change while it was read.
+
+        The mtime is checked again after parsing; if the file was written in
+        the meantime the parse is repeated, so a config is never built from
+        an edit in progress.
+
+        :rtype tuple: (routes, limiter, retries) returned by the loader.
+
+        :raises ValueError: if the file kept changing.
+        """
+        for _ in range(attempts):
+            # Recorded first: a broken file is not parsed again until it changes.
+            self._mtime = os.stat(self.path).st_mtime_ns
+            loaded = self.loader(self.path)
+            if os.stat(self.path).st_mtime_ns == self._mtime:
+                return loaded
+            time.sleep(self.check_interval / 10)
+        raise ValueError("{} kept changing while it was read".format(self.path))
+
+    def reload(self):
+        """
+        Parse, validate and swap in the config file.
+
+        :rtype bool: True if a new config is live.
+        """
+        try:
+            routes, limiter, retries = self._load()
+            config = ProxyConfig.build(routes, limiter, previous=self.current, retries=retries)
+        except (OSError, ValueError) as e:
+            print("[Proxy] Config reload failed, keeping the running config: {}".format(e))
+            return False
+        HEALTH.retain(config.upstreams())
+        self.current = config
+        print("[Proxy] Config reloaded: {} hosts".format(len(config.routes)))
+        return True
+
+    def request_reload(self, *_):
+        """Ask the watcher thread to reload; safe to call from a signal handler."""
+        self._wakeup.set()
+
+    def start(self):
+        """
+        Start the watcher thread and, from the main thread, hook ``SIGHUP``.
+        """
+        if hasattr(signal, "SIGHUP") and threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGHUP, self.request_reload)
+        thread = threading.Thread(target=self._watch, name="weaprous-config")
+        thread.daemon = True
+        thread.start()
+
+    def _watch(self):
+        while True:
+            signalled = self._wakeup.wait(self.check_interval)
+            self._wakeup.clear()
+            try:
+                changed = os.stat(self.path).st_mtime_ns != self._mtime
+            except OSError:
+                changed = False
+            if signalled or changed:
+                self.reload()
@@ -0,0 +1,156 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.ratelimit
+~~~~~~~~~~~~~~~~~
+
+This module provides the token-bucket rate limits of the proxy.
+
+Limits are set per virtual host in ``proxy.conf``::
+
+  host "chatapp.local" {
+      proxy_pass http://192.168.1.8:9001;
+      limit_req_ip rate=20r/s burst=40;
+      limit_req_host rate=500r/s burst=1000;
+  }
+
+- ``limit_req_ip`` bounds each client address on that host.
+- ``limit_req_host`` bounds the host as a whole.
+
+A request over either limit is answered with ``429 Too Many Requests`` and
+a ``Retry-After`` header, and never reaches a backend.
+
+Buckets live in a :class:`BucketTable`. The table is split into stripes,
+each with its own lock, so concurrent clients rarely contend. Each stripe
+keeps its buckets in least-recently-used order: a bucket idle for longer
+than ``idle_ttl`` has refilled and is dropped, and a full stripe evicts its
+oldest bucket. Memory stays bounded however many addresses show up.
+"""
+
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+
+_RATE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*r/(s|m)\s*$")
+
+
+def parse_rate(text):
+    """
+    Parse an nginx style rate.
+
+    :param text (str): e.g. ``20r/s`` or ``600r/m``.
+
+    :rtype float: tokens per second.
+
+    :raises ValueError: on an unknown format.
+    """
+    match = _RATE.match(text)
+    if not match:
+        raise ValueError("Invalid rate: {!r}".format(text))
+    rate = float(match.group(1))
+    return rate if match.group(2) == "s" else rate / 60.0
+
+
+class BucketTable(object):
+    """The :class:`BucketTable <BucketTable>` object, a memory-bounded,
+    lock-striped map of token buckets.
+
+    :attrs stripes (int): number of independently locked stripes.
+    :attrs max_entries (int): bucket limit over all stripes.
+    :attrs idle_ttl (float): seconds after which an unused bucket is dropped.
+    """
+
+    def __init__(self, stripes=16, max_entries=65536, idle_ttl=60.0):
+        self.stripes = stripes
+        self.max_entries = max_entries
+        self.idle_ttl = idle_ttl
+        self._per_stripe = max(1, max_entries // stripes)
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self._buckets = [OrderedDict() for _ in range(stripes)]
+
+    def take(self, key, rate, burst, now=None):
+        """
+        Take one token from the bucket of ``key``.
+
+        :param rate (float): refill rate in tokens per second.
+        :param burst (float): bucket capacity.
+
+        :rtype float: 0 if allowed, otherwise seconds until a token is available.
+        """
+        now = time.monotonic() if now is None else now
+        index = hash(key) % self.stripes
+        buckets = self._buckets[index]
+        with self._locks[index]:
+            bucket = buckets.get(key)
+            if bucket is None:
+                self._evict(buckets, now)
+                bucket = buckets[key] = [burst, now]
+            else:
+                buckets.move_to_end(key)
+                bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+
+            if bucket[0] >= 1.0:
+                bucket[0] -= 1.0
+                return 0.0
+            return (1.0 - bucket[0]) / rate
+
+    def _evict(self, buckets, now):
+        # Oldest first: stop at the first bucket still in use.
+        while buckets:
+            key, bucket = next(iter(buckets.items()))
+            if now - bucket[1] < self.idle_ttl and len(buckets) < self._per_stripe:
+                break
+            del buckets[key]
+
+    def __len__(self):
+        return sum(len(buckets) for buckets in self._buckets)
+
+
+class RateLimiter(object):
+    """The :class:`RateLimiter <RateLimiter>` object, which applies the
+    per-IP and per-host limits of every virtual host.
+
+    :attrs limits (dict): host -> ``{"ip": (rate, burst), "host": (rate, burst)}``.
+    """
+
+    def __init__(self, limits, table=None):
+        self.limits = limits
+        self.table = table or BucketTable()
+
+    def check(self, host, client_ip):
+        """
+        Account one request of ``client_ip`` to ``host``.
+
+        :rtype tuple: (None, 0) if allowed, otherwise (scope, retry_after)
+            with scope ``"ip"`` or ``"host"`` and retry_after in whole seconds.
+        """
+        limit = self.limits.get(host)
+        if not limit:
+            return None, 0
+
+        ip_limit = limit.get("ip")
+        if ip_limit is not None:
+            wait = self.table.take(("ip", host, client_ip), *ip_limit)
+            if wait:
+                return "ip", max(1, math.ceil(wait))
+
+        host_limit = limit.get("host")
+        if host_limit is not None:
+            wait = self.table.take(("host", host), *host_limit)
+            if wait:
+                return "host", max(1, math.ceil(wait))
+
+        return None, 0
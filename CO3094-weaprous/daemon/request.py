@@ -12,77 +12,211 @@ daemon.request
 
 This module provides a Request object that parses raw HTTP messages received
 by the backend server. It extracts HTTP method, path, headers, cookies, and
-body, and binds routes registered by WeApRous.
+body, and binds routes registered by WeApRous. The byte-level parsing itself
+is done by :class:`HttpParser <daemon.httpparser.HttpParser>`.
 
 Authentication and session handling are delegated to the WebApp layer.
+
+Handlers that take a ``request`` argument are given the Request itself::
+
+  >>> @app.route("/login", methods=["POST"])
+  >>> def login(headers, body, request):
+  >>>     user = request.form.get("username")
+  >>>     session = request.cookies.get("sessionid")
+
+The query string (:attr:`Request.args`), form body (:attr:`Request.form`),
+cookies (:attr:`Request.cookies`) and JSON body (:attr:`Request.json`) are
+parsed from the raw buffers on first access and cached; a request that
+never reads them never parses them.
 """
 
 from .dictionary import CaseInsensitiveDict
+from .httpparser import HttpParser, HttpParseError, parse_request
+from .multipart import FormData, encode_multipart
+from urllib.parse import parse_qsl
 import base64
+import inspect
 import json
 
+#: Marks a cached attribute not computed yet, where None is a valid value.
+_UNSET = object()
+
+
+def takes_request(func):
+    """Whether a route handler declares a ``request`` parameter."""
+    try:
+        return "request" in inspect.signature(func).parameters
+    except (TypeError, ValueError):
+        return False
+
 
 class Request:
-    """A mutable Request object used to parse incoming HTTP requests."""
+    """A mutable Request object used to parse incoming HTTP requests.
+
+    Instances are slotted and allocate nothing up front; the header map,
+    query arguments, form, cookies and JSON body are taken from the parser,
+    or created, only when first accessed.
 
-    __attrs__ = [
+    :attrs path (str): request path, without the query string.
+    :attrs query (str): query string after ``?``, empty if none.
+    """
+
+    __slots__ = (
         "method",
         "path",
+        "query",
         "version",
-        "headers",
-        "cookies",
+        "_headers",
+        "_parser",
+        "_args",
+        "_cookies",
+        "_form",
+        "_json",
         "body",
+        "body_view",
         "routes",
-        "hook"
-    ]
+        "hook",
+        "auth_status",
+    )
 
     def __init__(self):
         self.method = None
         self.path = None
+        self.query = ""
         self.version = None
-        self.headers = None
-        self.cookies = {}
+        self._headers = None
+        self._parser = None
+        self._args = None
+        self._cookies = None
+        self._form = None
+        self._json = _UNSET
         self.body = b""
-        self.routes = {}
+        self.body_view = None
+        self.routes = None
         self.hook = None
+        self.auth_status = None
+
+    @property
+    def headers(self):
+        """Request headers (:class:`CaseInsensitiveDict`), built on first access."""
+        headers = self._headers
+        if headers is None:
+            if self._parser is not None:
+                headers = self._parser.headers
+            else:
+                headers = CaseInsensitiveDict()
+            self._headers = headers
+        return headers
+
+    @headers.setter
+    def headers(self, value):
+        self._headers = value
+
+    def _header(self, name):
+        # One header as str, read from the raw block when there is one
+        # so that the header map is not built for it.
+        if self._headers is None and self._parser is not None:
+            value = self._parser.header_bytes(name.encode("ascii"))
+            return value.decode("latin-1") if value is not None else ""
+        return self.headers.get(name, "")
+
+    @property
+    def args(self):
+        """Query string arguments (:class:`FormData`), parsed on first access."""
+        args = self._args
+        if args is None:
+            args = self._args = FormData()
+            fields = args.fields
+            for name, value in parse_qsl(self.query, keep_blank_values=True):
+                fields.setdefault(name, []).append(value)
+        return args
+
+    @property
+    def cookies(self):
+        """Request cookies (dict), parsed from the ``Cookie`` header on first access."""
+        cookies = self._cookies
+        if cookies is None:
+            cookies = self._cookies = self.parse_cookies()
+        return cookies
+
+    @cookies.setter
+    def cookies(self, value):
+        self._cookies = value
+
+    @property
+    def form(self):
+        """
+        Submitted form (:class:`FormData`), parsed on first access.
+
+        An ``application/x-www-form-urlencoded`` body is parsed from the
+        receive buffer. A ``multipart/form-data`` body is parsed while it
+        is received, and only for handlers that take the request (see
+        :mod:`daemon.multipart`). Any other body gives an empty form.
+        """
+        form = self._form
+        if form is None:
+            form = self._form = FormData()
+            content_type = self._header("content-type")
+            if content_type.lstrip().lower().startswith("application/x-www-form-urlencoded"):
+                fields = form.fields
+                for name, value in parse_qsl(self.body.decode("utf-8", "replace"),
+                                             keep_blank_values=True):
+                    fields.setdefault(name, []).append(value)
+        return form
+
+    @form.setter
+    def form(self, value):
+        self._form = value
+
+    @property
+    def json(self):
+        """
+        The body decoded as JSON on first access, None if it is empty.
+
+        The ``Content-Type`` is not checked; clients often omit it.
+
+        :raises ValueError: if the body is not valid JSON.
+        """
+        value = self._json
+        if value is _UNSET:
+            value = self._json = json.loads(self.body) if self.body else None
+        return value
 
     # -------------------------------------------------------------
     # Parse the request line
     # -------------------------------------------------------------
     def extract_request_line(self, raw):
+        """Return (method, path, version) of a raw request, or Nones.
+
+        The path is returned without its query string.
+        """
         try:
-            lines = raw.splitlines()
-            if not lines:
-                return None, None, None
-            first_line = lines[0].strip()
-            method, path, version = first_line.split()
-
-            # Mặc định truy cập "/" → chuyển sang index.html
-            if path == "/":
-                path = "/index.html"
-
-            return method.upper(), path, version
-        except Exception as e:
-            print(f"[Request] Error parsing request line: {e} (raw: '{raw[:50]}...')")
+            parser = raw if isinstance(raw, HttpParser) else parse_request(raw)
+        except HttpParseError as e:
+            print(f"[Request] Error parsing request line: {e}")
+            return None, None, None
+        if not parser.method:
             return None, None, None
 
+        path = parser.target.partition("?")[0]
+        # Mặc định truy cập "/" → chuyển sang index.html
+        if path == "/":
+            path = "/index.html"
+
+        return parser.method, path, parser.version
+
     # -------------------------------------------------------------
     # Parse headers
     # -------------------------------------------------------------
     def parse_headers(self, raw):
-        headers = CaseInsensitiveDict()
-        lines = raw.split("\r\n")
-        for line in lines[1:]:
-            if ": " in line:
-                key, val = line.split(": ", 1)
-                headers[key.lower()] = val.strip()
-        return headers
+        parser = raw if isinstance(raw, HttpParser) else parse_request(raw)
+        return parser.headers
 
     # -------------------------------------------------------------
     # Parse cookies
     # -------------------------------------------------------------
     def parse_cookies(self):
-        cookie_str = self.headers.get("cookie", "") or self.headers.get("Cookie", "")
+        cookie_str = self._header("cookie")
 
         cookies = {}
         if cookie_str:
@@ -100,24 +234,37 @@ class Request:
     # Prepare full request
     # -------------------------------------------------------------
     def prepare(self, raw, routes=None):
-        """Parse raw HTTP request text into structured Request object."""
+        """Parse a raw HTTP request into structured Request object.
+
+        :param raw (HttpParser, bytes or str): a fed :class:`HttpParser`, or
+            the raw request which is then parsed in one pass.
+        :param routes (dict): route table used to bind :attr:`hook`.
+        """
 
-        self.method, self.path, self.version = self.extract_request_line(raw)
+        try:
+            parser = raw if isinstance(raw, HttpParser) else parse_request(raw)
+        except HttpParseError as e:
+            print(f"[Request] Malformed request: {e}")
+            return self
+        self.method, self.path, self.version = self.extract_request_line(parser)
         if not self.method:
             print("[Request] Failed to parse request line, stopping prepare.")
             return self  # tránh lỗi
 
         print(f"[Request] {self.method} path={self.path} version={self.version}")
 
-        self.headers = self.parse_headers(raw)
-        self.cookies = self.parse_cookies()
-        print(f"[Request] Parsed cookies: {self.cookies}")
+        self._parser = parser
+        # Everything after "?"; parsed into :attr:`args` only if read.
+        self.query = parser.target.partition("?")[2]
+        self._args = self._cookies = self._form = None
+        self._json = _UNSET
 
         # -------------------------------------------------------------
-        # Parse body
+        # Body: a zero-copy view over the receive buffer, materialized
+        # once as bytes for the handlers.
         # -------------------------------------------------------------
-        if "\r\n\r\n" in raw:
-            self.body = raw.split("\r\n\r\n", 1)[1].encode("utf-8")
+        self.body_view = parser.body_view
+        self.body = self.body_view.tobytes()
 
         # -------------------------------------------------------------
         # Route binding
@@ -160,21 +307,34 @@ class Request:
         return self
 
 
+    # -------------------------------------------------------------
+    # Release uploaded files
+    # -------------------------------------------------------------
+    def close(self):
+        """Delete the temporary files of an uploaded form, once answered."""
+        if self._form is not None:
+            self._form.close()
+            self._form = None
+
     # -------------------------------------------------------------
     # Helper: Prepare body for outgoing requests (optional)
     # -------------------------------------------------------------
     def prepare_body(self, data=None, files=None, json_data=None):
-        """Builds the HTTP body for outgoing POST/PUT requests."""
+        """Builds the HTTP body for outgoing POST/PUT requests.
+
+        :param data (dict): form fields, sent along with ``files`` if given.
+        :param files (dict): field name to ``(filename, content)`` or
+            ``(filename, content, content_type)``, sent as ``multipart/form-data``.
+        """
         if json_data:
             self.body = json.dumps(json_data).encode("utf-8")
             self.headers["content-type"] = "application/json"
+        elif files:
+            self.body, self.headers["content-type"] = encode_multipart(data, files)
         elif data:
             from urllib.parse import urlencode
             self.body = urlencode(data).encode("utf-8")
             self.headers["content-type"] = "application/x-www-form-urlencoded"
-        elif files:
-            self.body = b"File upload not supported"
-            self.headers["content-type"] = "multipart/form-data"
 
         self.headers["content-length"] = str(len(self.body or b""))
         return self
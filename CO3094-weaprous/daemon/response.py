@@ -18,15 +18,185 @@ This module provides a :class: `Response <Response>` object to manage and persis
 response settings (cookies, auth, proxies), and to construct HTTP responses
 based on incoming requests. 
 
-The current version supports MIME type detection, content loading and header formatting
+The current version supports MIME type detection, content loading and header formatting.
+
+It also provides the response serializer shared by the backend and proxy:
+:func:`serialize_response` writes the status line from a precomputed table,
+a ``Date`` header cached per second, the caller's headers and the body into
+one ``b"".join``.
 """
-import datetime
 import os
+import time
 import mimetypes
+from email.utils import formatdate
+from http import HTTPStatus
 from .dictionary import CaseInsensitiveDict
 
 BASE_DIR = ""
 
+#: Encoded ``HTTP/1.1 <code> <reason>\r\n`` status lines for every known status.
+STATUS_LINES = {
+    status.value: "HTTP/1.1 {} {}\r\n".format(status.value, status.phrase).encode("latin-1")
+    for status in HTTPStatus
+}
+
+#: Constant header block closing every response.
+CLOSE_TAIL = b"Connection: close\r\n\r\n"
+
+#: Constant header block closing a chunked streaming response.
+CHUNKED_TAIL = b"Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n"
+
+#: Constant header block of static file responses.
+STATIC_HEADERS = b"Cache-Control: no-cache\r\n"
+
+#: Constant header block of the 404 response.
+NOTFOUND_HEADERS = (
+    b"Accept-Ranges: bytes\r\n"
+    b"Content-Type: text/html\r\n"
+    b"Cache-Control: max-age=86000\r\n"
+)
+
+_CONTENT_TYPE_LINES = {}
+
+_date_line = (0, b"")
+
+
+def status_line(code):
+    """
+    Return the encoded status line for ``code``.
+
+    :param code (int): HTTP status code.
+
+    :rtype bytes: e.g. ``b"HTTP/1.1 404 Not Found\r\n"``.
+    """
+    line = STATUS_LINES.get(code)
+    if line is None:
+        line = "HTTP/1.1 {} {}\r\n".format(code, "Unknown").encode("latin-1")
+    return line
+
+
+def date_header():
+    """
+    Return the ``Date`` header line, reformatted at most once per second.
+
+    :rtype bytes: e.g. ``b"Date: Mon, 19 Oct 2026 08:00:00 GMT\r\n"``.
+    """
+    global _date_line
+    now = int(time.time())
+    cached = _date_line
+    if cached[0] != now:
+        cached = (now, "Date: {}\r\n".format(formatdate(now, usegmt=True)).encode("latin-1"))
+        _date_line = cached
+    return cached[1]
+
+
+def content_type_header(content_type):
+    """
+    Return the encoded ``Content-Type`` header line for ``content_type``.
+
+    :rtype bytes: cached header line.
+    """
+    line = _CONTENT_TYPE_LINES.get(content_type)
+    if line is None:
+        line = "Content-Type: {}\r\n".format(content_type).encode("utf-8")
+        if len(_CONTENT_TYPE_LINES) < 256:
+            _CONTENT_TYPE_LINES[content_type] = line
+    return line
+
+
+def format_headers(headers):
+    """
+    Serialize response headers into header lines.
+
+    :param headers: a mapping or a list of ``(name, value)`` pairs. A list or
+        tuple value emits one line per item (e.g. several ``Set-Cookie``), as
+        does every value of a multi-value :class:`CaseInsensitiveDict`.
+
+    :rtype tuple: (list of encoded lines, set of lower-cased header names).
+    """
+    lines = []
+    names = set()
+    if not headers:
+        return lines, names
+
+    if hasattr(headers, "multi_items"):
+        items = headers.multi_items()
+    elif hasattr(headers, "items"):
+        items = headers.items()
+    else:
+        items = headers
+    for key, value in items:
+        names.add(key.lower())
+        if isinstance(value, (list, tuple)):
+            for item in value:
+                lines.append("{}: {}\r\n".format(key, item).encode("utf-8"))
+        else:
+            lines.append("{}: {}\r\n".format(key, value).encode("utf-8"))
+    return lines, names
+
+
+def serialize_response(status=200, headers=None, body=b"", content_type=None):
+    """
+    Build a complete ``Connection: close`` HTTP response.
+
+    :param status (int): HTTP status code.
+    :param headers: extra headers, see :func:`format_headers`, or a
+        precompiled ``bytes`` block of header lines.
+    :param body (bytes or str): response body, str is encoded as UTF-8.
+    :param content_type (str, optional): Content-Type, unless given in ``headers``.
+
+    :rtype bytes: status line, headers, blank line and body.
+    """
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    elif body is None:
+        body = b""
+
+    parts = [status_line(status), date_header()]
+    if headers.__class__ is bytes:
+        parts.append(headers)
+        names = ()
+    else:
+        lines, names = format_headers(headers)
+        parts.extend(lines)
+
+    if content_type and "content-type" not in names:
+        parts.append(content_type_header(content_type))
+    if "content-length" not in names:
+        parts.append(b"Content-Length: %d\r\n" % len(body))
+    parts.append(CLOSE_TAIL)
+    parts.append(body)
+    return b"".join(parts)
+
+
+def serialize_stream_head(status=200, headers=None, content_type=None, chunked=True):
+    """
+    Build the head of a response whose body is streamed after it.
+
+    Without ``chunked`` (HTTP/1.0 clients) the body is delimited by closing
+    the connection.
+
+    :param status (int): HTTP status code.
+    :param headers: extra headers, see :func:`serialize_response`.
+    :param content_type (str, optional): Content-Type, unless given in ``headers``.
+    :param chunked (bool): announce ``Transfer-Encoding: chunked``.
+
+    :rtype bytes: status line, headers and blank line.
+    """
+    parts = [status_line(status), date_header()]
+    if headers.__class__ is bytes:
+        parts.append(headers)
+        names = ()
+    else:
+        lines, names = format_headers(headers)
+        # The body length is unknown; framing headers are ours to write.
+        parts.extend(line for line in lines
+                     if not line.lower().startswith((b"content-length:", b"transfer-encoding:")))
+    if content_type and "content-type" not in names:
+        parts.append(content_type_header(content_type))
+    parts.append(CHUNKED_TAIL if chunked else CLOSE_TAIL)
+    return b"".join(parts)
+
 class Response():   
     """The :class:`Response <Response>` object, which contains a
     server's response to an HTTP request.
@@ -40,13 +210,10 @@ class Response():
     It is used to construct and serve HTTP responses in a custom web server.
 
     :attrs status_code (int): HTTP status code (e.g., 200, 404).
-    :attrs headers (dict): dictionary of response headers.
+    :attrs headers (dict): dictionary of response headers, created on first use.
     :attrs url (str): url of the response.
-    :attrsencoding (str): encoding used for decoding response content.
-    :attrs history (list): list of previous Response objects (for redirects).
+    :attrs encoding (str): encoding used for decoding response content.
     :attrs reason (str): textual reason for the status code (e.g., "OK", "Not Found").
-    :attrs cookies (CaseInsensitiveDict): response cookies.
-    :attrs elapsed (datetime.timedelta): time taken to complete the request.
     :attrs request (PreparedRequest): the original request object.
 
     Usage::
@@ -58,22 +225,16 @@ class Response():
       <Response>
     """
 
-    __attrs__ = [
+    __slots__ = (
         "_content",
         "_header",
+        "_headers",
         "status_code",
-        "method",
-        "headers",
         "url",
-        "history",
         "encoding",
         "reason",
-        "cookies",
-        "elapsed",
         "request",
-        "body",
-        "reason",
-    ]
+    )
 
 
     def __init__(self, request=None):
@@ -84,39 +245,36 @@ class Response():
         """
 
         self._content = False
-        self._content_consumed = False
-        self._next = None
+        self._header = None
+        self._headers = None
 
         #: Integer Code of responded HTTP Status, e.g. 404 or 200.
         self.status_code = None
 
-        #: Case-insensitive Dictionary of Response Headers.
-        #: For example, ``headers['content-type']`` will return the
-        #: value of a ``'Content-Type'`` response header.
-        self.headers = {}
-
         #: URL location of Response.
         self.url = None
 
         #: Encoding to decode with when accessing response text.
         self.encoding = None
 
-        #: A list of :class:`Response <Response>` objects from
-        #: the history of the Request.
-        self.history = []
-
         #: Textual reason of responded HTTP Status, e.g. "Not Found" or "OK".
         self.reason = None
 
-        #: A of Cookies the response headers.
-        self.cookies = CaseInsensitiveDict()
-
-        #: The amount of time elapsed between sending the request
-        self.elapsed = datetime.timedelta(0)
-
         #: The :class:`PreparedRequest <PreparedRequest>` object to which this
         #: is a response.
-        self.request = None
+        self.request = request
+
+    @property
+    def headers(self):
+        """Dictionary of response headers, allocated on first use."""
+        headers = self._headers
+        if headers is None:
+            headers = self._headers = {}
+        return headers
+
+    @headers.setter
+    def headers(self, value):
+        self._headers = value
 
 
     def get_mime_type(self, path):
@@ -245,48 +403,14 @@ class Response():
 
         :rtypes bytes: encoded HTTP response header.
         """
-        reqhdr = request.headers
-        rsphdr = self.headers
-
-        #Build dynamic headers
-        headers = {
-                "Accept": "{}".format(reqhdr.get("Accept", "application/json")),
-                "Accept-Language": "{}".format(reqhdr.get("Accept-Language", "en-US,en;q=0.9")),
-                "Authorization": "{}".format(reqhdr.get("Authorization", "Basic <credentials>")),
-                "Cache-Control": "no-cache",
-                "Content-Type": "{}".format(self.headers['Content-Type']),
-                "Content-Length": "{}".format(len(self._content)),
-#                "Cookie": "{}".format(reqhdr.get("Cookie", "sessionid=xyz789")), #dummy cooki
-        #
-        # TODO prepare the request authentication
-        #
-	# self.auth = ...
-                "Date": "{}".format(datetime.datetime.utcnow().strftime("%a, %d %b %Y %H:%M:%S GMT")),
-                "Max-Forward": "10",
-                "Pragma": "no-cache",
-                "Proxy-Authorization": "Basic dXNlcjpwYXNz",  # example base64
-                "Warning": "199 Miscellaneous warning",
-                "User-Agent": "{}".format(reqhdr.get("User-Agent", "Chrome/123.0.0.0")),
-            }
-
-        headers["Authentication"] = "None"
-
-        # Header text alignment
-            #
-            #  TODO: implement the header building to create formated
-            #        header from the provied headers
-            #
-        fmt_header = "HTTP/1.1 200 OK\r\n"
-        for key, value in headers.items():
-            fmt_header += "{}: {}\r\n".format(key, value)
-        fmt_header += "\r\n"
-        #
-        # TODO prepare the request authentication
-        #
-	# self.auth = ...
-        self.auth = None
-
-        return str(fmt_header).encode('utf-8')
+        return b"".join((
+            status_line(200),
+            date_header(),
+            content_type_header(self.headers['Content-Type']),
+            b"Content-Length: %d\r\n" % len(self._content),
+            STATIC_HEADERS,
+            CLOSE_TAIL,
+        ))
 
 
     def build_notfound(self):
@@ -296,16 +420,7 @@ class Response():
         :rtype bytes: Encoded 404 response.
         """
 
-        return (
-                "HTTP/1.1 404 Not Found\r\n"
-                "Accept-Ranges: bytes\r\n"
-                "Content-Type: text/html\r\n"
-                "Content-Length: 13\r\n"
-                "Cache-Control: max-age=86000\r\n"
-                "Connection: close\r\n"
-                "\r\n"
-                "404 Not Found"
-            ).encode('utf-8')
+        return serialize_response(404, NOTFOUND_HEADERS, b"404 Not Found")
 
 # daemon/response.py
 # ... (thêm vào bên cạnh hàm build_notfound) ...
@@ -316,27 +431,42 @@ class Response():
        
         :rtype bytes: Encoded 401 response.
         """
-        response_body = "401 Unauthorized"
-        return (
-            "HTTP/1.1 401 Unauthorized\r\n"
-            "Content-Type: text/plain\r\n"
-            f"Content-Length: {len(response_body)}\r\n"
-            "Connection: close\r\n"
-            "\r\n"
-            f"{response_body}"
-        ).encode('utf-8')
+        return serialize_response(401, body=b"401 Unauthorized", content_type="text/plain")
     
-    def build_response(self, request):
+    def build_response(self, request, index=None):
         """
         Builds a full HTTP response including headers and content based on the request.
 
         :params request (class:`Request <Request>`): incoming request object.
+        :params index (StaticIndex, optional): precomputed path index; the
+            file, MIME type and headers are then one lookup away and a
+            missing file is a real 404. Resolved per request when None.
 
         :rtype bytes: complete HTTP response using prepared headers and content.
         """
 
         path = request.path
 
+        if index is not None:
+            entry = index.lookup(path)
+            if entry is None:
+                return self.build_notfound()
+            try:
+                with open(entry.path, "rb") as f:
+                    content = f.read()
+            except OSError:
+                # Removed since the index last looked at its directory.
+                return self.build_notfound()
+            self.headers['Content-Type'] = entry.mime_type
+            self._content = content
+            self._header = b"".join((
+                status_line(200),
+                date_header(),
+                b"Content-Length: %d\r\n" % len(content),
+                entry.headers,
+            ))
+            return self._header + content
+
         mime_type = self.get_mime_type(path)
         print("[Response] {} path {} mime_type {}".format(request.method, request.path, mime_type))
 
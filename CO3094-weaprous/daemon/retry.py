@@ -0,0 +1,300 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.retry
+~~~~~~~~~~~~~~~~~
+
+This module provides upstream retries and hedged requests for the proxy.
+
+Both are set per virtual host in ``proxy.conf``::
+
+  host "chatapp.local" {
+      proxy_pass http://192.168.1.8:9001;
+      proxy_pass http://192.168.1.8:9002;
+      proxy_next_upstream_tries 2;
+      hedge_after 150ms;
+  }
+
+- ``proxy_next_upstream_tries``: upstreams tried when connecting fails,
+  for idempotent methods only. Defaults to every upstream of the host;
+  ``1`` disables retries.
+- ``hedge_after``: if a ``GET`` or ``HEAD`` has no answer after this
+  delay, the same request is sent to a second upstream and the first
+  response wins; the other exchange is cancelled. Off by default.
+
+Retries and hedges add load exactly when backends struggle, so both draw
+from one :class:`RetryBudget` per process (:data:`BUDGET`): every request
+earns ``ratio`` of a token, every retry or hedge spends a whole one.
+"""
+
+import queue
+import re
+import socket
+import threading
+import time
+
+from .metrics import METRICS
+from .timeouts import connect_upstream, recv_upstream
+
+#: Methods safe to send twice (RFC 9110 9.2.2).
+IDEMPOTENT = frozenset(("GET", "HEAD", "OPTIONS", "TRACE", "PUT", "DELETE"))
+
+#: Methods that may be hedged: idempotent and without a body to replay.
+HEDGEABLE = frozenset(("GET", "HEAD"))
+
+_DELAY = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(ms|s)?\s*$")
+
+
+def parse_delay(text):
+    """
+    Parse a delay such as ``150ms``, ``0.2s`` or ``1``.
+
+    :rtype float: seconds.
+
+    :raises ValueError: on an unknown format.
+    """
+    match = _DELAY.match(text)
+    if not match:
+        raise ValueError("Invalid delay: {!r}".format(text))
+    value = float(match.group(1))
+    return value / 1000.0 if match.group(2) == "ms" else value
+
+
+class RetryPolicy(object):
+    """Retry and hedging settings of one virtual host.
+
+    :attrs tries (int): upstreams tried per request, None for all of them.
+    :attrs hedge_after (float): seconds before a hedged request, or None.
+    """
+
+    __slots__ = ("tries", "hedge_after")
+
+    def __init__(self, tries=None, hedge_after=None):
+        if tries is not None and tries < 1:
+            raise ValueError("proxy_next_upstream_tries must be at least 1")
+        if hedge_after is not None and hedge_after <= 0:
+            raise ValueError("hedge_after must be positive")
+        self.tries = tries
+        self.hedge_after = hedge_after
+
+
+#: Policy of hosts without retry directives.
+DEFAULT_POLICY = RetryPolicy()
+
+
+class RetryBudget(object):
+    """The :class:`RetryBudget <RetryBudget>` object, which bounds retries
+    and hedges to a share of the traffic.
+
+    :attrs ratio (float): tokens earned per request.
+    :attrs min_per_second (float): tokens earned per second regardless of
+        traffic, so a quiet proxy can still retry.
+    :attrs capacity (float): most tokens saved up.
+    """
+
+    def __init__(self, ratio=0.2, min_per_second=5.0, capacity=20.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        """Account one request."""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + self.ratio)
+
+    def withdraw(self):
+        """
+        Spend a token on a retry or a hedge.
+
+        :rtype bool: False if the budget is exhausted.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity,
+                               self._tokens + (now - self._last) * self.min_per_second)
+            self._last = now
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+        METRICS.inc("weaprous_proxy_retry_budget_exhausted_total")
+        return False
+
+
+#: Budget shared by every host of the process.
+BUDGET = RetryBudget()
+
+
+# ---------------------------------------------------------------------------
+#  RETRIES
+# ---------------------------------------------------------------------------
+def connect_balanced(hostname, balancer, policy, method, timeouts=None, health=None,
+                     budget=BUDGET):
+    """
+    Connect to an upstream of ``hostname``, moving on to the next upstream
+    when connecting fails and the method and budget allow it.
+
+    :rtype tuple: (``"ip:port"``, connected socket).
+
+    :raises OSError: the last connect error, once no retry is left.
+    """
+    tries = policy.tries or len(balancer.upstreams)
+    if method not in IDEMPOTENT:
+        tries = 1
+    tried = set()
+    while True:
+        upstream = balancer.choose(exclude=tried)
+        host, port = upstream.rsplit(":", 1)
+        try:
+            sock = connect_upstream(host, int(port), timeouts)
+        except OSError:
+            if health is not None:
+                health.mark_failure(upstream)
+            tried.add(upstream)
+            if len(tried) >= tries or not budget.withdraw():
+                raise
+            print(f"[Proxy] Connect to {upstream} failed, retrying {hostname} on another upstream")
+            METRICS.inc("weaprous_proxy_retries_total", (("host", hostname), ("reason", "connect")))
+            continue
+        if health is not None:
+            health.mark_success(upstream)
+        return upstream, sock
+
+
+# ---------------------------------------------------------------------------
+#  HEDGING
+# ---------------------------------------------------------------------------
+class Attempt(object):
+    """One exchange with one upstream, run in its own thread.
+
+    Posts ``(attempt, response, error)`` to ``results`` when done.
+
+    :attrs upstream (str): ``"ip:port"``.
+    :attrs connected (bool): whether the upstream accepted the connection.
+    """
+
+    def __init__(self, upstream, request, timeouts, results, health=None):
+        self.upstream = upstream
+        self.request = request
+        self.timeouts = timeouts
+        self.results = results
+        self.health = health
+        self.sock = None
+        self.connected = False
+        self.cancelled = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        thread = threading.Thread(target=self._run, name="weaprous-hedge")
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def cancel(self):
+        """Abort the exchange: the upstream sees the connection close."""
+        with self._lock:
+            self.cancelled = True
+            if self.sock is not None:
+                try:
+                    self.sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+    def _run(self):
+        host, port = self.upstream.rsplit(":", 1)
+        sock = None
+        try:
+            try:
+                sock = connect_upstream(host, int(port), self.timeouts)
+            except OSError:
+                if self.health is not None:
+                    self.health.mark_failure(self.upstream)
+                raise
+            self.connected = True
+            if self.health is not None:
+                self.health.mark_success(self.upstream)
+            with self._lock:
+                if self.cancelled:
+                    return
+                self.sock = sock
+            sock.sendall(self.request)
+            response = recv_upstream(sock, self.timeouts)
+            if self.cancelled:
+                return
+            self.results.put((self, response, None))
+        except Exception as e:
+            if not self.cancelled:
+                self.results.put((self, None, e))
+        finally:
+            if sock is not None:
+                sock.close()
+
+
+def hedged_exchange(hostname, balancer, policy, request, timeouts=None, health=None,
+                    budget=BUDGET):
+    """
+    Send ``request`` to one upstream and, without an answer after
+    ``policy.hedge_after`` seconds, to a second one.
+
+    The first successful response wins and the other exchange is cancelled.
+    An attempt whose connect fails is retried on another upstream, as in
+    :func:`connect_balanced`.
+
+    :rtype tuple: (winning ``"ip:port"``, raw response).
+
+    :raises Exception: the last error when every attempt failed.
+    """
+    tries = policy.tries or len(balancer.upstreams)
+    results = queue.Queue()
+    first = Attempt(balancer.choose(), request, timeouts, results, health).start()
+    running = [first]
+    tried = {first.upstream}
+    connect_failures = 0
+    hedged = False
+    error = None
+    try:
+        while True:
+            try:
+                attempt, response, error = results.get(
+                    timeout=None if hedged else policy.hedge_after)
+            except queue.Empty:
+                attempt = None
+
+            if attempt is None:
+                hedged = True
+                reason = "hedge"
+            else:
+                running.remove(attempt)
+                if error is None:
+                    if attempt is not first:
+                        METRICS.inc("weaprous_proxy_hedge_wins_total", (("host", hostname),))
+                    return attempt.upstream, response
+                connect_failures += not attempt.connected
+                reason = "connect" if not attempt.connected and connect_failures < tries else None
+
+            if reason is not None:
+                upstream = balancer.choose(exclude=tried)
+                if upstream not in tried and budget.withdraw():
+                    print(f"[Proxy] {reason.capitalize()} retry of {hostname} on {upstream}")
+                    METRICS.inc("weaprous_proxy_retries_total",
+                                (("host", hostname), ("reason", reason)))
+                    tried.add(upstream)
+                    running.append(Attempt(upstream, request, timeouts, results, health).start())
+                    continue
+            if not running:
+                raise error
+    finally:
+        for attempt in running:
+            attempt.cancel()
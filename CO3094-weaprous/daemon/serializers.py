@@ -0,0 +1,374 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.serializers
+~~~~~~~~~~~~~~~~~
+
+This module provides the pluggable result serializers used by
+:class:`WeApRous <daemon.weaprous.WeApRous>` when a route returns a dict.
+
+- :class:`JsonSerializer` writes compact JSON, through ``orjson`` when it is
+  installed and the standard :mod:`json` module otherwise.
+- :class:`MsgPackSerializer` writes MessagePack with the small encoder in
+  this module, for internal clients that send
+  ``Accept: application/msgpack``.
+- :class:`SerializerRegistry` picks one from the request's ``Accept``
+  header.
+
+Results wrapped with :func:`freeze` are treated as immutable and their
+encoded bytes are cached per content type, so a constant payload is only
+serialized once.
+
+Usage::
+
+  >>> from daemon import WeApRous, freeze
+  >>> app = WeApRous()
+  >>> WELCOME = freeze({'message': 'Welcome'})
+  >>> @app.route('/', methods=['GET'])
+  >>> def home(headers, body):
+  >>>     return WELCOME
+"""
+
+import json
+import struct
+
+try:
+    import orjson
+except ImportError:  # optional accelerator
+    orjson = None
+
+
+class Frozen(object):
+    """An immutable route result whose encoded bytes are cached.
+
+    :attrs value: the wrapped result, which must not be mutated.
+    """
+
+    __slots__ = ("value", "encoded")
+
+    def __init__(self, value):
+        self.value = value
+        #: content type -> encoded bytes
+        self.encoded = {}
+
+
+def freeze(value):
+    """
+    Mark a route result as immutable so its serialization can be reused.
+
+    :param value (dict): result returned by a handler on every call.
+
+    :rtype Frozen: wrapper accepted as a route result.
+    """
+    return Frozen(value)
+
+
+# ---------------------------------------------------------------------------
+#  JSON
+# ---------------------------------------------------------------------------
+class JsonSerializer(object):
+    """Compact JSON encoder."""
+
+    content_type = "application/json"
+    aliases = ("application/json", "application/*", "text/json")
+
+    def __init__(self, use_orjson=True):
+        self.use_orjson = use_orjson and orjson is not None
+        self._encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+
+    def dumps(self, value):
+        """
+        :rtype bytes: UTF-8 encoded JSON document.
+        """
+        if self.use_orjson:
+            return orjson.dumps(value)
+        return self._encoder.encode(value).encode("utf-8")
+
+
+# ---------------------------------------------------------------------------
+#  MESSAGEPACK
+# ---------------------------------------------------------------------------
+_pack_uint = (
+    (0xFF, 0xCC, ">B"),
+    (0xFFFF, 0xCD, ">H"),
+    (0xFFFFFFFF, 0xCE, ">I"),
+    (0xFFFFFFFFFFFFFFFF, 0xCF, ">Q"),
+)
+
+_pack_int = (
+    (-0x80, 0xD0, ">b"),
+    (-0x8000, 0xD1, ">h"),
+    (-0x80000000, 0xD2, ">i"),
+    (-0x8000000000000000, 0xD3, ">q"),
+)
+
+
+def _pack_length(out, n, fix_base, fix_max, codes):
+    if n <= fix_max:
+        out.append(bytes((fix_base | n,)))
+    elif n <= 0xFF and codes[0] is not None:
+        out.append(bytes((codes[0], n)))
+    elif n <= 0xFFFF:
+        out.append(bytes((codes[1],)) + struct.pack(">H", n))
+    else:
+        out.append(bytes((codes[2],)) + struct.pack(">I", n))
+
+
+def _pack(value, out):
+    if value is None:
+        out.append(b"\xc0")
+    elif value is True:
+        out.append(b"\xc3")
+    elif value is False:
+        out.append(b"\xc2")
+    elif isinstance(value, int):
+        if 0 <= value < 0x80:
+            out.append(bytes((value,)))
+        elif -0x20 <= value < 0:
+            out.append(struct.pack(">b", value))
+        elif value > 0:
+            for limit, code, fmt in _pack_uint:
+                if value <= limit:
+                    out.append(bytes((code,)) + struct.pack(fmt, value))
+                    break
+            else:
+                raise OverflowError("Integer too large for MessagePack")
+        else:
+            for limit, code, fmt in _pack_int:
+                if value >= limit:
+                    out.append(bytes((code,)) + struct.pack(fmt, value))
+                    break
+            else:
+                raise OverflowError("Integer too small for MessagePack")
+    elif isinstance(value, float):
+        out.append(b"\xcb" + struct.pack(">d", value))
+    elif isinstance(value, str):
+        data = value.encode("utf-8")
+        _pack_length(out, len(data), 0xA0, 31, (0xD9, 0xDA, 0xDB))
+        out.append(data)
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        data = bytes(value)
+        _pack_length(out, len(data), 0, -1, (0xC4, 0xC5, 0xC6))
+        out.append(data)
+    elif isinstance(value, (list, tuple)):
+        _pack_length(out, len(value), 0x90, 15, (None, 0xDC, 0xDD))
+        for item in value:
+            _pack(item, out)
+    elif isinstance(value, dict):
+        _pack_length(out, len(value), 0x80, 15, (None, 0xDE, 0xDF))
+        for key, item in value.items():
+            _pack(key, out)
+            _pack(item, out)
+    else:
+        raise TypeError("Object of type {} is not MessagePack serializable".format(
+            type(value).__name__))
+
+
+def packb(value):
+    """
+    Encode ``value`` as MessagePack.
+
+    :rtype bytes: encoded document.
+    """
+    out = []
+    _pack(value, out)
+    return b"".join(out)
+
+
+def unpackb(data):
+    """
+    Decode one MessagePack document produced by :func:`packb`.
+
+    :rtype object: decoded value.
+    """
+    value, end = _unpack(memoryview(data), 0)
+    if end != len(data):
+        raise ValueError("Extra data after MessagePack document")
+    return value
+
+
+def _unpack(buf, pos):
+    code = buf[pos]
+    pos += 1
+    if code <= 0x7F:
+        return code, pos
+    if code >= 0xE0:
+        return code - 0x100, pos
+    if 0x80 <= code <= 0x8F:
+        return _unpack_map(buf, pos, code & 0x0F)
+    if 0x90 <= code <= 0x9F:
+        return _unpack_array(buf, pos, code & 0x0F)
+    if 0xA0 <= code <= 0xBF:
+        n = code & 0x1F
+        return str(buf[pos:pos + n], "utf-8"), pos + n
+    if code == 0xC0:
+        return None, pos
+    if code == 0xC2:
+        return False, pos
+    if code == 0xC3:
+        return True, pos
+    if code in _FIXED:
+        fmt = _FIXED[code]
+        size = struct.calcsize(fmt)
+        return struct.unpack_from(fmt, buf, pos)[0], pos + size
+    if code in _SIZED:
+        fmt, kind = _SIZED[code]
+        n = struct.unpack_from(fmt, buf, pos)[0]
+        pos += struct.calcsize(fmt)
+        if kind == "str":
+            return str(buf[pos:pos + n], "utf-8"), pos + n
+        if kind == "bin":
+            return bytes(buf[pos:pos + n]), pos + n
+        if kind == "array":
+            return _unpack_array(buf, pos, n)
+        return _unpack_map(buf, pos, n)
+    raise ValueError("Unsupported MessagePack type 0x{:02x}".format(code))
+
+
+def _unpack_array(buf, pos, n):
+    items = []
+    for _ in range(n):
+        item, pos = _unpack(buf, pos)
+        items.append(item)
+    return items, pos
+
+
+def _unpack_map(buf, pos, n):
+    result = {}
+    for _ in range(n):
+        key, pos = _unpack(buf, pos)
+        result[key], pos = _unpack(buf, pos)
+    return result, pos
+
+
+_FIXED = {
+    0xCA: ">f", 0xCB: ">d",
+    0xCC: ">B", 0xCD: ">H", 0xCE: ">I", 0xCF: ">Q",
+    0xD0: ">b", 0xD1: ">h", 0xD2: ">i", 0xD3: ">q",
+}
+
+_SIZED = {
+    0xC4: (">B", "bin"), 0xC5: (">H", "bin"), 0xC6: (">I", "bin"),
+    0xD9: (">B", "str"), 0xDA: (">H", "str"), 0xDB: (">I", "str"),
+    0xDC: (">H", "array"), 0xDD: (">I", "array"),
+    0xDE: (">H", "map"), 0xDF: (">I", "map"),
+}
+
+
+class MsgPackSerializer(object):
+    """MessagePack encoder for internal clients."""
+
+    content_type = "application/msgpack"
+    aliases = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+    def dumps(self, value):
+        """
+        :rtype bytes: MessagePack document.
+        """
+        return packb(value)
+
+
+# ---------------------------------------------------------------------------
+#  NEGOTIATION
+# ---------------------------------------------------------------------------
+class SerializerRegistry(object):
+    """The :class:`SerializerRegistry <SerializerRegistry>` object, which
+    holds the serializers of an app and negotiates one per request.
+
+    The first registered serializer is the default, used when the request
+    has no ``Accept`` header or accepts nothing more specific. Parsed
+    ``Accept`` values are cached since clients send the same few strings.
+
+    :attrs serializers (list): registered serializers in preference order.
+    """
+
+    _CACHE_SIZE = 256
+
+    def __init__(self, serializers=None):
+        self.serializers = []
+        self._by_type = {}
+        self._cache = {}
+        for serializer in serializers or (JsonSerializer(), MsgPackSerializer()):
+            self.register(serializer)
+
+    def register(self, serializer):
+        """
+        Add a serializer.
+
+        :param serializer: object with ``content_type``, ``aliases`` and
+            ``dumps(value) -> bytes``.
+        """
+        self.serializers.append(serializer)
+        for media_type in serializer.aliases:
+            self._by_type.setdefault(media_type, serializer)
+        self._cache.clear()
+
+    @property
+    def default(self):
+        return self.serializers[0]
+
+    def select(self, accept):
+        """
+        Pick the serializer for an ``Accept`` header value.
+
+        :param accept (str): header value, may be empty.
+
+        :rtype object: the chosen serializer.
+        """
+        if not accept or len(self.serializers) == 1:
+            return self.default
+        chosen = self._cache.get(accept)
+        if chosen is None:
+            chosen = self._negotiate(accept)
+            if len(self._cache) >= self._CACHE_SIZE:
+                self._cache.clear()
+            self._cache[accept] = chosen
+        return chosen
+
+    def _negotiate(self, accept):
+        best, best_q = self.default, 0.0
+        for part in accept.split(","):
+            media_type, _, params = part.strip().partition(";")
+            q = 1.0
+            for param in params.split(";"):
+                key, _, value = param.strip().partition("=")
+                if key == "q":
+                    try:
+                        q = float(value)
+                    except ValueError:
+                        q = 0.0
+            serializer = self._by_type.get(media_type.strip().lower())
+            if serializer is not None and q > best_q:
+                best, best_q = serializer, q
+        return best
+
+    def encode(self, result, accept=None):
+        """
+        Serialize a route result for a request.
+
+        :param result (dict or Frozen): handler result.
+        :param accept (str): request ``Accept`` header.
+
+        :rtype tuple: (content type, encoded bytes).
+        """
+        serializer = self.select(accept)
+        if result.__class__ is Frozen:
+            data = result.encoded.get(serializer.content_type)
+            if data is None:
+                data = result.encoded[serializer.content_type] = serializer.dumps(result.value)
+            return serializer.content_type, data
+        return serializer.content_type, serializer.dumps(result)
+
+
+#: Registry used by routes that were not registered through a WeApRous app.
+DEFAULT_SERIALIZERS = SerializerRegistry()
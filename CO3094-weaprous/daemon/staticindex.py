@@ -0,0 +1,200 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.staticindex
+~~~~~~~~~~~~~~~~~
+
+This module provides the index of static files served by the backend.
+
+The index is built once at startup by walking the static directories: each
+URL path maps to its file, MIME type and precompiled header block, so
+serving a static request costs one dict lookup instead of a MIME guess,
+a directory choice and a path join.
+
+A file is indexed under the directory its MIME type is served from, the
+same choice :meth:`Response.prepare_content_type` makes: HTML from
+``www/``, CSS, plain text and images from ``static/``, ``application/*``
+from ``apps/``, audio and video from ``media/``.
+
+The index follows the directories: at most every ``check_interval``
+seconds their mtimes are compared, and a file added, removed or renamed
+triggers a rebuild. The first miss of a path checks the directories at
+once, in case the file was just added; after that the path sits in a
+bounded negative cache and is answered ``404`` without touching the
+filesystem.
+"""
+
+import mimetypes
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from .response import BASE_DIR, CLOSE_TAIL, STATIC_HEADERS, content_type_header
+
+#: Directories walked for static files.
+STATIC_DIRS = ("www", "static", "apps", "media")
+
+
+def static_dir(mime_type):
+    """
+    The directory files of ``mime_type`` are served from.
+
+    :rtype str: directory name, or None if the type is not served.
+    """
+    main_type, _, sub_type = mime_type.partition("/")
+    if main_type == "text":
+        if sub_type == "html":
+            return "www"
+        if sub_type in ("plain", "css", "csv", "xml"):
+            return "static"
+        return None
+    if main_type == "image":
+        return "static"
+    if main_type == "application":
+        return "apps"
+    if main_type in ("video", "audio"):
+        return "media"
+    return None
+
+
+class StaticFile(object):
+    """One indexed static file.
+
+    :attrs path (str): file on disk.
+    :attrs mime_type (str): Content-Type value.
+    :attrs headers (bytes): header block after ``Content-Length``, up to
+        and including the blank line.
+    """
+
+    __slots__ = ("path", "mime_type", "headers")
+
+    def __init__(self, path, mime_type):
+        self.path = path
+        self.mime_type = mime_type
+        self.headers = b"".join((content_type_header(mime_type), STATIC_HEADERS, CLOSE_TAIL))
+
+
+class StaticIndex(object):
+    """The :class:`StaticIndex <StaticIndex>` object, which maps URL paths to
+    static files and keeps the map in sync with the directories.
+
+    :attrs root (str): prefix of the static directories.
+    :attrs directories (tuple): directory names under ``root``.
+    :attrs check_interval (float): minimum seconds between change checks.
+    :attrs negative_size (int): missing paths remembered at most.
+    """
+
+    def __init__(self, root=BASE_DIR, directories=STATIC_DIRS, check_interval=1.0,
+                 negative_size=1024):
+        self.root = root
+        self.directories = tuple(directories)
+        self.check_interval = check_interval
+        self.negative_size = negative_size
+        self._files = None
+        self._mtimes = {}
+        self._checked = 0.0
+        self._missing = OrderedDict()
+        self._lock = threading.Lock()
+
+    def build(self):
+        """
+        Walk the directories and replace the index.
+
+        :rtype int: number of indexed files.
+        """
+        files = {}
+        mtimes = {}
+        for name in self.directories:
+            top = os.path.join(self.root, name)
+            for dirpath, dirnames, filenames in os.walk(top):
+                dirnames[:] = [d for d in dirnames
+                               if not d.startswith(".") and d != "__pycache__"]
+                try:
+                    mtimes[dirpath] = os.stat(dirpath).st_mtime_ns
+                except OSError:
+                    continue
+                for filename in filenames:
+                    if filename.startswith("."):
+                        continue
+                    mime_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+                    if static_dir(mime_type) != name:
+                        continue
+                    path = os.path.join(dirpath, filename)
+                    url = "/" + os.path.relpath(path, top).replace(os.sep, "/")
+                    files[url] = StaticFile(path, mime_type)
+
+        with self._lock:
+            self._files = files
+            self._mtimes = mtimes
+            self._checked = time.monotonic()
+            self._missing.clear()
+        print("[StaticIndex] Indexed {} files".format(len(files)))
+        return len(files)
+
+    def _changed(self):
+        for dirpath, mtime in self._mtimes.items():
+            try:
+                if os.stat(dirpath).st_mtime_ns != mtime:
+                    return True
+            except OSError:
+                return True
+        # A static directory created after the build.
+        return any(os.path.join(self.root, name) not in self._mtimes
+                   and os.path.isdir(os.path.join(self.root, name))
+                   for name in self.directories)
+
+    def lookup(self, path):
+        """
+        Resolve a URL path.
+
+        :param path (str): request path, e.g. ``/css/styles.css``.
+
+        :rtype StaticFile: the file, or None for a 404.
+        """
+        files = self._files
+        now = time.monotonic()
+        if files is None or now - self._checked >= self.check_interval:
+            self._checked = now
+            if files is None or self._changed():
+                self.build()
+                files = self._files
+
+        entry = files.get(path)
+        if entry is not None:
+            return entry
+
+        missing = self._missing
+        with self._lock:
+            if path in missing:
+                missing.move_to_end(path)
+                return None
+
+        # First miss of this path: the file may be newer than the index.
+        if self._changed():
+            self.build()
+            entry = self._files.get(path)
+            if entry is not None:
+                return entry
+        with self._lock:
+            missing[path] = None
+            if len(missing) > self.negative_size:
+                missing.popitem(last=False)
+        return None
+
+    def __len__(self):
+        return len(self._files or ())
+
+
+#: Index shared by every connection of the process.
+STATIC_INDEX = StaticIndex()
@@ -0,0 +1,170 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.streaming
+~~~~~~~~~~~~~~~~~
+
+This module provides streamed response bodies for route handlers.
+
+A handler may return an iterator or generator, a ``(status, headers,
+iterable)`` tuple, or a :class:`StreamingBody`. The adapter then sends the
+head at once and each yielded piece as one ``Transfer-Encoding: chunked``
+chunk as soon as it is produced, so the first byte leaves before the last
+one is computed and the body is never held in memory as a whole.
+
+:func:`stream_json` encodes a large list (or any iterable of rows) as a JSON
+array item by item, batching the encoded items into chunks of about
+``batch_size`` bytes.
+
+Usage::
+
+  >>> @app.route('/export', methods=['GET'])
+  >>> def export(headers, body):
+  >>>     return stream_json(db.iter_rows(), key="rows")
+"""
+
+from .serializers import JsonSerializer
+
+#: Default size of the batches written by :func:`stream_json`.
+JSON_BATCH_SIZE = 16 * 1024
+
+_LAST_CHUNK = b"0\r\n\r\n"
+
+_json = JsonSerializer()
+
+
+class StreamingBody(object):
+    """A response body produced piece by piece.
+
+    :attrs iterable: yields ``bytes`` or ``str`` pieces.
+    :attrs content_type (str): Content-Type of the stream.
+    """
+
+    __slots__ = ("iterable", "content_type")
+
+    def __init__(self, iterable, content_type="text/html"):
+        self.iterable = iterable
+        self.content_type = content_type
+
+
+def is_stream(body):
+    """
+    Tell whether a route result or tuple body must be streamed.
+
+    Iterators, generators and :class:`StreamingBody` are streamed; strings,
+    bytes, dicts and tuples are not.
+
+    :rtype bool: True for streamed bodies.
+    """
+    if body.__class__ is StreamingBody:
+        return True
+    if isinstance(body, (str, bytes, bytearray, memoryview, dict, tuple)) or body is None:
+        return False
+    return hasattr(body, "__next__") or hasattr(body, "__iter__")
+
+
+def iter_json_array(items, key=None, batch_size=JSON_BATCH_SIZE, dumps=None):
+    """
+    Encode ``items`` as a JSON array, one batch at a time.
+
+    :param items: iterable of JSON-serializable values.
+    :param key (str, optional): wrap the array as ``{"<key>": [...]}``.
+    :param batch_size (int): approximate bytes per yielded piece.
+    :param dumps: item encoder returning bytes, compact JSON by default.
+
+    :rtype generator: bytes pieces of the document.
+    """
+    dumps = dumps or _json.dumps
+    head = b"[" if key is None else b'{' + dumps(key) + b':['
+    tail = b"]" if key is None else b"]}"
+
+    batch = [head]
+    size = len(head)
+    sep = b""
+    for item in items:
+        data = dumps(item)
+        if sep:
+            batch.append(sep)
+        batch.append(data)
+        sep = b","
+        size += len(data) + 1
+        if size >= batch_size:
+            yield b"".join(batch)
+            batch = []
+            size = 0
+    batch.append(tail)
+    yield b"".join(batch)
+
+
+def stream_json(items, key=None, batch_size=JSON_BATCH_SIZE):
+    """
+    Stream a large list as a JSON array without building the document.
+
+    :rtype StreamingBody: ``application/json`` stream of the array.
+    """
+    return StreamingBody(iter_json_array(items, key, batch_size), "application/json")
+
+
+def send_stream(conn, head, iterable, chunked=True):
+    """
+    Send a response head followed by its streamed body.
+
+    The head goes out together with the first piece. Every piece is sent as
+    it is yielded; empty pieces are skipped since a zero-length chunk would
+    end the body. If the iterable raises, the connection is left without the
+    last chunk so the client sees a truncated response instead of a
+    complete one.
+
+    :param conn (socket.socket): client connection.
+    :param head (bytes): serialized status line and headers.
+    :param iterable: yields ``bytes`` or ``str`` pieces.
+    :param chunked (bool): frame pieces as HTTP/1.1 chunks.
+
+    :rtype int: number of bytes written.
+    """
+    try:
+        return _write_pieces(conn, head, iterable, chunked)
+    finally:
+        # Run the generator's cleanup even if the client went away.
+        close = getattr(iterable, "close", None)
+        if close is not None:
+            close()
+
+
+def _write_pieces(conn, pending, iterable, chunked):
+    sent = 0
+    for piece in iterable:
+        if piece.__class__ is str:
+            piece = piece.encode("utf-8")
+        if not piece:
+            continue
+        if chunked:
+            frame = b"%x\r\n" % len(piece)
+            if len(piece) > 65536:
+                # Keep large pieces out of a concatenation copy.
+                conn.sendall(pending + frame)
+                conn.sendall(piece)
+                conn.sendall(b"\r\n")
+            else:
+                conn.sendall(b"".join((pending, frame, piece, b"\r\n")))
+            sent += len(pending) + len(frame) + len(piece) + 2
+        else:
+            conn.sendall(pending + piece if pending else piece)
+            sent += len(pending) + len(piece)
+        pending = b""
+
+    tail = pending + _LAST_CHUNK if chunked else pending
+    if tail:
+        conn.sendall(tail)
+        sent += len(tail)
+    return sent
@@ -0,0 +1,337 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.templates
+~~~~~~~~~~~~~~~~~
+
+This module provides a small compiled HTML template engine for route handlers.
+
+Each template is translated once into a Python function that appends text
+pieces to a list, which is joined a single time at the end. Templates are
+reloaded when their file changes, whole pages rendered without context are
+served from a render cache, and ``{% cache %}`` blocks cache a fragment for
+a number of seconds. Pages with fragments skip the render cache, so the
+fragment TTLs hold.
+
+Syntax:
+
+- ``{{ expr }}``: HTML-escaped value of a Python expression.
+- ``{{! expr }}``: raw value, not escaped.
+- ``{% if expr %}`` / ``{% elif expr %}`` / ``{% else %}`` / ``{% endif %}``
+- ``{% for target in expr %}`` / ``{% endfor %}``
+- ``{% cache "key" seconds %}`` / ``{% endcache %}``: fragment cache.
+
+Usage::
+
+  >>> engine = TemplateEngine("www")
+  >>> engine.render("hello.html", user="admin", items=[1, 2])
+  '<h1>Hello admin</h1>...'
+"""
+
+import html
+import os
+import re
+import threading
+import time
+import types
+
+_TOKEN = re.compile(r"(\{\{.*?\}\}|\{%.*?%\})", re.DOTALL)
+_NAME = re.compile(r"[A-Za-z_]\w*")
+_SECONDS = re.compile(r"\d+(?:\.\d*)?|\.\d+")
+
+#: Names available to every template besides its context.
+TEMPLATE_GLOBALS = {
+    "len": len, "range": range, "enumerate": enumerate, "sorted": sorted,
+    "str": str, "int": int, "min": min, "max": max, "zip": zip,
+}
+
+
+class TemplateSyntaxError(ValueError):
+    """Raised when a template can not be compiled."""
+
+
+class FragmentCache(object):
+    """Time-bounded cache of rendered ``{% cache %}`` fragments."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = {}
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def set(self, key, text, ttl):
+        if len(self._entries) >= self.max_entries:
+            self._entries.clear()
+        self._entries[key] = (time.monotonic() + ttl, text)
+
+    def clear(self):
+        self._entries.clear()
+
+
+def compile_template(source, name="<template>"):
+    """
+    Translate template source into a Python code object.
+
+    The code object is the body of ``def __render(__out)``; context names
+    are resolved as globals of the function built for each render. Loop
+    targets are declared global too, so a loop may reuse a context name.
+
+    :param source (str): template text.
+    :param name (str): template name used in error messages.
+
+    :rtype code: compiled render function body.
+    """
+    lines = ["def __render(__out):", "    __w = __out.append"]
+    loop_names = set()
+    stack = []
+    depth = 1
+    cache_id = 0
+
+    def emit(code):
+        lines.append("    " * depth + code)
+
+    for token in _TOKEN.split(source):
+        if not token:
+            continue
+        if token.startswith("{{"):
+            expr = token[2:-2].strip()
+            if expr.startswith("!"):
+                emit("__w(str({}))".format(expr[1:].strip()))
+            else:
+                emit("__w(__esc({}))".format(expr))
+        elif token.startswith("{%"):
+            stmt = token[2:-2].strip()
+            word, _, rest = stmt.partition(" ")
+            rest = rest.strip()
+            if word in ("if", "for"):
+                if word == "for":
+                    target, sep, _ = rest.partition(" in ")
+                    if not sep:
+                        raise TemplateSyntaxError("{}: bad for tag {!r}".format(name, stmt))
+                    loop_names.update(_NAME.findall(target))
+                emit("{} {}:".format(word, rest))
+                stack.append(word)
+                depth += 1
+                emit("pass")
+            elif word in ("elif", "else"):
+                if not stack or stack[-1] != "if":
+                    raise TemplateSyntaxError("{}: unexpected {}".format(name, word))
+                depth -= 1
+                emit("{} {}:".format(word, rest) if word == "elif" else "else:")
+                depth += 1
+                emit("pass")
+            elif word == "cache":
+                key, _, ttl = rest.rpartition(" ")
+                if not key or not _SECONDS.fullmatch(ttl):
+                    key, ttl = rest, "60"
+                try:
+                    compile(key, name, "eval")
+                except SyntaxError:
+                    raise TemplateSyntaxError(
+                        "{}: bad cache key {!r}, quote keys with spaces".format(name, key))
+                cache_id += 1
+                var = "__c{}".format(cache_id)
+                emit("{}_key = ({!r}, {})".format(var, name, key))
+                emit("{}_hit = __frag.get({}_key)".format(var, var))
+                emit("if {}_hit is not None:".format(var))
+                emit("    __w({}_hit)".format(var))
+                emit("else:")
+                depth += 1
+                emit("{}_saved = __w".format(var))
+                emit("{}_parts = []".format(var))
+                emit("__w = {}_parts.append".format(var))
+                stack.append(("cache", var, ttl))
+            elif word.startswith("end"):
+                if not stack:
+                    raise TemplateSyntaxError("{}: unexpected {}".format(name, word))
+                opened = stack.pop()
+                kind = opened[0] if isinstance(opened, tuple) else opened
+                if word != "end" + kind:
+                    raise TemplateSyntaxError("{}: {} closes {}".format(name, word, kind))
+                if kind == "cache":
+                    _, var, ttl = opened
+                    emit("{}_text = ''.join({}_parts)".format(var, var))
+                    emit("__w = {}_saved".format(var))
+                    emit("__frag.set({}_key, {}_text, {})".format(var, var, ttl))
+                    emit("__w({}_text)".format(var))
+                depth -= 1
+            else:
+                raise TemplateSyntaxError("{}: unknown tag {}".format(name, word))
+        else:
+            emit("__w({!r})".format(token))
+
+    if stack:
+        raise TemplateSyntaxError("{}: unclosed {}".format(name, stack[-1]))
+    if loop_names:
+        lines.insert(1, "    global " + ", ".join(sorted(loop_names)))
+
+    try:
+        module = compile("\n".join(lines), name, "exec")
+    except SyntaxError as e:
+        raise TemplateSyntaxError("{}: {}".format(name, e))
+    for const in module.co_consts:
+        if isinstance(const, types.CodeType):
+            return const
+    raise TemplateSyntaxError("{}: empty template".format(name))
+
+
+def _escape(value):
+    if value.__class__ is str:
+        return html.escape(value)
+    return html.escape(str(value))
+
+
+class Template(object):
+    """A compiled template.
+
+    :attrs name (str): template name.
+    :attrs code (code): compiled render function body.
+    :attrs globals (dict): names shared by every render, below the context.
+    :attrs cacheable (bool): whether a render without context may be kept
+        whole; False when the template has ``{% cache %}`` blocks, whose
+        TTLs only hold if the page is rendered again.
+    """
+
+    __slots__ = ("name", "code", "fragments", "globals", "cacheable")
+
+    def __init__(self, source, name="<template>", fragments=None, globals=None):
+        self.name = name
+        self.code = compile_template(source, name)
+        self.fragments = fragments if fragments is not None else FragmentCache()
+        self.globals = globals or {}
+        self.cacheable = "__frag" not in self.code.co_names
+
+    def render_parts(self, context):
+        """
+        :rtype list: rendered text pieces, ready for ``"".join``.
+        """
+        scope = dict(TEMPLATE_GLOBALS)
+        scope.update(self.globals)
+        scope.update(context)
+        scope["__esc"] = _escape
+        scope["__frag"] = self.fragments
+        out = []
+        types.FunctionType(self.code, scope)(out)
+        return out
+
+    def render(self, **context):
+        """
+        :rtype str: rendered text.
+        """
+        return "".join(self.render_parts(context))
+
+
+class TemplateEngine(object):
+    """The :class:`TemplateEngine <TemplateEngine>` object, which loads,
+    compiles and caches templates from a directory.
+
+    :attrs directory (str): first template root, e.g. ``www``.
+    :attrs directories (tuple): template roots, searched in order.
+    :attrs auto_reload (bool): recompile templates whose file changed.
+    :attrs check_interval (float): minimum seconds between mtime checks.
+    :attrs globals (dict): extra names available to every template, e.g.
+        helpers such as ``asset``.
+    """
+
+    def __init__(self, directory="www", auto_reload=True, check_interval=1.0, globals=None):
+        if isinstance(directory, str):
+            directory = (directory,)
+        self.directories = tuple(directory)
+        self.directory = self.directories[0]
+        self.auto_reload = auto_reload
+        self.check_interval = check_interval
+        self.globals = dict(globals or {})
+        self.fragments = FragmentCache()
+        self._templates = {}
+        self._rendered = {}
+        self._lock = threading.Lock()
+
+    def _path(self, name):
+        for directory in self.directories:
+            path = os.path.normpath(os.path.join(directory, name.lstrip("/")))
+            root = os.path.normpath(directory)
+            if path != root and not path.startswith(root + os.sep):
+                raise FileNotFoundError(name)
+            if os.path.isfile(path):
+                return path
+        raise FileNotFoundError(name)
+
+    def get_template(self, name):
+        """
+        Return the compiled template, compiling or recompiling it as needed.
+
+        :param name (str): path relative to one of :attr:`directories`.
+
+        :rtype Template: compiled template.
+
+        :raises FileNotFoundError: if the template does not exist.
+        """
+        entry = self._templates.get(name)
+        now = time.monotonic()
+        if entry is not None and (not self.auto_reload or now - entry[2] < self.check_interval):
+            return entry[0]
+
+        with self._lock:
+            path = self._path(name)
+            mtime = os.stat(path).st_mtime_ns
+            entry = self._templates.get(name)
+            if entry is not None and entry[1] == mtime:
+                self._templates[name] = (entry[0], mtime, now)
+                return entry[0]
+
+            with open(path, "r", encoding="utf-8") as f:
+                template = Template(f.read(), name, self.fragments, self.globals)
+            self._templates[name] = (template, mtime, now)
+            self._rendered.pop(name, None)
+            print("[Templates] Compiled {}".format(path))
+            return template
+
+    def render(self, name, **context):
+        """
+        Render a template to text.
+
+        :rtype str: rendered page.
+        """
+        return self.render_bytes(name, **context).decode("utf-8")
+
+    def render_bytes(self, name, **context):
+        """
+        Render a template to UTF-8 bytes.
+
+        A page rendered without context only depends on the template, so its
+        bytes are kept until the template changes, unless the template has
+        ``{% cache %}`` blocks.
+
+        :rtype bytes: rendered page.
+        """
+        template = self.get_template(name)
+        cacheable = not context and template.cacheable
+        if cacheable:
+            cached = self._rendered.get(name)
+            if cached is not None and cached[0] is template:
+                return cached[1]
+        data = "".join(template.render_parts(context)).encode("utf-8")
+        if cacheable:
+            self._rendered[name] = (template, data)
+        return data
+
+    def clear(self):
+        """Drop every compiled template and cached render."""
+        with self._lock:
+            self._templates.clear()
+            self._rendered.clear()
+            self.fragments.clear()
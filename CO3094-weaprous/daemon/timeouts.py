@@ -0,0 +1,424 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.timeouts
+~~~~~~~~~~~~~~~~~
+
+This module provides connection timeouts for the backend and the proxy.
+
+Every blocking read is guarded by a timer in one shared
+:class:`TimerWheel`: a hashed wheel of ``size`` slots advanced every
+``tick`` seconds by a single thread. Scheduling and cancelling a timer are
+O(1), so a timer is re-armed after every received chunk at no real cost.
+When a timer fires it shuts down the reading side of the socket, which
+wakes the thread blocked in ``recv``; that thread then answers with ``408``
+(client) or ``504`` (upstream).
+
+Timeouts (:class:`Timeouts`):
+
+- ``header_read``: total time to receive the request line and headers.
+  Trickling one byte at a time does not extend it (slowloris).
+- ``body_read``: total time to receive the body once the headers are in.
+- ``idle``: longest silence between two received chunks, including the
+  wait for the first byte.
+- ``upstream_connect``: time to connect to a backend. A pending connect
+  can not be interrupted safely from another thread, so this one is the
+  socket's own timeout.
+- ``upstream_read``: longest silence while reading a backend's response.
+- ``keepalive``: how long a kept-alive client connection may sit idle
+  between two requests before it is closed (proxy).
+
+Usage::
+
+  >>> timeouts = Timeouts(header_read=5, idle=2)
+  >>> create_backend("0.0.0.0", 9000, routes, timeouts=timeouts)
+"""
+
+import math
+import socket
+import threading
+import time
+
+from .httpparser import HttpParseError
+
+
+class Timeouts(object):
+    """Timeout settings, in seconds. ``None`` disables a timeout."""
+
+    __slots__ = ("header_read", "body_read", "idle", "upstream_connect", "upstream_read",
+                 "keepalive")
+
+    def __init__(self, header_read=10.0, body_read=30.0, idle=5.0,
+                 upstream_connect=3.0, upstream_read=30.0, keepalive=15.0):
+        self.header_read = header_read
+        self.body_read = body_read
+        self.idle = idle
+        self.upstream_connect = upstream_connect
+        self.upstream_read = upstream_read
+        self.keepalive = keepalive
+
+
+#: Settings used when a server is started without explicit timeouts.
+DEFAULT_TIMEOUTS = Timeouts()
+
+
+class ReadTimeout(HttpParseError):
+    """Raised when the client is too slow to send its request."""
+
+    def __init__(self, message):
+        super().__init__(message, 408)
+
+
+class UpstreamTimeout(OSError):
+    """Raised when a backend is too slow to answer."""
+
+
+# ---------------------------------------------------------------------------
+#  TIMER WHEEL
+# ---------------------------------------------------------------------------
+class Timer(object):
+    """A scheduled callback, cancelled with :meth:`TimerWheel.cancel`."""
+
+    __slots__ = ("slot", "rounds", "callback", "args")
+
+    def __init__(self, slot, rounds, callback, args):
+        self.slot = slot
+        self.rounds = rounds
+        self.callback = callback
+        self.args = args
+
+
+class TimerWheel(object):
+    """The :class:`TimerWheel <TimerWheel>` object, which fires callbacks
+    after a delay, at ``tick`` resolution, from one thread.
+
+    A delay of ``n`` ticks lands in slot ``(cursor + n) % size`` with
+    ``(n - 1) // size`` extra rounds to wait, so long delays need no bigger
+    wheel.
+
+    :attrs tick (float): resolution in seconds.
+    :attrs size (int): number of slots.
+    """
+
+    def __init__(self, tick=0.05, size=512):
+        self.tick = tick
+        self.size = size
+        self._slots = [set() for _ in range(size)]
+        self._cursor = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def schedule(self, delay, callback, *args):
+        """
+        Call ``callback(*args)`` after ``delay`` seconds.
+
+        :rtype Timer: handle for :meth:`cancel`.
+        """
+        ticks = max(1, math.ceil(delay / self.tick))
+        # The cursor reaches slot cursor + offset after ``offset`` ticks, so
+        # offset runs from 1 to size; an offset of 0 would cost a whole round.
+        rounds, offset = divmod(ticks - 1, self.size)
+        offset += 1
+        with self._lock:
+            if self._thread is None:
+                self._start()
+            slot = (self._cursor + offset) % self.size
+            timer = Timer(slot, rounds, callback, args)
+            self._slots[slot].add(timer)
+        return timer
+
+    def cancel(self, timer):
+        """Cancel a timer; a timer that already fired is ignored."""
+        with self._lock:
+            self._slots[timer.slot].discard(timer)
+
+    def _start(self):
+        self._thread = threading.Thread(target=self._run, name="weaprous-timers")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self):
+        next_tick = time.monotonic() + self.tick
+        while True:
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            next_tick += self.tick
+
+            due = []
+            with self._lock:
+                self._cursor = (self._cursor + 1) % self.size
+                bucket = self._slots[self._cursor]
+                for timer in list(bucket):
+                    if timer.rounds:
+                        timer.rounds -= 1
+                    else:
+                        bucket.discard(timer)
+                        due.append(timer)
+
+            for timer in due:
+                try:
+                    timer.callback(*timer.args)
+                except Exception as e:
+                    print("[Timeouts] Timer callback failed: {}".format(e))
+
+
+#: Wheel shared by every connection of the process.
+WHEEL = TimerWheel()
+
+
+# ---------------------------------------------------------------------------
+#  SOCKET GUARD
+# ---------------------------------------------------------------------------
+class SocketTimer(object):
+    """One re-armable timer guarding the reads of one socket.
+
+    :attrs expired (str): name of the timeout that fired, or None.
+    """
+
+    __slots__ = ("sock", "wheel", "expired", "_timer", "_reason", "_lock")
+
+    def __init__(self, sock, wheel=WHEEL):
+        self.sock = sock
+        self.wheel = wheel
+        self.expired = None
+        self._timer = None
+        self._reason = None
+        self._lock = threading.Lock()
+
+    def arm(self, seconds, reason):
+        """
+        (Re)start the timer; a ``None`` delay only cancels it.
+        """
+        with self._lock:
+            if self._timer is not None:
+                self.wheel.cancel(self._timer)
+                self._timer = None
+            if seconds is not None:
+                self._reason = reason
+                timer = self.wheel.schedule(max(0.0, seconds), self._fire)
+                timer.args = (timer,)
+                self._timer = timer
+
+    def cancel(self):
+        self.arm(None, None)
+
+    def _fire(self, timer=None):
+        with self._lock:
+            # A timer popped by the wheel just before being re-armed or
+            # cancelled is stale and must not touch the socket.
+            if timer is None or timer is not self._timer:
+                return
+            self._timer = None
+            self.expired = self._reason
+            try:
+                # Wakes the blocked recv with EOF; sending stays possible.
+                self.sock.shutdown(socket.SHUT_RD)
+            except OSError:
+                pass
+
+
+def _arm_read(timer, deadline, reason, idle):
+    # Arm whichever of idle and the phase deadline comes first.
+    left = None if deadline is None else deadline - time.monotonic()
+    if left is not None and (idle is None or left < idle):
+        timer.arm(left, reason)
+    else:
+        timer.arm(idle, "idle")
+
+
+def read_request(conn, parser, timeouts=None, first_chunk=4096, pending=b"", wait=None,
+                 head_only=False):
+    """
+    Feed ``parser`` from ``conn`` until the request is complete.
+
+    :param conn (socket.socket): client connection.
+    :param parser (HttpParser): parser receiving the bytes.
+    :param timeouts (Timeouts): limits, :data:`DEFAULT_TIMEOUTS` when None.
+    :param pending (bytes): bytes already read past the previous request
+        of a kept-alive connection, parsed before anything is received.
+    :param wait (float): seconds to wait for the first byte instead of
+        ``idle``; the header deadline only starts once that byte arrived.
+    :param head_only (bool): return as soon as the header block is in and
+        leave the rest of the body on the socket (see :class:`PendingBody`).
+
+    :rtype bool: False if the client closed or timed out before sending anything.
+
+    :raises ReadTimeout: if a timeout fired mid-request.
+    :raises HttpParseError: on a malformed request.
+    """
+    timeouts = timeouts or DEFAULT_TIMEOUTS
+    if pending and (parser.feed(pending) or head_only and parser.headers_complete):
+        return True
+    timer = SocketTimer(conn)
+    if wait is not None and not parser.received:
+        # Idle keep-alive connection: a silent close is the normal end.
+        try:
+            timer.arm(wait, "keepalive")
+            chunk = conn.recv(first_chunk)
+        finally:
+            timer.cancel()
+        if not chunk:
+            return False
+        if parser.feed(chunk) or head_only and parser.headers_complete:
+            return True
+    header_deadline = None
+    if timeouts.header_read is not None:
+        header_deadline = time.monotonic() + timeouts.header_read
+    body_deadline = None
+    if parser.headers_complete and timeouts.body_read is not None:
+        # Resumed after a ``head_only`` read: only the body is left.
+        body_deadline = time.monotonic() + timeouts.body_read
+    size = first_chunk
+    try:
+        while True:
+            if body_deadline is None:
+                _arm_read(timer, header_deadline, "header_read", timeouts.idle)
+            else:
+                _arm_read(timer, body_deadline, "body_read", timeouts.idle)
+
+            chunk = conn.recv(size)
+            size = 65536
+            if not chunk:
+                if timer.expired is not None and parser.received:
+                    raise ReadTimeout("Request {} timeout".format(timer.expired.replace("_", " ")))
+                return bool(parser.received)
+            if parser.feed(chunk) or head_only and parser.headers_complete:
+                return True
+            if body_deadline is None and parser.headers_complete and timeouts.body_read is not None:
+                body_deadline = time.monotonic() + timeouts.body_read
+    finally:
+        timer.cancel()
+
+
+class PendingBody(object):
+    """The part of a request body still unread on the client socket, handed
+    on as it arrives instead of being buffered first: copied to a backend,
+    or fed to an upload parser.
+
+    :attrs remaining (int): body bytes not read yet.
+    """
+
+    __slots__ = ("conn", "remaining", "timeouts")
+
+    def __init__(self, conn, remaining, timeouts=None):
+        self.conn = conn
+        self.remaining = remaining
+        self.timeouts = timeouts or DEFAULT_TIMEOUTS
+
+    def copy_to(self, dest, size=65536):
+        """
+        Copy the rest of the body to the socket ``dest``.
+
+        :raises ReadTimeout: if the client was too slow.
+        :raises HttpParseError: if the client closed before the end of the body.
+        """
+        self.read_into(dest.sendall, size)
+
+    def read_into(self, consume, size=65536):
+        """
+        Pass the rest of the body, chunk by chunk, to ``consume`` within
+        ``body_read`` and ``idle``.
+
+        Never reads past the body, so a pipelined request stays on the socket.
+
+        :param consume (callable): called with each chunk received.
+
+        :raises ReadTimeout: if the client was too slow.
+        :raises HttpParseError: if the client closed before the end of the body.
+        """
+        timeouts = self.timeouts
+        timer = SocketTimer(self.conn)
+        deadline = None
+        if timeouts.body_read is not None:
+            deadline = time.monotonic() + timeouts.body_read
+        try:
+            while self.remaining:
+                _arm_read(timer, deadline, "body_read", timeouts.idle)
+                chunk = self.conn.recv(min(size, self.remaining))
+                if not chunk:
+                    if timer.expired is not None:
+                        raise ReadTimeout("Request {} timeout".format(timer.expired.replace("_", " ")))
+                    raise HttpParseError("Request body truncated")
+                consume(chunk)
+                self.remaining -= len(chunk)
+        finally:
+            timer.cancel()
+
+
+def connect_upstream(host, port, timeouts=None):
+    """
+    Open a connection to a backend within ``upstream_connect``.
+
+    :rtype socket.socket: connected, blocking socket.
+
+    :raises socket.timeout: if the backend did not accept in time.
+    """
+    timeouts = timeouts or DEFAULT_TIMEOUTS
+    sock = socket.create_connection((host, port), timeout=timeouts.upstream_connect)
+    sock.settimeout(None)
+    return sock
+
+
+def recv_upstream(sock, timeouts=None, size=65536):
+    """
+    Read the whole response of a backend, until it closes the connection.
+
+    :rtype bytes: raw response.
+
+    :raises UpstreamTimeout: if the backend stayed silent for ``upstream_read``.
+    """
+    timeouts = timeouts or DEFAULT_TIMEOUTS
+    timer = SocketTimer(sock)
+    chunks = []
+    try:
+        while True:
+            timer.arm(timeouts.upstream_read, "upstream_read")
+            chunk = sock.recv(size)
+            if not chunk:
+                if timer.expired is not None:
+                    raise UpstreamTimeout("Upstream read timeout")
+                return b"".join(chunks)
+            chunks.append(chunk)
+    finally:
+        timer.cancel()
+
+
+def add_arguments(parser):
+    """
+    Add the timeout options to a start script's argument parser.
+    """
+    defaults = DEFAULT_TIMEOUTS
+    parser.add_argument('--header-timeout', type=float, default=defaults.header_read,
+                        help='Seconds to receive the request headers')
+    parser.add_argument('--body-timeout', type=float, default=defaults.body_read,
+                        help='Seconds to receive the request body')
+    parser.add_argument('--idle-timeout', type=float, default=defaults.idle,
+                        help='Longest silence allowed while reading a request')
+    parser.add_argument('--upstream-connect-timeout', type=float,
+                        default=defaults.upstream_connect,
+                        help='Seconds to connect to a backend (proxy)')
+    parser.add_argument('--upstream-read-timeout', type=float,
+                        default=defaults.upstream_read,
+                        help='Longest silence allowed from a backend (proxy)')
+    parser.add_argument('--keepalive-timeout', type=float, default=defaults.keepalive,
+                        help='Seconds a kept-alive client may idle between requests (proxy)')
+
+
+def from_args(args):
+    """
+    :rtype Timeouts: settings from parsed start script options.
+    """
+    return Timeouts(args.header_timeout, args.body_timeout, args.idle_timeout,
+                    args.upstream_connect_timeout, args.upstream_read_timeout,
+                    args.keepalive_timeout)
@@ -18,6 +18,13 @@ This module provides a WeApRous object to deploy RESTful url web app with routin
 """
 
 from .backend import create_backend
+from .serializers import SerializerRegistry
+from .templates import TemplateEngine
+from .assets import AssetBundle
+from .aio import is_async_handler
+from .request import takes_request
+from .websocket import MAX_MESSAGE_SIZE, PING_INTERVAL
+from .offload import EXECUTORS, ProcessOffload, check_picklable
 
 class WeApRous:
     """The fully mutable :class:`WeApRous <WeApRous>` object, which is a lightweight,
@@ -43,13 +50,31 @@ class WeApRous:
       >>> app.run()
     """
 
-    def __init__(self):
+    def __init__(self, template_dir="www", process_workers=None, max_pending=None,
+                 asset_dirs=("static",)):
         """
         Initialize a new WeApRous instance.
 
         Sets up an empty route registry and prepares placeholders for IP and port.
+        Dict results are encoded by :attr:`serializers`, which negotiates JSON
+        or MessagePack from the request's ``Accept`` header. HTML pages are
+        rendered by :attr:`templates` from ``template_dir``. Routes with
+        ``executor="process"`` run in :attr:`process_pool`, whose workers
+        are only spawned if such a route exists. Files under ``asset_dirs``
+        are served from :attr:`assets` under fingerprinted URLs, given to
+        templates by ``asset()``.
+
+        :param template_dir (str or tuple): directory holding the app's templates,
+            or several directories searched in order.
+        :param process_workers (int, optional): worker processes, one per CPU by default.
+        :param max_pending (int, optional): offloaded requests queued or running at once.
+        :param asset_dirs (tuple): directories bundled as immutable assets.
         """
         self.routes = {}
+        self.serializers = SerializerRegistry()
+        self.assets = AssetBundle(asset_dirs)
+        self.templates = TemplateEngine(template_dir, globals={"asset": self.asset_url})
+        self.process_pool = ProcessOffload(process_workers, max_pending)
         self.ip = None
         self.port = None
         return
@@ -64,38 +89,141 @@ class WeApRous:
         self.ip = ip
         self.port = port
 
-    def route(self, path, methods=['GET']):
+    def route(self, path, methods=['GET'], timeout=None, executor=None, max_upload=None):
         """
         Decorator to register a route handler for a specific path and HTTP methods.
 
+        ``async def`` handlers are detected here and run on the shared event
+        loop (see :mod:`daemon.aio`); plain functions run in the connection
+        thread as before. Handlers that declare a ``request`` parameter also
+        get the :class:`Request <daemon.request.Request>`, with uploaded
+        files in ``request.form`` (see :mod:`daemon.multipart`).
+
         :param path (str): The URL path to route.
         :param methods (list): A list of HTTP methods (e.g., ['GET', 'POST']) to bind.
+        :param timeout (float, optional): seconds an async or process handler
+            may run before it is answered with 504.
+        :param executor (str, optional): ``"process"`` runs a CPU-bound,
+            module-level handler in the app's worker processes (see
+            :mod:`daemon.offload`).
+        :param max_upload (int, optional): largest ``multipart/form-data``
+            body accepted, :data:`daemon.multipart.MAX_UPLOAD_SIZE` by default.
 
         :rtype: function - A decorator that registers the handler function.
         """
+        if executor not in EXECUTORS:
+            raise ValueError("Unknown executor: {!r}".format(executor))
+
         def decorator(func):
+            if executor == "process":
+                if is_async_handler(func):
+                    raise ValueError("async handlers can not run in a process")
+                if takes_request(func):
+                    raise ValueError("process handlers can not take the request")
+                check_picklable(func)
+
             for method in methods:
                 self.routes[(method.upper(), path)] = func
 
             # Optional attach route metadata to the function
             func._route_path = path
             func._route_methods = methods
+            func._serializers = self.serializers
+            func._is_async = is_async_handler(func)
+            func._timeout = timeout
+            func._offload = self.process_pool if executor == "process" else None
+            func._takes_request = takes_request(func)
+            func._max_upload = max_upload
+
+            return func
+        return decorator
+
+    def websocket(self, path, subprotocols=(), max_message=MAX_MESSAGE_SIZE,
+                  ping_interval=PING_INTERVAL):
+        """
+        Decorator to register a WebSocket handler for a path.
+
+        The handler is an ``async def handler(ws)`` run on the shared event
+        loop once the upgrade is accepted; it gets a
+        :class:`WebSocket <daemon.websocket.WebSocket>` and the connection
+        is closed when it returns. Rooms and broadcasts go through
+        :data:`daemon.websocket.HUB`.
+
+        :param path (str): The URL path to route.
+        :param subprotocols (tuple): subprotocols offered, by preference.
+        :param max_message (int): largest incoming message accepted.
+        :param ping_interval (float): seconds between keepalive pings, 0 disables.
+
+        :rtype: function - A decorator that registers the handler function.
+        """
+        def decorator(func):
+            if not is_async_handler(func):
+                raise ValueError("WebSocket handlers must be async def functions")
+
+            self.routes[("GET", path)] = func
+
+            func._route_path = path
+            func._route_methods = ["GET"]
+            func._websocket = True
+            func._subprotocols = tuple(subprotocols)
+            func._max_message = max_message
+            func._ping_interval = ping_interval
 
             return func
         return decorator
 
-    def run(self):
+    def asset_url(self, path):
+        """
+        Fingerprinted URL of a static asset, for links in pages and handlers.
+
+        :param path (str): asset path, e.g. ``css/styles.css``.
+
+        :rtype str: e.g. ``/css/styles.3f9a1c0b2e7d.css``.
+        """
+        return self.assets.url(path)
+
+    def render(self, name, status=200, **context):
+        """
+        Render a template into a route result.
+
+        :param name (str): template path relative to the template directory.
+        :param status (int): HTTP status code of the page.
+        :param context: names available to the template.
+
+        :rtype tuple: (status, headers, body) with the rendered HTML bytes.
+
+        :raises FileNotFoundError: if the template does not exist.
+        """
+        body = self.templates.render_bytes(name, **context)
+        return (status, {"Content-Type": "text/html; charset=utf-8"}, body)
+
+    def run(self, metrics_path=None, admission=None, timeouts=None):
         """
         Start the backend server and begin handling requests.
 
         This method launches the TCP server using the configured IP and port,
         and dispatches incoming requests to the registered route handlers.
 
+        :param metrics_path (str, optional): expose Prometheus metrics at this path.
+        :param admission (AdmissionController, optional): connection and
+            in-flight request caps.
+        :param timeouts (Timeouts, optional): request read timeouts.
+
         :raise: Error if IP or port has not been configured.
         """
         if not self.ip or not self.port:
             print("Rous app need to preapre address"
                   "by calling app.prepare_address(ip,port)")
 
-        create_backend(self.ip, self.port, self.routes)
+        if any(getattr(func, "_offload", None) for func in self.routes.values()):
+            # Fork the workers now, before the server starts its threads.
+            self.process_pool.start()
+
+        # Hash the assets once; pages link to them by content fingerprint.
+        self.assets.build()
+        self.templates.clear()
+
+        create_backend(self.ip, self.port, self.routes,
+                       metrics_path=metrics_path, admission=admission,
+                       timeouts=timeouts, assets=self.assets)
         
@@ -0,0 +1,642 @@
+#
+# Copyright (C) 2025 pdnguyen of HCMC University of Technology VNU-HCM.
+# All rights reserved.
+# This file is part of the CO3093/CO3094 course.
+#
+# WeApRous release
+#
+# The authors hereby grant to Licensee personal permission to use
+# and modify the Licensed Source Code for the sole purpose of studying
+# while attending the course
+#
+
+"""
+daemon.websocket
+~~~~~~~~~~~~~~~~~
+
+This module provides WebSocket (RFC 6455) connections and a broadcast hub.
+
+A WebSocket route answers the upgrade handshake in the connection thread
+and hands the socket to the shared event loop (see :mod:`daemon.aio`):
+an open WebSocket holds no thread, however long it stays connected.
+
+Usage::
+
+  >>> @app.websocket("/chat")
+  >>> async def chat(ws):
+  >>>     room = ws.request.args.get("room", "lobby")
+  >>>     HUB.join(room, ws)
+  >>>     async for message in ws:
+  >>>         HUB.broadcast(room, message)
+
+Flow control works in both directions:
+
+- incoming messages wait in a queue of ``max_queue`` messages; when the
+  handler falls behind, the socket is no longer read and TCP slows the
+  client down;
+- :meth:`WebSocket.send` waits while the client is slow to read, while
+  :meth:`Hub.broadcast` never waits: a member with more than
+  ``write_limit`` bytes unsent is dropped instead of stalling the room.
+
+The server pings every ``ping_interval`` seconds and drops a client that
+does not answer within ``ping_timeout``.
+"""
+
+import asyncio
+import base64
+import binascii
+import hashlib
+import struct
+
+from .aio import RUNNER
+from .httpparser import HttpParseError
+from .metrics import METRICS
+from .response import STATUS_LINES
+
+#: Appended to the client's key to compute ``Sec-WebSocket-Accept``.
+GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+#: Upper bound of one incoming message, after reassembly.
+MAX_MESSAGE_SIZE = 1024 * 1024
+
+#: Incoming messages queued for the handler before the socket is no longer read.
+MAX_QUEUE = 32
+
+#: Bytes queued for a slow client before a broadcast drops it.
+WRITE_LIMIT = 1024 * 1024
+
+#: Seconds between keepalive pings, and to wait for the pong.
+PING_INTERVAL = 20.0
+PING_TIMEOUT = 20.0
+
+#: Seconds the closing handshake may take.
+CLOSE_TIMEOUT = 5.0
+
+_UPGRADE_TAIL = b"Upgrade: websocket\r\nConnection: Upgrade\r\n"
+
+
+class HandshakeError(HttpParseError):
+    """Raised when a request to a WebSocket route is not a valid upgrade."""
+
+
+class ProtocolError(Exception):
+    """Raised when the client breaks the framing rules.
+
+    :attrs code (int): close code sent to the client.
+    """
+
+    def __init__(self, message, code=1002):
+        super().__init__(message)
+        self.code = code
+
+
+class ConnectionClosed(Exception):
+    """Raised by :meth:`WebSocket.receive` and :meth:`WebSocket.send` once
+    the connection is closed.
+
+    :attrs code (int): close code, ``1006`` if the connection was lost.
+    :attrs reason (str): close reason sent by the peer.
+    """
+
+    def __init__(self, code=1006, reason=""):
+        super().__init__("WebSocket closed ({}) {}".format(code, reason).rstrip())
+        self.code = code
+        self.reason = reason
+
+
+# ---------------------------------------------------------------------------
+#  HANDSHAKE
+# ---------------------------------------------------------------------------
+def accept_key(key):
+    """
+    The ``Sec-WebSocket-Accept`` value answering ``Sec-WebSocket-Key``.
+
+    :param key (bytes): the client's key, as sent.
+    """
+    return base64.b64encode(hashlib.sha1(key + GUID).digest())
+
+
+def _tokens(value):
+    return {token.strip().lower() for token in value.split(",")}
+
+
+def is_upgrade(headers):
+    """Whether a request asks to switch to the WebSocket protocol."""
+    return "websocket" in _tokens(headers.get("upgrade", "")) \
+        and "upgrade" in _tokens(headers.get("connection", ""))
+
+
+def handshake(request, subprotocols=()):
+    """
+    Validate an opening handshake and build the ``101`` response.
+
+    :param request (Request): the upgrade request.
+    :param subprotocols (tuple): subprotocols the route speaks, by preference.
+
+    :rtype tuple: (response bytes, chosen subprotocol or None).
+
+    :raises HandshakeError: ``426`` for a plain HTTP request or another
+        protocol version, ``400`` for an invalid key.
+    """
+    headers = request.headers
+    if not is_upgrade(headers):
+        raise HandshakeError("WebSocket upgrade required", 426)
+    if headers.get("sec-websocket-version", "").strip() != "13":
+        raise HandshakeError("Unsupported WebSocket version, use 13", 426)
+    key = headers.get("sec-websocket-key", "").strip().encode("latin-1")
+    try:
+        valid = len(base64.b64decode(key, validate=True)) == 16
+    except (binascii.Error, ValueError):
+        valid = False
+    if not valid:
+        raise HandshakeError("Invalid Sec-WebSocket-Key")
+
+    offered = [p.strip() for p in headers.get("sec-websocket-protocol", "").split(",")]
+    chosen = next((p for p in subprotocols if p in offered), None)
+    parts = [STATUS_LINES[101], _UPGRADE_TAIL, b"Sec-WebSocket-Accept: ", accept_key(key), b"\r\n"]
+    if chosen:
+        parts.append("Sec-WebSocket-Protocol: {}\r\n".format(chosen).encode("latin-1"))
+    parts.append(b"\r\n")
+    return b"".join(parts), chosen
+
+
+# ---------------------------------------------------------------------------
+#  FRAMING
+# ---------------------------------------------------------------------------
+def apply_mask(data, key):
+    """
+    XOR ``data`` with the 4-byte masking ``key``, as one big-integer
+    operation instead of a loop over the bytes.
+
+    :rtype bytes: the masked or unmasked data.
+    """
+    n = len(data)
+    if not n:
+        return b""
+    pad = bytes(key) * (n // 4 + 1)
+    return (int.from_bytes(data, "little") ^ int.from_bytes(pad[:n], "little")).to_bytes(n, "little")
+
+
+def encode_frame(opcode, payload=b"", fin=True):
+    """
+    Encode one unmasked server frame.
+
+    :param payload (bytes or str): str is encoded as UTF-8.
+
+    :rtype bytes: frame header and payload.
+    """
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    first = opcode | 0x80 if fin else opcode
+    n = len(payload)
+    if n < 126:
+        head = struct.pack("!BB", first, n)
+    elif n < 0x10000:
+        head = struct.pack("!BBH", first, 126, n)
+    else:
+        head = struct.pack("!BBQ", first, 127, n)
+    return head + payload
+
+
+def encode_close(code=1000, reason=""):
+    """:rtype bytes: a close frame with ``code`` and ``reason``."""
+    return encode_frame(OP_CLOSE, struct.pack("!H", code) + reason.encode("utf-8")[:123])
+
+
+def encode_message(message):
+    """:rtype bytes: a text frame for str, a binary frame for bytes."""
+    if isinstance(message, str):
+        return encode_frame(OP_TEXT, message)
+    return encode_frame(OP_BINARY, bytes(message))
+
+
+class FrameParser(object):
+    """The :class:`FrameParser <FrameParser>` object, which parses the
+    frames of one client from raw socket chunks and reassembles fragmented
+    messages.
+
+    A frame is only buffered once its header showed it fits the limit.
+
+    :attrs max_message (int): largest message accepted.
+    """
+
+    def __init__(self, max_message=MAX_MESSAGE_SIZE):
+        self.max_message = max_message
+        self._buf = bytearray()
+        self._opcode = None
+        self._fragments = []
+        self._size = 0
+
+    def feed(self, data):
+        """
+        Parse the next chunk.
+
+        :rtype list: ``(opcode, payload)`` of every complete message and
+            control frame; text payloads are str, others bytes.
+
+        :raises ProtocolError: on a framing error or an oversized message.
+        """
+        buf = self._buf
+        buf += data
+        out = []
+        pos = 0
+        while len(buf) - pos >= 2:
+            first, second = buf[pos], buf[pos + 1]
+            opcode = first & 0x0F
+            if first & 0x70:
+                raise ProtocolError("Reserved bits set without an extension")
+            if not second & 0x80:
+                raise ProtocolError("Client frames must be masked")
+            length = second & 0x7F
+            start = pos + 2
+            if length == 126:
+                if len(buf) - start < 2:
+                    break
+                length = int.from_bytes(buf[start:start + 2], "big")
+                start += 2
+            elif length == 127:
+                if len(buf) - start < 8:
+                    break
+                length = int.from_bytes(buf[start:start + 8], "big")
+                start += 8
+
+            if opcode >= OP_CLOSE:
+                if opcode > OP_PONG:
+                    raise ProtocolError("Unknown opcode {}".format(opcode))
+                if not first & 0x80 or length > 125:
+                    raise ProtocolError("Invalid control frame")
+            elif opcode > OP_BINARY:
+                raise ProtocolError("Unknown opcode {}".format(opcode))
+            elif self._size + length > self.max_message:
+                raise ProtocolError("Message too big", 1009)
+
+            end = start + 4 + length
+            if len(buf) < end:
+                break
+            payload = apply_mask(buf[start + 4:end], buf[start:start + 4])
+            pos = end
+
+            if opcode >= OP_CLOSE:
+                out.append((opcode, payload))
+                continue
+            if opcode == OP_CONTINUATION:
+                if self._opcode is None:
+                    raise ProtocolError("Continuation without a message")
+            elif self._opcode is not None:
+                raise ProtocolError("New message before the last one ended")
+            else:
+                self._opcode = opcode
+            self._fragments.append(payload)
+            self._size += length
+            if first & 0x80:
+                message = b"".join(self._fragments)
+                opcode = self._opcode
+                self._opcode = None
+                self._fragments = []
+                self._size = 0
+                if opcode == OP_TEXT:
+                    try:
+                        message = message.decode("utf-8")
+                    except UnicodeDecodeError:
+                        raise ProtocolError("Text message is not UTF-8", 1007)
+                out.append((opcode, message))
+
+        del buf[:pos]
+        return out
+
+
+# ---------------------------------------------------------------------------
+#  CONNECTION
+# ---------------------------------------------------------------------------
+class WebSocket(object):
+    """The :class:`WebSocket <WebSocket>` object, one open connection,
+    driven by the event loop.
+
+    Iterating it yields incoming messages until the connection closes.
+
+    :attrs request (Request): the upgrade request, with its cookies and args.
+    :attrs subprotocol (str): negotiated subprotocol, or None.
+    :attrs closed (bool): whether the connection is gone.
+    :attrs close_code (int): close code once closed.
+    """
+
+    def __init__(self, reader, writer, request=None, subprotocol=None,
+                 max_message=MAX_MESSAGE_SIZE, max_queue=MAX_QUEUE, write_limit=WRITE_LIMIT,
+                 ping_interval=PING_INTERVAL, ping_timeout=PING_TIMEOUT):
+        self.request = request
+        self.subprotocol = subprotocol
+        self.max_queue = max_queue
+        self.write_limit = write_limit
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.closed = False
+        self.close_code = None
+        self.close_reason = ""
+        self._reader = reader
+        self._writer = writer
+        self._parser = FrameParser(max_message)
+        self._messages = []
+        self._readable = asyncio.Event()
+        self._room = asyncio.Event()
+        self._room.set()
+        self._pong = None
+        self._closing = False
+        self._on_close = []
+        self._tasks = ()
+
+    def start(self, surplus=b""):
+        """Start reading, beginning with ``surplus`` bytes read with the handshake."""
+        self._tasks = (asyncio.ensure_future(self._read_loop(surplus)),
+                       asyncio.ensure_future(self._keepalive()))
+
+    def on_close(self, callback):
+        """Call ``callback(ws)`` once the connection is closed."""
+        self._on_close.append(callback)
+
+    # --- receiving -------------------------------------------------------
+    async def receive(self):
+        """
+        Wait for the next message.
+
+        :rtype str or bytes: a text or binary message.
+
+        :raises ConnectionClosed: once the connection is closed and every
+            queued message was received.
+        """
+        messages = self._messages
+        while not messages:
+            if self.closed:
+                raise ConnectionClosed(self.close_code or 1006, self.close_reason)
+            self._readable.clear()
+            await self._readable.wait()
+        message = messages.pop(0)
+        if len(messages) < self.max_queue:
+            self._room.set()
+        return message
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return await self.receive()
+        except ConnectionClosed:
+            raise StopAsyncIteration
+
+    async def _read_loop(self, surplus):
+        parser = self._parser
+        data = surplus
+        try:
+            while True:
+                if data:
+                    for opcode, payload in parser.feed(data):
+                        if opcode <= OP_BINARY:
+                            METRICS.inc("weaprous_websocket_messages_total", (("direction", "in"),))
+                            self._messages.append(payload)
+                            self._readable.set()
+                            if len(self._messages) >= self.max_queue:
+                                # Handler behind: stop reading, TCP pushes back.
+                                self._room.clear()
+                                await self._room.wait()
+                        elif opcode == OP_PING:
+                            if not self._closing:
+                                self._writer.write(encode_frame(OP_PONG, payload))
+                        elif opcode == OP_PONG:
+                            if self._pong is not None:
+                                self._pong.set()
+                        else:
+                            self._peer_closed(payload)
+                            return
+                data = await self._reader.read(65536)
+                if not data:
+                    return
+        except ProtocolError as e:
+            print("[WebSocket] Protocol error: {}".format(e))
+            self._send_close(e.code, str(e))
+            self.close_code = e.code
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.closed = True
+            if self.close_code is None:
+                self.close_code = 1006
+            self._readable.set()
+
+    def _peer_closed(self, payload):
+        if len(payload) >= 2:
+            self.close_code = struct.unpack("!H", payload[:2])[0]
+            self.close_reason = payload[2:].decode("utf-8", "replace")
+        elif payload:
+            raise ProtocolError("Invalid close frame")
+        else:
+            self.close_code = 1005
+        # Echo the close unless it answers ours.
+        self._send_close(1000 if self.close_code == 1005 else self.close_code)
+
+    # --- sending ---------------------------------------------------------
+    async def send(self, message):
+        """
+        Send a text (str) or binary (bytes) message, waiting while the
+        client is slow to read.
+
+        :raises ConnectionClosed: if the connection is closing.
+        """
+        if self._closing:
+            raise ConnectionClosed(self.close_code or 1006, self.close_reason)
+        self._writer.write(encode_message(message))
+        METRICS.inc("weaprous_websocket_messages_total", (("direction", "out"),))
+        await self._writer.drain()
+
+    def send_frame_nowait(self, frame):
+        """
+        Queue an encoded frame without waiting, for fan-out.
+
+        A client with more than ``write_limit`` bytes still unsent is
+        dropped instead.
+
+        :rtype bool: False if the frame was not queued.
+        """
+        if self._closing:
+            return False
+        if self._writer.transport.get_write_buffer_size() > self.write_limit:
+            print("[WebSocket] Dropping slow client")
+            METRICS.inc("weaprous_websocket_dropped_total")
+            self.abort()
+            return False
+        self._writer.write(frame)
+        return True
+
+    async def ping(self, data=b""):
+        """Send a ping; the pong is awaited by the keepalive task."""
+        self._writer.write(encode_frame(OP_PING, data))
+        await self._writer.drain()
+
+    def _send_close(self, code, reason=""):
+        if not self._closing:
+            self._closing = True
+            self._writer.write(encode_close(code, reason))
+
+    async def close(self, code=1000, reason=""):
+        """
+        Run the closing handshake, then close the socket.
+
+        :param code (int): close code, ``1000`` for a normal closure.
+        """
+        self._send_close(code, reason)
+        reader = self._tasks[0] if self._tasks else None
+        if reader is not None and not reader.done():
+            # Unblock a reader waiting for the handler to catch up.
+            self._room.set()
+            try:
+                await asyncio.wait_for(asyncio.shield(reader), CLOSE_TIMEOUT)
+            except asyncio.TimeoutError:
+                pass
+        self._finish()
+
+    def abort(self):
+        """Drop the connection without a closing handshake."""
+        self._closing = True
+        self.close_code = self.close_code or 1006
+        self._writer.transport.abort()
+        self._finish()
+
+    def _finish(self):
+        for task in self._tasks:
+            if not task.done():
+                task.cancel()
+        if not self._writer.transport.is_closing():
+            self._writer.close()
+        self.closed = True
+        self._readable.set()
+        callbacks, self._on_close = self._on_close, []
+        for callback in callbacks:
+            callback(self)
+
+    async def _keepalive(self):
+        if not self.ping_interval:
+            return
+        while not self._closing:
+            await asyncio.sleep(self.ping_interval)
+            if self._closing:
+                return
+            self._pong = asyncio.Event()
+            self._writer.write(encode_frame(OP_PING))
+            try:
+                await asyncio.wait_for(self._pong.wait(), self.ping_timeout)
+            except asyncio.TimeoutError:
+                print("[WebSocket] No pong within {}s, dropping client".format(self.ping_timeout))
+                self.abort()
+                return
+
+
+# ---------------------------------------------------------------------------
+#  BROADCAST HUB
+# ---------------------------------------------------------------------------
+class Hub(object):
+    """The :class:`Hub <Hub>` object, which groups connections into rooms
+    and fans messages out to them on the event loop.
+
+    Members leave every room when their connection closes. :meth:`join`,
+    :meth:`leave` and :meth:`broadcast` run on the loop, from WebSocket
+    handlers; plain route handlers, running in connection threads, use
+    :meth:`publish`.
+    """
+
+    def __init__(self):
+        self._rooms = {}
+        self._members = {}
+
+    def join(self, room, ws):
+        rooms = self._members.get(ws)
+        if rooms is None:
+            rooms = self._members[ws] = set()
+            ws.on_close(self.leave_all)
+        rooms.add(room)
+        self._rooms.setdefault(room, set()).add(ws)
+
+    def leave(self, room, ws):
+        members = self._rooms.get(room)
+        if members is not None:
+            members.discard(ws)
+            if not members:
+                del self._rooms[room]
+        rooms = self._members.get(ws)
+        if rooms is not None:
+            rooms.discard(room)
+
+    def leave_all(self, ws):
+        for room in self._members.pop(ws, ()):
+            members = self._rooms.get(room)
+            if members is not None:
+                members.discard(ws)
+                if not members:
+                    del self._rooms[room]
+
+    def members(self, room):
+        """:rtype int: connections in ``room``."""
+        return len(self._rooms.get(room, ()))
+
+    def rooms(self):
+        """:rtype list: names of the rooms with members."""
+        return list(self._rooms)
+
+    def broadcast(self, room, message, exclude=None):
+        """
+        Send ``message`` to every member of ``room``.
+
+        The frame is encoded once and queued on each connection without
+        waiting; members too slow to read are dropped.
+
+        :param exclude (WebSocket): a member left out, usually the sender.
+
+        :rtype int: members the message was queued for.
+        """
+        frame = encode_message(message)
+        sent = 0
+        for ws in list(self._rooms.get(room, ())):
+            if ws is not exclude and ws.send_frame_nowait(frame):
+                sent += 1
+        METRICS.inc("weaprous_websocket_messages_total", (("direction", "out"),), sent)
+        return sent
+
+    def publish(self, room, message):
+        """Broadcast from any thread; the fan-out runs on the event loop."""
+        RUNNER.loop.call_soon_threadsafe(self.broadcast, room, message)
+
+
+#: Hub shared by every WebSocket route of the process.
+HUB = Hub()
+
+
+async def serve(conn, request, hook, subprotocol=None, surplus=b""):
+    """
+    Run a WebSocket handler on an upgraded connection.
+
+    :param conn (socket.socket): client connection, non-blocking.
+    :param hook (function): the route's ``async def handler(ws)``.
+    :param surplus (bytes): frames received along with the handshake.
+    """
+    reader, writer = await asyncio.open_connection(sock=conn)
+    ws = WebSocket(reader, writer, request, subprotocol,
+                   max_message=getattr(hook, "_max_message", MAX_MESSAGE_SIZE),
+                   ping_interval=getattr(hook, "_ping_interval", PING_INTERVAL))
+    METRICS.gauge_add("weaprous_websocket_connections", 1)
+    code = 1000
+    ws.start(surplus)
+    try:
+        await hook(ws)
+    except ConnectionClosed:
+        pass
+    except Exception as e:
+        print("[WebSocket] Handler error: {}".format(e))
+        code = 1011
+    finally:
+        await ws.close(code)
+        METRICS.gauge_add("weaprous_websocket_connections", -1)
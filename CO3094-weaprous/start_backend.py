@@ -26,6 +26,7 @@ import socket
 import argparse
 
 from daemon import create_backend
+from daemon import admission, timeouts
 
 # Default port number used if none is specified via command-line arguments.
 PORT = 9000 
@@ -58,9 +59,20 @@ if __name__ == "__main__":
         default=PORT,
         help='Port number to bind the server. Default is {}.'.format(PORT)
     )
+    parser.add_argument(
+        '--metrics-path',
+        type=str,
+        default=None,
+        help='Expose Prometheus metrics at this URL path, e.g. /metrics. Disabled by default.'
+    )
  
+    admission.add_arguments(parser)
+    timeouts.add_arguments(parser)
+
     args = parser.parse_args()
     ip = args.server_ip
     port = args.server_port
 
-    create_backend(ip, port)
+    create_backend(ip, port, metrics_path=args.metrics_path,
+                   admission=admission.from_args("backend", args),
+                   timeouts=timeouts.from_args(args))
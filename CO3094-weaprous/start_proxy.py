@@ -43,23 +43,53 @@ from urllib.parse import urlparse
 from collections import defaultdict
 
 from daemon import create_proxy
+from daemon import admission, coalesce, timeouts
+from daemon.ratelimit import RateLimiter, parse_rate
+from daemon.proxyconfig import ConfigReloader
+from daemon.retry import RetryPolicy, parse_delay
 
 PROXY_PORT = 8080
 
+_HOST_BLOCK = re.compile(r'host\s+"([^"]+)"\s*\{(.*?)\}', re.DOTALL)
 
-def parse_virtual_hosts(config_file):
+
+def read_config(config_file):
     """
-    Parses virtual host blocks from a config file.
+    Reads the config file once, for every parser below.
+
+    A file with no host block, or with a ``host "..."`` whose block does not
+    close (e.g. caught halfway through an edit), is rejected.
 
     :config_file (str): Path to the NGINX config file.
-    :rtype list of dict: Each dict contains 'listen'and 'server_name'.
+    :rtype str: the config text.
+    :raises ValueError: if the file is empty or truncated.
     """
 
     with open(config_file, 'r') as f:
         config_text = f.read()
 
+    blocks = len(_HOST_BLOCK.findall(config_text))
+    if blocks == 0:
+        raise ValueError("{}: no host block".format(config_file))
+    if blocks < len(re.findall(r'host\s+"', config_text)):
+        raise ValueError("{}: unterminated host block".format(config_file))
+    return config_text
+
+
+def parse_virtual_hosts(config_file, config_text=None):
+    """
+    Parses virtual host blocks from a config file.
+
+    :config_file (str): Path to the NGINX config file.
+    :config_text (str): its text, already read by :func:`read_config`.
+    :rtype list of dict: Each dict contains 'listen'and 'server_name'.
+    """
+
+    if config_text is None:
+        config_text = read_config(config_file)
+
     # Match each host block
-    host_blocks = re.findall(r'host\s+"([^"]+)"\s*\{(.*?)\}', config_text, re.DOTALL)
+    host_blocks = _HOST_BLOCK.findall(config_text)
 
     dist_policy_map = ""
 
@@ -74,7 +104,7 @@ def parse_virtual_hosts(config_file):
         proxy_map[host] = map
 
         # Find dist_policy if present
-        policy_match = re.search(r'dist_policy\s+(\w+)', block)
+        policy_match = re.search(r'dist_policy\s+([\w-]+)', block)
         if policy_match:
             dist_policy_map = policy_match.group(1)
         else: #default policy is round_robin
@@ -101,6 +131,63 @@ def parse_virtual_hosts(config_file):
     return routes
 
 
+def parse_rate_limits(config_file, config_text=None):
+    """
+    Parses the rate limits of each virtual host block.
+
+    Recognized directives: ``limit_req_ip rate=20r/s burst=40;`` (per client
+    address) and ``limit_req_host rate=500r/s burst=1000;`` (whole host).
+    ``burst`` defaults to one second of traffic.
+
+    :config_file (str): Path to the NGINX config file.
+    :config_text (str): its text, already read by :func:`read_config`.
+    :rtype dict: host -> {"ip": (rate, burst), "host": (rate, burst)}.
+    """
+
+    if config_text is None:
+        config_text = read_config(config_file)
+
+    limits = {}
+    for host, block in _HOST_BLOCK.findall(config_text):
+        for scope, rate, burst in re.findall(
+                r'limit_req_(ip|host)\s+rate=([^\s;]+)(?:\s+burst=(\d+))?\s*;', block):
+            rate = parse_rate(rate)
+            burst = float(burst) if burst else max(1.0, rate)
+            limits.setdefault(host, {})[scope] = (rate, burst)
+
+    for key, value in limits.items():
+        print (key, "limits", value)
+    return limits
+
+
+def parse_retry_policies(config_file, config_text=None):
+    """
+    Parses the upstream retry and hedging settings of each virtual host block.
+
+    Recognized directives: ``proxy_next_upstream_tries 2;`` (upstreams tried
+    on connect failure) and ``hedge_after 150ms;`` (delay before a hedged GET).
+
+    :config_file (str): Path to the NGINX config file.
+    :config_text (str): its text, already read by :func:`read_config`.
+    :rtype dict: host -> RetryPolicy.
+    """
+
+    if config_text is None:
+        config_text = read_config(config_file)
+
+    policies = {}
+    for host, block in _HOST_BLOCK.findall(config_text):
+        tries = re.search(r'proxy_next_upstream_tries\s+(\d+)\s*;', block)
+        hedge = re.search(r'hedge_after\s+([^\s;]+)\s*;', block)
+        if tries or hedge:
+            policies[host] = RetryPolicy(int(tries.group(1)) if tries else None,
+                                         parse_delay(hedge.group(1)) if hedge else None)
+
+    for key, value in policies.items():
+        print (key, "retries", value.tries, "hedge_after", value.hedge_after)
+    return policies
+
+
 if __name__ == "__main__":
     """
     Entry point for launching the proxy server.
@@ -116,11 +203,33 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(prog='Proxy', description='', epilog='Proxy daemon')
     parser.add_argument('--server-ip', default='0.0.0.0')
     parser.add_argument('--server-port', type=int, default=PROXY_PORT)
+    parser.add_argument('--config', default='config/proxy.conf',
+                        help='Virtual host configuration file')
+    parser.add_argument('--metrics-path', default=None,
+                        help='Serve Prometheus metrics at this path (e.g. /metrics)')
+    parser.add_argument('--keepalive-requests', type=int, default=100,
+                        help='Requests served on one client connection before closing it')
  
+    admission.add_arguments(parser)
+    timeouts.add_arguments(parser)
+    coalesce.add_arguments(parser)
+
     args = parser.parse_args()
     ip = args.server_ip
     port = args.server_port
 
-    routes = parse_virtual_hosts("config/proxy.conf")
-
-    create_proxy(ip, port, routes)
+    def load_config(path):
+        # One read: routes, limits and retries come from the same version
+        text = read_config(path)
+        return (parse_virtual_hosts(path, text), RateLimiter(parse_rate_limits(path, text)),
+                parse_retry_policies(path, text))
+
+    # Reloaded on SIGHUP or when the file changes; a broken file is rejected
+    config = ConfigReloader(args.config, load_config)
+
+    create_proxy(ip, port, config.current.routes, metrics_path=args.metrics_path,
+                 admission=admission.from_args("proxy", args),
+                 timeouts=timeouts.from_args(args),
+                 config=config,
+                 keepalive_requests=args.keepalive_requests,
+                 coalesce=coalesce.from_args(args))
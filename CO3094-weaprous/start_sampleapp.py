@@ -23,7 +23,7 @@ from command-line arguments, and starts the backend daemon to handle HTTP reques
 
 # start_sampleapp.py
 import argparse
-from daemon import create_backend
+from daemon import admission, timeouts
 from apps.sampleApp import create_sampleapp
 
 DEFAULT_PORT = 9001
@@ -35,6 +35,11 @@ if __name__ == "__main__":
     )
     parser.add_argument('--server-ip', default='0.0.0.0', help='IP to bind')
     parser.add_argument('--server-port', type=int, default=DEFAULT_PORT, help='Port number')
+    parser.add_argument('--metrics-path', default=None,
+                        help='Expose Prometheus metrics at this path (e.g. /metrics)')
+
+    admission.add_arguments(parser)
+    timeouts.add_arguments(parser)
 
     args = parser.parse_args()
     ip, port = args.server_ip, args.server_port
@@ -45,4 +50,7 @@ if __name__ == "__main__":
     print(f"\n--- Starting SampleApp Backend on {ip}:{port} ---")
     print(f"[Registered routes] {list(routes.keys())}\n")
 
-    create_backend(ip, port, routes=routes)
+    app.prepare_address(ip, port)
+    app.run(metrics_path=args.metrics_path,
+            admission=admission.from_args("backend", args),
+            timeouts=timeouts.from_args(args))